@@ -0,0 +1,67 @@
+"""add unique constraint on deal title and marketplace
+
+Revision ID: 3f9c2a7d5b10
+Revises: e63546b27785
+Create Date: 2026-10-17 09:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9c2a7d5b10'
+down_revision: Union[str, None] = 'e63546b27785'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Collapse duplicate (title, marketplace) rows onto the lowest id before the
+    # constraint goes on, re-pointing favorites and shares at the surviving row.
+    op.execute(sa.text("""
+        CREATE TEMPORARY TABLE deal_merge_map ON COMMIT DROP AS
+        SELECT d.id AS old_id, k.keep_id
+        FROM deals d
+        JOIN (
+            SELECT title, marketplace, MIN(id) AS keep_id
+            FROM deals
+            GROUP BY title, marketplace
+            HAVING COUNT(*) > 1
+        ) k ON k.title = d.title AND k.marketplace = d.marketplace
+        WHERE d.id <> k.keep_id
+    """))
+    op.execute(sa.text("""
+        DELETE FROM favorite_deals f
+        USING deal_merge_map m
+        WHERE f.deal_id = m.old_id
+          AND EXISTS (
+              SELECT 1
+              FROM favorite_deals g
+              LEFT JOIN deal_merge_map gm ON gm.old_id = g.deal_id
+              WHERE g.device_id = f.device_id
+                AND COALESCE(gm.keep_id, g.deal_id) = m.keep_id
+                AND (g.deal_id = m.keep_id OR g.id < f.id)
+          )
+    """))
+    op.execute(sa.text("""
+        UPDATE favorite_deals f
+        SET deal_id = m.keep_id
+        FROM deal_merge_map m
+        WHERE f.deal_id = m.old_id
+    """))
+    op.execute(sa.text("""
+        UPDATE shared_deals s
+        SET deal_id = m.keep_id
+        FROM deal_merge_map m
+        WHERE s.deal_id = m.old_id
+    """))
+    op.execute(sa.text("DELETE FROM deals d USING deal_merge_map m WHERE d.id = m.old_id"))
+
+    op.create_unique_constraint('uq_deal_title_marketplace', 'deals', ['title', 'marketplace'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_deal_title_marketplace', 'deals', type_='unique')
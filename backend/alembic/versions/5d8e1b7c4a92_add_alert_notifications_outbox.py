@@ -0,0 +1,47 @@
+"""add alert_notifications outbox table
+
+Revision ID: 5d8e1b7c4a92
+Revises: c2e7a9f14d36
+Create Date: 2026-10-17 15:42:08.318274
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d8e1b7c4a92'
+down_revision: Union[str, None] = 'c2e7a9f14d36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('alert_notifications',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('alert_id', sa.Integer(), nullable=False),
+    sa.Column('device_id', sa.String(length=120), nullable=False),
+    sa.Column('deal_id', sa.Integer(), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=False),
+    sa.Column('status', sa.String(length=20), server_default='pending', nullable=False),
+    sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('next_attempt_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('sent_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['alert_id'], ['deal_alerts.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['deal_id'], ['deals.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_alert_notifications_alert_id'), 'alert_notifications', ['alert_id'], unique=False)
+    op.create_index(op.f('ix_alert_notifications_id'), 'alert_notifications', ['id'], unique=False)
+    op.create_index('ix_alert_notifications_status_next_attempt', 'alert_notifications', ['status', 'next_attempt_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_alert_notifications_status_next_attempt', table_name='alert_notifications')
+    op.drop_index(op.f('ix_alert_notifications_id'), table_name='alert_notifications')
+    op.drop_index(op.f('ix_alert_notifications_alert_id'), table_name='alert_notifications')
+    op.drop_table('alert_notifications')
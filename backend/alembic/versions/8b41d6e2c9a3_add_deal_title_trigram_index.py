@@ -0,0 +1,34 @@
+"""add trigram index on deal title for text search
+
+Revision ID: 8b41d6e2c9a3
+Revises: 3f9c2a7d5b10
+Create Date: 2026-10-17 11:40:05.402871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b41d6e2c9a3'
+down_revision: Union[str, None] = '3f9c2a7d5b10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index(
+        'ix_deals_title_trgm',
+        'deals',
+        ['title'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'title': 'gin_trgm_ops'},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_deals_title_trgm', table_name='deals', postgresql_using='gin')
+    # pg_trgm is left installed; other objects in the database may depend on it
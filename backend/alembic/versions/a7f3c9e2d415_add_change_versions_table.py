@@ -0,0 +1,30 @@
+"""add change_versions table for version-based ETags
+
+Revision ID: a7f3c9e2d415
+Revises: 5d8e1b7c4a92
+Create Date: 2026-10-17 16:20:51.904117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7f3c9e2d415'
+down_revision: Union[str, None] = '5d8e1b7c4a92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('change_versions',
+    sa.Column('scope', sa.String(length=160), nullable=False),
+    sa.Column('version', sa.BigInteger(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('scope')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('change_versions')
@@ -0,0 +1,32 @@
+"""add cache_entries table for persisted gateway cache entries
+
+Revision ID: b91d4f3e7c28
+Revises: e4b8d2f6a713
+Create Date: 2026-10-17 18:05:37.240518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b91d4f3e7c28'
+down_revision: Union[str, None] = 'e4b8d2f6a713'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('cache_entries',
+    sa.Column('namespace', sa.String(length=50), nullable=False),
+    sa.Column('key', sa.Text(), nullable=False),
+    sa.Column('stored_at', sa.Float(), nullable=False),
+    sa.Column('value', sa.JSON(), nullable=False),
+    sa.PrimaryKeyConstraint('namespace', 'key')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('cache_entries')
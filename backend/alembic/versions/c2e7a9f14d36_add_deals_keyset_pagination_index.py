@@ -0,0 +1,31 @@
+"""add composite index for deal keyset pagination
+
+Revision ID: c2e7a9f14d36
+Revises: 8b41d6e2c9a3
+Create Date: 2026-10-17 13:05:27.661930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2e7a9f14d36'
+down_revision: Union[str, None] = '8b41d6e2c9a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_deals_active_discount_id',
+        'deals',
+        ['is_active', sa.text('discount_percent DESC'), sa.text('id DESC')],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_deals_active_discount_id', table_name='deals')
@@ -0,0 +1,31 @@
+"""add covering index for the ids-only favorites listing
+
+Revision ID: e4b8d2f6a713
+Revises: a7f3c9e2d415
+Create Date: 2026-10-17 18:42:09.315804
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4b8d2f6a713'
+down_revision: Union[str, None] = 'a7f3c9e2d415'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_favorite_deals_device_created_deal',
+        'favorite_deals',
+        ['device_id', sa.text('created_at DESC'), sa.text('deal_id DESC')],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_favorite_deals_device_created_deal', table_name='favorite_deals')
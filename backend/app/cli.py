@@ -0,0 +1,143 @@
+"""Command-line entry points for offline jobs.
+
+Run from ``backend/`` with DATABASE_URL set, e.g.::
+
+    python -m app.cli recommendations --device-ids-file devices.txt > recs.ndjson
+    python -m app.cli recommendations --all-devices --output recs.ndjson
+    python -m app.cli alerts-worker --batch-size 200
+    python -m app.cli export --format csv --category Electronics --output deals.csv.gz
+"""
+
+import argparse
+import signal
+import sys
+import threading
+from collections.abc import Iterator
+
+from sqlalchemy import select, union
+from sqlalchemy.orm import Session
+
+from app import models
+from app.database import get_session_local, read_session
+from app.services import alert_outbox, deal_export, recommendations
+
+
+def _read_device_ids(path: str) -> Iterator[str]:
+    handle = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        for line in handle:
+            device_id = line.strip()
+            if device_id:
+                yield device_id
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+
+
+def _all_device_ids(db: Session) -> list[str]:
+    """Every device with at least one interest or favorite."""
+    query = union(
+        select(models.UserInterest.device_id),
+        select(models.FavoriteDeal.device_id),
+    )
+    return sorted(db.scalars(query))
+
+
+def recommendations_command(args: argparse.Namespace) -> int:
+    db = get_session_local()()
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        device_ids = _all_device_ids(db) if args.all_devices else _read_device_ids(args.device_ids_file)
+        written = 0
+        for response in recommendations.iter_batch_recommendations(db, device_ids, args.chunk_size):
+            output.write(response.model_dump_json() + "\n")
+            written += 1
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        db.close()
+
+    print(f"Wrote recommendations for {written} devices", file=sys.stderr)
+    return 0
+
+
+def alerts_worker_command(args: argparse.Namespace) -> int:
+    stop = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop.set())
+
+    metrics = alert_outbox.run_worker(
+        get_session_local(),
+        alert_outbox.build_sender(),
+        batch_size=args.batch_size,
+        poll_interval=args.poll_interval,
+        once=args.once,
+        stop=stop,
+        metrics_interval=args.metrics_interval,
+    )
+    print(f"Alert worker stopped: {metrics.snapshot()}", file=sys.stderr)
+    return 0
+
+
+def export_command(args: argparse.Namespace) -> int:
+    db = read_session()
+    output = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+    gzip = args.gzip or args.output.endswith(".gz")
+    try:
+        query = deal_export.export_query(args.category, args.marketplace, args.min_discount)
+        chunks = deal_export.iter_export(db, query, args.format)
+        for chunk in deal_export.gzip_chunks(chunks) if gzip else chunks:
+            output.write(chunk)
+    finally:
+        if output is not sys.stdout.buffer:
+            output.close()
+        db.close()
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    recs = subcommands.add_parser(
+        "recommendations", help="Write NDJSON recommendations for many devices"
+    )
+    source = recs.add_mutually_exclusive_group(required=True)
+    source.add_argument(
+        "--device-ids-file", help="File with one device id per line ('-' for stdin)"
+    )
+    source.add_argument(
+        "--all-devices", action="store_true", help="Every device with interests or favorites"
+    )
+    recs.add_argument("--output", default="-", help="Output file ('-' for stdout)")
+    recs.add_argument("--chunk-size", type=int, default=500, help="Devices loaded per query")
+    recs.set_defaults(handler=recommendations_command)
+
+    worker = subcommands.add_parser(
+        "alerts-worker", help="Deliver queued alert notifications (run several for throughput)"
+    )
+    worker.add_argument("--batch-size", type=int, default=100, help="Notifications claimed per batch")
+    worker.add_argument("--poll-interval", type=float, default=1.0, help="Seconds to idle when the queue is empty")
+    worker.add_argument("--metrics-interval", type=float, default=30.0, help="Seconds between metrics log lines")
+    worker.add_argument("--once", action="store_true", help="Exit once no due notifications remain")
+    worker.set_defaults(handler=alerts_worker_command)
+
+    export = subcommands.add_parser("export", help="Stream the active deal catalog as NDJSON or CSV")
+    export.add_argument("--format", choices=sorted(deal_export.FORMATS), default="ndjson")
+    export.add_argument("--category", help="Only deals in this category")
+    export.add_argument("--marketplace", help="Only deals from this marketplace")
+    export.add_argument("--min-discount", type=int, default=0, help="Minimum discount percent")
+    export.add_argument("--gzip", action="store_true", help="Gzip the output (implied by a .gz --output)")
+    export.add_argument("--output", default="-", help="Output file ('-' for stdout)")
+    export.set_defaults(handler=export_command)
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,20 @@
+import itertools
+import logging
 import os
 import re
+import threading
+import time
+from collections.abc import Iterator
+from uuid import uuid4
 
+from fastapi import Request
 from sqlalchemy import create_engine, event
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.exc import DBAPIError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import NullPool
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import NullPool, QueuePool
 
 # Lazy initialization for Vercel serverless compatibility
 # Environment variables are only available at RUNTIME, not during build phase
@@ -12,6 +22,17 @@ from sqlalchemy.pool import NullPool
 
 _engine = None
 _SessionLocal = None
+_async_engine = None
+_AsyncSessionLocal = None
+_async_engine_lock = threading.Lock()
+_replicas = None
+_replicas_lock = threading.Lock()
+_replica_turn = itertools.count()
+# device_id -> monotonic deadline until which its reads stay on the primary
+_recent_writes: dict[str, float] = {}
+_recent_writes_lock = threading.Lock()
+
+logger = logging.getLogger(__name__)
 
 Base = declarative_base()
 
@@ -31,27 +52,76 @@ def _validate_schema_name(schema_name: str) -> None:
         )
 
 
-def _get_engine():
-    """Lazily create the database engine on first use.
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
 
-    This defers reading DATABASE_URL until runtime, which is required for
-    Vercel serverless functions where env vars are only available at runtime,
-    not during the build phase when Python modules are imported.
+
+def _engine_profile() -> str:
+    """Connection strategy, chosen with DATABASE_ENGINE_PROFILE.
+
+    - ``serverless`` (default): NullPool, for Vercel functions behind NeonDB's
+      PgBouncer pooler in transaction mode.
+    - ``pooled``: a QueuePool of long-lived connections, for a long-running
+      server that talks to Postgres directly (or through a session-mode pooler).
     """
-    global _engine
+    profile = (os.getenv("DATABASE_ENGINE_PROFILE") or "serverless").lower()
+    if profile not in ("serverless", "pooled"):
+        raise ValueError(
+            f"Invalid DATABASE_ENGINE_PROFILE: '{profile}'. Must be 'serverless' or 'pooled'."
+        )
+    return profile
 
-    if _engine is not None:
-        return _engine
 
-    database_url = os.getenv("DATABASE_URL")
-    if not database_url:
-        raise RuntimeError(
-            "DATABASE_URL environment variable is not set. "
-            "Database connection requires DATABASE_URL to be configured."
+def _pool_options() -> dict:
+    """QueuePool settings of the pooled profile, shared by the sync and async engines."""
+    return {
+        "pool_size": _env_int("DATABASE_POOL_SIZE", 10),
+        "max_overflow": _env_int("DATABASE_MAX_OVERFLOW", 10),
+        "pool_timeout": _env_int("DATABASE_POOL_TIMEOUT", 30),
+        "pool_recycle": _env_int("DATABASE_POOL_RECYCLE", 1800),
+        "pool_pre_ping": os.getenv("DATABASE_POOL_PRE_PING", "").lower() in ("1", "true", "yes"),
+        "pool_use_lifo": True,
+    }
+
+
+def _set_search_path(dbapi_connection, schema_name: str) -> None:
+    cursor = dbapi_connection.cursor()
+    # Use quoted identifier for safety (schema name already validated)
+    cursor.execute(f'SET search_path TO "{schema_name}"')
+    cursor.close()
+
+
+def _create_engine(database_url: str, schema_name: str):
+    """Build an engine for ``database_url`` using the configured profile.
+
+    Both profiles honour DATABASE_QUERY_CACHE_SIZE, the size of SQLAlchemy's
+    compiled-statement cache (default 500; 0 disables it). psycopg2 has no
+    server-side prepared statements, so this cache is what saves re-compiling
+    the same queries on every request.
+    """
+    query_cache_size = _env_int("DATABASE_QUERY_CACHE_SIZE", 500)
+
+    if _engine_profile() == "pooled":
+        # Connections live across requests, so session state set once on connect
+        # persists; recycle keeps them younger than server/load-balancer idle
+        # timeouts, which replaces the per-checkout pre-ping round trip.
+        # Set DATABASE_POOL_PRE_PING=1 if connections can still die unannounced.
+        engine = create_engine(
+            database_url, poolclass=QueuePool, query_cache_size=query_cache_size, **_pool_options()
         )
 
-    schema_name = os.getenv("SCHEMA_NAME", "public")
-    _validate_schema_name(schema_name)
+        @event.listens_for(engine, "connect")
+        def set_search_path_on_connect(dbapi_connection, connection_record):
+            """Set search_path once per physical connection.
+
+            Committed right away: a plain SET is undone if its transaction rolls
+            back, and the pool rolls back every connection it takes back.
+            """
+            _set_search_path(dbapi_connection, schema_name)
+            dbapi_connection.commit()
+
+        return engine
 
     # Configure engine with schema isolation
     # Note: We don't use connect_args["options"] because NeonDB pooler doesn't support it
@@ -60,10 +130,12 @@ def _get_engine():
     # When using NeonDB's PgBouncer pooler (transaction pooling), session state such as
     # search_path is not guaranteed to persist. Using NullPool avoids double-pooling
     # and the checkout event re-applies search_path every time a connection is borrowed.
-    _engine = create_engine(database_url, pool_pre_ping=True, poolclass=NullPool)
+    engine = create_engine(
+        database_url, pool_pre_ping=True, poolclass=NullPool, query_cache_size=query_cache_size
+    )
 
     # Ensure all connections use the correct schema
-    @event.listens_for(_engine, "checkout")
+    @event.listens_for(engine, "checkout")
     def set_search_path_on_checkout(
         dbapi_connection, connection_record, connection_proxy
     ):
@@ -72,14 +144,117 @@ def _get_engine():
         This is required for PgBouncer transaction pooling mode, which may reset session
         state between transactions.
         """
-        cursor = dbapi_connection.cursor()
-        # Use quoted identifier for safety (schema name already validated above)
-        cursor.execute(f'SET search_path TO "{schema_name}"')
-        cursor.close()
+        _set_search_path(dbapi_connection, schema_name)
+
+    return engine
+
+
+# Async driver for each backend the sync engine is pointed at
+_ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
 
+def _async_url(database_url: str) -> URL:
+    """``database_url`` with its driver swapped for the async one.
+
+    asyncpg takes ``ssl`` where libpq takes ``sslmode``, and has no
+    ``channel_binding`` option, so NeonDB-style URLs are translated.
+    """
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend not in _ASYNC_DRIVERS:
+        raise ValueError(f"No async driver for database URLs of type '{backend}'")
+
+    url = url.set(drivername=_ASYNC_DRIVERS[backend])
+    if backend == "postgresql":
+        query = dict(url.query)
+        if "sslmode" in query:
+            query["ssl"] = query.pop("sslmode")
+        query.pop("channel_binding", None)
+        url = url.set(query=query)
+    return url
+
+
+def _create_async_engine(database_url: str, schema_name: str):
+    """Async counterpart of ``_create_engine``: asyncpg, with the same two profiles.
+
+    Under the serverless profile PgBouncer hands each transaction whichever
+    server connection is free, so a statement prepared on one may be missing
+    on the next. asyncpg prepares every query, so its statement caches are
+    turned off and each prepared statement gets a unique name there.
+    """
+    url = _async_url(database_url)
+    query_cache_size = _env_int("DATABASE_QUERY_CACHE_SIZE", 500)
+
+    if _engine_profile() == "pooled":
+        engine = create_async_engine(url, query_cache_size=query_cache_size, **_pool_options())
+
+        @event.listens_for(engine.sync_engine, "connect")
+        def set_search_path_on_connect(dbapi_connection, connection_record):
+            _set_search_path(dbapi_connection, schema_name)
+            dbapi_connection.commit()
+
+        return engine
+
+    connect_args = {}
+    if url.get_backend_name() == "postgresql":
+        connect_args = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+    engine = create_async_engine(
+        url,
+        pool_pre_ping=True,
+        poolclass=NullPool,
+        query_cache_size=query_cache_size,
+        connect_args=connect_args,
+    )
+
+    @event.listens_for(engine.sync_engine, "checkout")
+    def set_search_path_on_checkout(dbapi_connection, connection_record, connection_proxy):
+        _set_search_path(dbapi_connection, schema_name)
+
+    return engine
+
+
+def _async_sessionmaker(engine) -> async_sessionmaker[AsyncSession]:
+    # Nothing is expired on commit: an async session cannot lazy-load the
+    # expired attributes when the response is serialized after the handler.
+    return async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+
+
+def _get_engine():
+    """Lazily create the database engine on first use.
+
+    This defers reading DATABASE_URL until runtime, which is required for
+    Vercel serverless functions where env vars are only available at runtime,
+    not during the build phase when Python modules are imported.
+    """
+    global _engine
+
+    if _engine is not None:
+        return _engine
+
+    _engine = _create_engine(_database_url(), _schema_name())
     return _engine
 
 
+def _database_url() -> str:
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        raise RuntimeError(
+            "DATABASE_URL environment variable is not set. "
+            "Database connection requires DATABASE_URL to be configured."
+        )
+    return database_url
+
+
+def _schema_name() -> str:
+    schema_name = os.getenv("SCHEMA_NAME", "public")
+    _validate_schema_name(schema_name)
+    return schema_name
+
+
 def _get_session_local():
     """Lazily create the SessionLocal factory on first use."""
     global _SessionLocal
@@ -91,22 +266,214 @@ def _get_session_local():
     return _SessionLocal
 
 
-def get_db():
+def _get_async_session_local() -> async_sessionmaker[AsyncSession]:
+    """Lazily create the async engine and its session factory on first use.
+
+    Only the async route handlers use it; Alembic, the CLI and the worker
+    threads keep the sync engine.
+    """
+    global _async_engine, _AsyncSessionLocal
+
+    if _AsyncSessionLocal is not None:
+        return _AsyncSessionLocal
+
+    with _async_engine_lock:
+        if _AsyncSessionLocal is None:
+            _async_engine = _create_async_engine(_database_url(), _schema_name())
+            _AsyncSessionLocal = _async_sessionmaker(_async_engine)
+    return _AsyncSessionLocal
+
+
+class _Replica:
+    """A read replica and the time until which it is considered down.
+
+    The async session factory is created on the first async read, so sync-only
+    processes never need the async driver.
+    """
+
+    def __init__(self, url: str, session_local):
+        self.url = url
+        self.session_local = session_local
+        self.async_session_local = None
+        self.down_until = 0.0
+
+    def get_async_session_local(self) -> async_sessionmaker[AsyncSession]:
+        if self.async_session_local is None:
+            with _async_engine_lock:
+                if self.async_session_local is None:
+                    self.async_session_local = _async_sessionmaker(
+                        _create_async_engine(self.url, _schema_name())
+                    )
+        return self.async_session_local
+
+
+def _get_replicas() -> list[_Replica]:
+    """Lazily create one engine per DATABASE_READ_URLS entry (comma-separated).
+
+    DATABASE_READ_URL is accepted for a single replica. Replicas use the same
+    engine profile and SCHEMA_NAME as the primary. No replicas configured means
+    every read goes to the primary.
+    """
+    global _replicas
+
+    if _replicas is not None:
+        return _replicas
+
+    with _replicas_lock:
+        if _replicas is None:
+            urls = os.getenv("DATABASE_READ_URLS") or os.getenv("DATABASE_READ_URL") or ""
+            schema_name = _schema_name()
+            _replicas = [
+                _Replica(
+                    url,
+                    sessionmaker(
+                        autocommit=False, autoflush=False, bind=_create_engine(url, schema_name)
+                    ),
+                )
+                for url in (url.strip() for url in urls.split(","))
+                if url
+            ]
+    return _replicas
+
+
+def _sticky_seconds() -> float:
+    value = os.getenv("READ_YOUR_WRITES_SECONDS")
+    return float(value) if value else 5.0
+
+
+def note_write(device_id: str) -> None:
+    """Pin ``device_id``'s reads to the primary for READ_YOUR_WRITES_SECONDS (default 5).
+
+    Call after committing a per-device write, so the device reads its own write
+    even while replicas lag. The pin is per process; set the window to 0 to
+    turn stickiness off.
+    """
+    window = _sticky_seconds()
+    if window <= 0 or not _get_replicas():
+        return
+
+    now = time.monotonic()
+    with _recent_writes_lock:
+        _recent_writes[device_id] = now + window
+        if len(_recent_writes) > 10000:
+            for key in [key for key, deadline in _recent_writes.items() if deadline <= now]:
+                del _recent_writes[key]
+
+
+def _wrote_recently(device_id: str) -> bool:
+    deadline = _recent_writes.get(device_id)
+    return deadline is not None and deadline > time.monotonic()
+
+
+def _replica_candidates(device_id: str | None) -> Iterator[_Replica]:
+    """Replicas to try for a read, round-robin, skipping ones marked down.
+
+    Yields nothing when no replica is configured or ``device_id`` wrote recently.
+    """
+    replicas = _get_replicas()
+    if not replicas or (device_id and _wrote_recently(device_id)):
+        return
+
+    now = time.monotonic()
+    for _ in range(len(replicas)):
+        replica = replicas[next(_replica_turn) % len(replicas)]
+        if replica.down_until <= now:
+            yield replica
+
+
+def _mark_down(replica: _Replica) -> None:
+    retry = float(os.getenv("DATABASE_READ_RETRY_SECONDS") or 30)
+    replica.down_until = time.monotonic() + retry
+    logger.warning(f"Read replica unavailable, skipping it for {retry:.0f}s")
+
+
+def read_session(device_id: str | None = None) -> Session:
+    """Open a session for reads, on a replica when one is configured and healthy.
+
+    Replicas are taken round-robin. One that fails to connect is skipped for
+    DATABASE_READ_RETRY_SECONDS (default 30) and the next is tried; when none
+    is usable, or ``device_id`` wrote recently, the primary serves the read.
+    """
+    for replica in _replica_candidates(device_id):
+        db = replica.session_local()
+        try:
+            # Check out a connection now, so a dead replica fails here rather than mid-request
+            db.connection()
+            return db
+        except OperationalError:
+            db.close()
+            _mark_down(replica)
+
+    return _get_session_local()()
+
+
+async def async_read_session(device_id: str | None = None) -> AsyncSession:
+    """Async counterpart of ``read_session``, sharing its round-robin and replica health."""
+    for replica in _replica_candidates(device_id):
+        db = replica.get_async_session_local()()
+        try:
+            await db.connection()
+            return db
+        except (DBAPIError, OSError):
+            # asyncpg raises a refused or unreachable server as a plain OSError
+            await db.close()
+            _mark_down(replica)
+
+    return _get_async_session_local()()
+
+
+def get_db(request: Request):
     """Database session dependency for FastAPI endpoints.
 
+    GET and HEAD requests read from a replica when DATABASE_READ_URLS is set
+    (see ``read_session``); everything else uses the primary. A ``device_id``
+    path parameter makes the read honour that device's read-your-writes pin.
+
     Usage:
         @router.get("/items")
         def get_items(db: Session = Depends(get_db)):
             return db.query(Item).all()
     """
-    SessionLocal = _get_session_local()
-    db = SessionLocal()
+    if request.method in ("GET", "HEAD"):
+        db = read_session(request.path_params.get("device_id"))
+    else:
+        db = _get_session_local()()
     try:
         yield db
     finally:
         db.close()
 
 
+async def get_async_db(request: Request):
+    """Async session dependency for ``async def`` endpoints, routed like ``get_db``.
+
+    Usage:
+        @router.get("/items")
+        async def get_items(db: AsyncSession = Depends(get_async_db)):
+            return (await db.scalars(select(Item))).all()
+    """
+    if request.method in ("GET", "HEAD"):
+        db = await async_read_session(request.path_params.get("device_id"))
+    else:
+        db = _get_async_session_local()()
+    try:
+        yield db
+    finally:
+        await db.close()
+
+
+async def close_async_engines() -> None:
+    """Close the async engines' pooled connections (shutdown hook)."""
+    engines = [_async_engine] + [
+        replica.async_session_local.kw["bind"]
+        for replica in _replicas or []
+        if replica.async_session_local is not None
+    ]
+    for engine in engines:
+        if engine is not None:
+            await engine.dispose()
+
+
 # Expose engine and SessionLocal as properties for backward compatibility
 # These will raise RuntimeError if DATABASE_URL is not set
 def get_engine():
@@ -117,3 +484,8 @@ def get_engine():
 def get_session_local():
     """Get the SessionLocal factory (creates it lazily if needed)."""
     return _get_session_local()
+
+
+def engine_profile() -> str:
+    """The configured DATABASE_ENGINE_PROFILE (``serverless`` or ``pooled``)."""
+    return _engine_profile()
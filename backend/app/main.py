@@ -1,15 +1,41 @@
+import os
+
+from anyio import to_thread
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.exception_handlers import http_exception_handler
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
 # Import and initialize Logfire-aware logging
+from app.database import close_async_engines
 from app.logfire_setup import setup_logging, instrument_app
 from app.routers import deals
+from app.services import gateway, home_feed
 
 logger = setup_logging()
 
-app = FastAPI(title="FastAPI Starter API", version="1.0.0")
+
+def configure_threadpool() -> None:
+    """Size the threadpool that runs the sync route handlers from THREADPOOL_SIZE.
+
+    The plain ``def`` handlers (exports, the feed) and the refreshes'
+    persistence steps are capped by this pool (AnyIO's default is 40
+    threads); the rest of the ``async def`` handlers are not. With
+    the pooled engine profile, keep it at or just above DATABASE_POOL_SIZE plus
+    DATABASE_MAX_OVERFLOW; threads beyond that only wait for a connection.
+    """
+    size = os.getenv("THREADPOOL_SIZE")
+    if size:
+        to_thread.current_default_thread_limiter().total_tokens = int(size)
+
+
+app = FastAPI(
+    title="FastAPI Starter API",
+    version="1.0.0",
+    on_startup=[configure_threadpool, gateway.check_http2],
+    # Release pooled gateway and database connections and worker threads when the worker shuts down
+    on_shutdown=[gateway.close_client, home_feed.close_executor, close_async_engines],
+)
 
 # Instrument app with Logfire tracing (HTTP requests, DB queries, outbound calls)
 instrument_app(app)
@@ -1,10 +1,13 @@
 """Database models for the unified deal discovery app."""
 
 from sqlalchemy import (
+    JSON,
+    BigInteger,
     Boolean,
     DateTime,
     Float,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
@@ -18,6 +21,16 @@ from app.database import Base
 
 class Deal(Base):
     __tablename__ = "deals"
+    __table_args__ = (
+        UniqueConstraint("title", "marketplace", name="uq_deal_title_marketplace"),
+        # pg_trgm index serving the ILIKE '%term%' filters in search_deals
+        Index(
+            "ix_deals_title_trgm",
+            "title",
+            postgresql_using="gin",
+            postgresql_ops={"title": "gin_trgm_ops"},
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     title: Mapped[str] = mapped_column(String(255), nullable=False)
@@ -44,6 +57,16 @@ class Deal(Base):
     )
 
 
+# Keyset pagination for GET /deals walks this index in order: WHERE is_active AND
+# (discount_percent, id) < (:d, :i) ORDER BY discount_percent DESC, id DESC
+Index(
+    "ix_deals_active_discount_id",
+    Deal.is_active,
+    Deal.discount_percent.desc(),
+    Deal.id.desc(),
+)
+
+
 class UserInterest(Base):
     __tablename__ = "user_interests"
 
@@ -71,6 +94,18 @@ class FavoriteDeal(Base):
     deal: Mapped[Deal] = relationship("Deal", back_populates="favorites")
 
 
+# Serves the ids-only favorites listing: WHERE device_id = :d AND (created_at, deal_id)
+# < (:c, :i) ORDER BY created_at DESC, deal_id DESC is one range of this index, read
+# in order. Both sort keys must be DESC: a mixed-direction index cannot serve the
+# row comparison, and ties on created_at are normal (bulk adds share one now()).
+Index(
+    "ix_favorite_deals_device_created_deal",
+    FavoriteDeal.device_id,
+    FavoriteDeal.created_at.desc(),
+    FavoriteDeal.deal_id.desc(),
+)
+
+
 class DealAlert(Base):
     __tablename__ = "deal_alerts"
 
@@ -89,6 +124,35 @@ class DealAlert(Base):
     )
 
 
+class AlertNotification(Base):
+    """Transactional outbox row for one fired alert, delivered by the alert worker."""
+
+    __tablename__ = "alert_notifications"
+    __table_args__ = (
+        # Workers claim due rows with: WHERE status = 'pending' AND next_attempt_at <= now
+        Index("ix_alert_notifications_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    alert_id: Mapped[int] = mapped_column(
+        ForeignKey("deal_alerts.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    device_id: Mapped[str] = mapped_column(String(120), nullable=False)
+    deal_id: Mapped[int] = mapped_column(ForeignKey("deals.id", ondelete="CASCADE"), nullable=False)
+    # Deal snapshot taken when the alert fired, so delivery never re-reads the deal
+    payload: Mapped[dict] = mapped_column(JSON, nullable=False)
+    status: Mapped[str] = mapped_column(String(20), default="pending", server_default="pending", nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    next_attempt_at: Mapped[DateTime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[DateTime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    sent_at: Mapped[DateTime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
 class SharedDeal(Base):
     __tablename__ = "shared_deals"
 
@@ -102,3 +166,31 @@ class SharedDeal(Base):
     )
 
     deal: Mapped[Deal] = relationship("Deal", back_populates="shares")
+
+
+class ChangeVersion(Base):
+    """Monotonic change counter per scope ("deals", "favorites:<device_id>", ...).
+
+    Bumped in the same transaction as the write it describes; read to build
+    version-based ETags without loading the rows themselves.
+    """
+
+    __tablename__ = "change_versions"
+
+    scope: Mapped[str] = mapped_column(String(160), primary_key=True)
+    version: Mapped[int] = mapped_column(BigInteger, default=0, server_default="0", nullable=False)
+
+
+class CacheEntry(Base):
+    """A persisted ``TTLCache`` entry (see ``services/cache_store.py``).
+
+    ``namespace`` separates caches sharing the table; ``stored_at`` is the
+    entry's ``time.time()`` stamp, so expiry survives the round trip.
+    """
+
+    __tablename__ = "cache_entries"
+
+    namespace: Mapped[str] = mapped_column(String(50), primary_key=True)
+    key: Mapped[str] = mapped_column(Text, primary_key=True)
+    stored_at: Mapped[float] = mapped_column(Float, nullable=False)
+    value: Mapped[dict] = mapped_column(JSON, nullable=False)
@@ -1,19 +1,56 @@
+import asyncio
+import itertools
 import json
+import math
 import os
+import time
+from collections.abc import AsyncIterator, Iterator
 from datetime import datetime
 
-import httpx
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, joinedload
 
 from app import models, schemas
-from app.dependencies import get_db
+from app.database import get_session_local, note_write, read_session
+from app.dependencies import get_async_db, get_db
+from app.services import (
+    alert_matching,
+    alert_outbox,
+    category_counts,
+    change_versions,
+    deal_export,
+    deal_ingest,
+    deal_json,
+    deal_search,
+    favorites,
+    gateway,
+    home_feed,
+    http_cache,
+    json_stream,
+    pagination,
+    recommendation_cache,
+    recommendations,
+    single_flight,
+)
+from app.services.ttl_cache import TTLCache
 
 router = APIRouter(prefix="/deals", tags=["deals"])
 
-GATEWAY_URL = os.environ.get(
-    "GATEWAY_URL", "https://appifex-gateway.appifex-ai.workers.dev"
-)
+# The hot read and per-device write endpoints are ``async def`` on the asyncpg
+# engine (``get_async_db``), so a slow query waits on the event loop instead of
+# holding a threadpool thread. Service functions shared with the sync paths
+# take a sync ``Session`` and are called through ``AsyncSession.run_sync``,
+# which runs them on the same async connection without blocking the loop.
+# Refreshes are ``async def`` too and await the gateway on the shared
+# ``httpx.AsyncClient``; their persistence step (upsert, alert matching,
+# commit) runs on a worker thread with the sync session, because the alert
+# matcher and recommendation index take thread locks that must never be held
+# across an await. Exports and the feed stay sync: they drive worker pools and
+# streaming bodies that are built on the sync engine.
 
 
 def _get_gateway_api_key() -> str:
@@ -96,25 +133,27 @@ def _extract_json_content(content: str) -> list[dict]:
     return parsed
 
 
-def _fetch_gateway_deals(
+def _build_gateway_payload(
     query: str | None,
     categories: list[str],
     limit: int,
-) -> list[dict]:
+    marketplaces: list[str] | None = None,
+) -> dict:
     category_text = ", ".join(categories) if categories else "all categories"
     search_text = query or "best trending deals"
+    marketplace_text = ", ".join(marketplaces) if marketplaces else "Amazon, Walmart, Target"
 
     prompt = (
         "Return recent product deals as strict JSON array only. "
         "No markdown, no commentary. "
         "Each item must include keys: "
         "title, marketplace, category, price, original_price, discount_percent, product_url, image_url. "
-        "Use only marketplaces: Amazon, Walmart, Target. "
+        f"Use only marketplaces: {marketplace_text}. "
         f"Focus query: {search_text}. Categories: {category_text}. "
         f"Return exactly {limit} items with realistic prices and discounts."
     )
 
-    payload = {
+    return {
         "model": "gpt-4o-mini",
         "messages": [{"role": "user", "content": prompt}],
         "temperature": 0.4,
@@ -122,28 +161,188 @@ def _fetch_gateway_deals(
         "response_format": {"type": "json_object"},
     }
 
-    try:
-        with httpx.Client(timeout=35.0) as client:
-            response = client.post(
-                f"{GATEWAY_URL}/llm/chat/completions",
-                json=payload,
-                headers={"x-appifex-key": _get_gateway_api_key()},
-            )
 
-        if response.status_code != 200:
-            return _fallback_deals()
+async def _request_gateway_deals(
+    query: str | None,
+    categories: list[str],
+    limit: int,
+    timeout: float | None = None,
+    marketplaces: list[str] | None = None,
+) -> list[dict]:
+    """Call the LLM gateway and parse its deals; raises on any failure."""
+    response = await gateway.post_json(
+        "/llm/chat/completions",
+        _build_gateway_payload(query, categories, limit, marketplaces),
+        headers={"x-appifex-key": _get_gateway_api_key()},
+        total=timeout,
+    )
+
+    if response.status_code != 200:
+        raise ValueError(f"Gateway returned HTTP {response.status_code}")
 
-        data = response.json()
-        content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
+    data = response.json()
+    content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
 
-        parsed = json.loads(content)
-        if isinstance(parsed, dict) and "deals" in parsed and isinstance(parsed["deals"], list):
-            return parsed["deals"]
-        if isinstance(parsed, list):
-            return parsed
-        return _extract_json_content(content)
+    parsed = json.loads(content)
+    if isinstance(parsed, dict) and "deals" in parsed and isinstance(parsed["deals"], list):
+        return parsed["deals"]
+    if isinstance(parsed, list):
+        return parsed
+    return _extract_json_content(content)
+
+
+async def _stream_gateway_deals(
+    query: str | None,
+    categories: list[str],
+    limit: int,
+    timeout: float | None = None,
+    marketplaces: list[str] | None = None,
+) -> AsyncIterator[dict]:
+    """Yield raw deals from a streamed gateway completion as each object closes."""
+    payload = {**_build_gateway_payload(query, categories, limit, marketplaces), "stream": True}
+    parser = json_stream.ArrayItemParser()
+
+    async for data in gateway.stream_sse_data(
+        "/llm/chat/completions",
+        payload,
+        headers={"x-appifex-key": _get_gateway_api_key()},
+        total=timeout,
+    ):
+        chunk = json.loads(data)
+        choices = chunk.get("choices") or [{}]
+        delta = (choices[0].get("delta") or {}).get("content") or ""
+        for raw in parser.feed(delta):
+            yield raw
+
+
+def _degraded_gateway_deals(key: str) -> list[dict]:
+    """Last cached result for the prompt, even if stale, else the static fallback list."""
+    stale = gateway.get_cache().get(key, allow_stale=True) if gateway.cache_enabled() else None
+    return stale if stale is not None else _fallback_deals()
+
+
+async def _gateway_cache() -> TTLCache:
+    """The gateway cache, off the event loop: creating it may load it from its store."""
+    return await run_in_threadpool(gateway.get_cache)
+
+
+async def _fetch_gateway_deals(
+    query: str | None,
+    categories: list[str],
+    limit: int,
+    marketplaces: list[str] | None = None,
+) -> list[dict]:
+    """Return raw gateway deals, served from the prompt cache when possible.
+
+    Concurrent refreshes for the same normalized prompt share one in-flight
+    gateway call, made through the circuit breaker. Only successful gateway
+    results are cached. When the call fails or the circuit is open, the last
+    cached result for the prompt is served even if stale, then the static
+    fallback list.
+    """
+    cache = await _gateway_cache()
+    breaker = gateway.get_breaker()
+    key = gateway.cache_key(query, categories, limit, marketplaces)
+
+    if gateway.cache_enabled():
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    # Don't queue behind the concurrency limit for a call the breaker would refuse
+    if not breaker.allows_requests():
+        return _degraded_gateway_deals(key)
+
+    async def call_gateway() -> list[dict]:
+        with breaker.attempt() as attempt:
+            raw_deals = await _request_gateway_deals(query, categories, limit, attempt.timeout, marketplaces)
+        if gateway.cache_enabled():
+            # A write-through store writes to the database here
+            await run_in_threadpool(cache.set, key, raw_deals)
+        return raw_deals
+
+    try:
+        return await gateway.get_single_flight().do(key, call_gateway)
+    except single_flight.OverloadedError as exc:
+        raise HTTPException(status_code=429, detail=str(exc)) from exc
     except Exception:
-        return _fallback_deals()
+        return _degraded_gateway_deals(key)
+
+
+async def _iter_gateway_deals(
+    query: str | None,
+    categories: list[str],
+    limit: int,
+    marketplaces: list[str] | None = None,
+) -> AsyncIterator[dict]:
+    """Streaming counterpart of ``_fetch_gateway_deals``.
+
+    Raw deals are yielded as the gateway produces them. Cache and circuit
+    breaker behave as for the buffered path, and the complete result is cached
+    once the stream finishes. If the stream fails before producing anything,
+    the degraded deals are yielded instead. A failure part-way through just ends
+    the stream.
+
+    Streaming calls are not coalesced but do hold a gateway call slot, so they
+    count against GATEWAY_MAX_CONCURRENT like buffered ones. The first
+    ``anext()`` takes the slot and yields ``None``; callers prime the generator
+    before the response starts so ``OverloadedError`` can still become a 429,
+    and a started generator always releases its slot when closed.
+    """
+    cache = await _gateway_cache()
+    key = gateway.cache_key(query, categories, limit, marketplaces)
+
+    if gateway.cache_enabled():
+        cached = cache.get(key)
+        if cached is not None:
+            yield None
+            for raw in cached:
+                yield raw
+            return
+
+    breaker = gateway.get_breaker()
+    if not breaker.allows_requests():
+        yield None
+        for raw in _degraded_gateway_deals(key):
+            yield raw
+        return
+
+    single_flight = gateway.get_single_flight()
+    await single_flight.acquire()
+    try:
+        yield None
+
+        collected: list[dict] = []
+        try:
+            with breaker.attempt() as attempt:
+                async for raw in _stream_gateway_deals(query, categories, limit, attempt.timeout, marketplaces):
+                    collected.append(raw)
+                    # Time spent persisting this deal downstream is not gateway latency
+                    handed_off = time.monotonic()
+                    yield raw
+                    attempt.paused += time.monotonic() - handed_off
+        except Exception:
+            if not collected:
+                for raw in _degraded_gateway_deals(key):
+                    yield raw
+            return
+    finally:
+        single_flight.release()
+
+    if gateway.cache_enabled():
+        await run_in_threadpool(cache.set, key, collected)
+
+
+async def _open_gateway_stream(payload: schemas.MarketplaceRefreshRequest) -> AsyncIterator[dict]:
+    """Start ``_iter_gateway_deals`` for ``payload``, turning overload into a 429."""
+    raw_deals = _iter_gateway_deals(
+        payload.query, payload.categories, payload.limit, payload.marketplaces or None
+    )
+    try:
+        await anext(raw_deals)
+    except single_flight.OverloadedError as exc:
+        raise HTTPException(status_code=429, detail=str(exc)) from exc
+    return raw_deals
 
 
 def _normalize_deal_payload(raw: dict) -> dict:
@@ -182,19 +381,85 @@ def _normalize_deal_payload(raw: dict) -> dict:
     }
 
 
+async def _fetch_fanned_out_deals(payload: schemas.MarketplaceRefreshRequest) -> list[dict]:
+    """Split a refresh into one gateway call per (category, marketplace) shard.
+
+    Shards are awaited concurrently, at most GATEWAY_FANOUT_WORKERS at a
+    time, each with its own
+    smaller ``limit`` so no single completion hits the token cap. Results are
+    normalized, deduplicated on (title, marketplace) and interleaved so that
+    trimming to ``payload.limit`` keeps every shard represented.
+    """
+    categories = payload.categories or [None]
+    marketplaces = payload.marketplaces or [None]
+    shards = [(category, marketplace) for category in categories for marketplace in marketplaces]
+    shard_limit = max(1, math.ceil(payload.limit / len(shards)))
+
+    workers = asyncio.Semaphore(gateway.fanout_workers())
+
+    async def fetch_shard(category: str | None, marketplace: str | None) -> list[dict]:
+        async with workers:
+            return await _fetch_gateway_deals(
+                payload.query,
+                [category] if category else [],
+                shard_limit,
+                [marketplace] if marketplace else None,
+            )
+
+    raw_results = await asyncio.gather(*(fetch_shard(category, marketplace) for category, marketplace in shards))
+    shard_results = [
+        [_normalize_deal_payload(raw) for raw in raw_deals[:shard_limit]]
+        for raw_deals in raw_results
+    ]
+
+    merged: dict[tuple[str, str], dict] = {}
+    for round_robin in itertools.zip_longest(*shard_results):
+        for deal in round_robin:
+            if deal is not None:
+                merged.setdefault((deal["title"], deal["marketplace"]), deal)
+    return list(merged.values())[: payload.limit]
+
+
 @router.get("", response_model=schemas.DealSearchResponse)
-def search_deals(
+async def search_deals(
+    request: Request,
+    response: Response,
     q: str | None = Query(default=None),
     category: str | None = Query(default=None),
     min_discount: int = Query(default=0, ge=0, le=95),
     marketplace: str | None = Query(default=None),
     limit: int = Query(default=40, ge=1, le=100),
-    db: Session = Depends(get_db),
+    cursor: str | None = Query(default=None),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    query = db.query(models.Deal).filter(models.Deal.is_active.is_(True))
+    versions = await db.run_sync(change_versions.current, change_versions.DEALS)
+    not_modified = _not_modified(request, response, "deals", versions)
+    if not_modified:
+        return not_modified
+
+    page = await db.run_sync(_search_deals, q, category, min_discount, marketplace, limit, cursor)
+    return deal_json.json_response(page, response)
 
-    if q:
-        query = query.filter(models.Deal.title.ilike(f"%{q}%"))
+
+def _search_deals(
+    db: Session,
+    q: str | None,
+    category: str | None,
+    min_discount: int,
+    marketplace: str | None,
+    limit: int,
+    cursor: str | None,
+) -> dict:
+    """One page of active deals as a JSON-ready ``DealSearchResponse`` body.
+
+    Selects the response columns as plain rows (see ``deal_json``), so no ORM
+    objects are built and nothing is validated per deal.
+    """
+    query = db.query(*deal_json.DEAL_COLUMNS).filter(models.Deal.is_active.is_(True))
+
+    text_query = q.strip() if q else ""
+    if text_query:
+        query = deal_search.filter_text(query, text_query)
     if category:
         query = query.filter(models.Deal.category == category)
     if marketplace:
@@ -202,77 +467,332 @@ def search_deals(
 
     query = query.filter(models.Deal.discount_percent >= min_discount)
 
-    deals = query.order_by(models.Deal.discount_percent.desc()).limit(limit).all()
-    return schemas.DealSearchResponse(deals=deals, total=len(deals))
+    # Every sort key is descending and the list ends in the unique id, so a page
+    # boundary is a single row-value comparison against the previous page's last key.
+    relevance = deal_search.relevance(text_query) if text_query else None
+    sort_keys = [models.Deal.discount_percent, models.Deal.id]
+    cursor_shape: list[type | range] = [int, int]
+    if relevance is not None:
+        sort_keys.insert(0, relevance)
+        cursor_shape.insert(0, deal_search.RELEVANCE_TIERS)
+        query = query.add_columns(relevance)
+
+    if cursor:
+        try:
+            after = pagination.decode_cursor(cursor, cursor_shape)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        query = query.filter(tuple_(*sort_keys) < tuple_(*after))
+
+    rows = query.order_by(*(key.desc() for key in sort_keys)).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        # The relevance rank, when selected, is the extra column after DEAL_COLUMNS
+        ranks = [last[-1]] if relevance is not None else []
+        next_cursor = pagination.encode_cursor(
+            [*ranks, last.discount_percent, last.id]
+        )
+
+    deals = deal_json.deal_dicts(rows)
+    return {"deals": deals, "total": len(deals), "next_cursor": next_cursor}
+
+
+def _not_modified(
+    request: Request,
+    response: Response,
+    route: str,
+    versions: list[int],
+) -> Response | None:
+    """Return a 304 when the client's copy is current; otherwise tag ``response``.
+
+    The ETag is built from change counters alone, so a revalidation hit never
+    runs the route's queries or serializes anything.
+    """
+    etag = change_versions.etag(route, versions)
+    policy = http_cache.cache_control(route)
+    if http_cache.etag_matches(request, etag):
+        return http_cache.not_modified(etag, policy)
+    http_cache.set_cache_headers(response, etag, policy)
+    return None
+
+
+@router.get("/export")
+def export_deals(
+    export_format: str = Query(default="ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    category: str | None = Query(default=None),
+    marketplace: str | None = Query(default=None),
+    min_discount: int = Query(default=0, ge=0, le=95),
+    gzip: bool = Query(default=False),
+):
+    """Stream every matching active deal as NDJSON or CSV, optionally gzipped."""
+    query = deal_export.export_query(category, marketplace, min_discount)
+
+    def chunks() -> Iterator[bytes]:
+        # Own session: the streaming body outlives the request-scoped one
+        db = read_session()
+        try:
+            yield from deal_export.iter_export(db, query, export_format)
+        finally:
+            db.close()
+
+    body = deal_export.gzip_chunks(chunks()) if gzip else chunks()
+    headers = {"Content-Disposition": f'attachment; filename="deals.{export_format}"'}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(body, media_type=deal_export.FORMATS[export_format], headers=headers)
 
 
 @router.get("/categories", response_model=list[str])
-def get_categories(db: Session = Depends(get_db)):
-    rows = db.query(models.Deal.category).distinct().order_by(models.Deal.category.asc()).all()
-    return [row[0] for row in rows]
+def get_categories(request: Request, db: Session = Depends(get_db)):
+    deals_version = change_versions.current(db, change_versions.DEALS)[0]
+    snapshot = category_counts.get_snapshot(db, deals_version)
+    return http_cache.cached_json_response(
+        request, snapshot.categories_body, snapshot.categories_etag, http_cache.cache_control("categories")
+    )
 
 
-@router.post("/refresh", response_model=schemas.DealSearchResponse)
-def refresh_marketplace_deals(
-    payload: schemas.MarketplaceRefreshRequest,
+@router.get("/categories/counts", response_model=list[schemas.CategoryCount])
+def get_category_counts(request: Request, db: Session = Depends(get_db)):
+    """Every category with its number of active deals."""
+    deals_version = change_versions.current(db, change_versions.DEALS)[0]
+    snapshot = category_counts.get_snapshot(db, deals_version)
+    return http_cache.cached_json_response(
+        request, snapshot.counts_body, snapshot.counts_etag, http_cache.cache_control("categories")
+    )
+
+
+@router.get("/feed/{device_id}", response_model=schemas.HomeFeedResponse)
+def get_home_feed(
+    device_id: str,
+    request: Request,
+    response: Response,
+    q: str | None = Query(default=None),
+    category: str | None = Query(default=None),
+    min_discount: int = Query(default=0, ge=0, le=95),
+    marketplace: str | None = Query(default=None),
+    limit: int = Query(default=40, ge=1, le=100),
     db: Session = Depends(get_db),
 ):
-    raw_deals = _fetch_gateway_deals(payload.query, payload.categories, payload.limit)
+    """Categories, the first deals page and favorite ids in one round trip.
 
-    persisted_ids: list[int] = []
+    Favorite ids and categories load concurrently on the feed pool while the
+    search runs here; favorites come back as bare ids, not nested deals.
+    """
+    versions = change_versions.current(
+        db, change_versions.DEALS, change_versions.favorites(device_id)
+    )
+    not_modified = _not_modified(request, response, "feed", versions)
+    if not_modified:
+        return not_modified
 
-    for raw in raw_deals[: payload.limit]:
-        normalized = _normalize_deal_payload(raw)
+    favorite_ids = home_feed.submit_favorite_deal_ids(device_id)
+    categories = home_feed.submit_categories(versions[0])
+    page = _search_deals(db, q, category, min_discount, marketplace, limit, None)
 
-        existing = (
-            db.query(models.Deal)
-            .filter(
-                models.Deal.title == normalized["title"],
-                models.Deal.marketplace == normalized["marketplace"],
-            )
-            .first()
+    return deal_json.json_response(
+        {
+            "categories": list(categories.result()),
+            "deals": page["deals"],
+            "next_cursor": page["next_cursor"],
+            "favorite_deal_ids": favorite_ids.result(),
+        },
+        response,
+    )
+
+
+@router.get("/stats")
+def get_refresh_stats(db: Session = Depends(get_db)):
+    """Introspection counters for the refresh pipeline."""
+    return {
+        "gateway_cache": gateway.get_cache().stats(),
+        "gateway_calls": gateway.get_single_flight().stats(),
+        "gateway_breaker": gateway.get_breaker().snapshot(),
+        "recommendation_cache": recommendation_cache.stats(),
+        "alert_outbox": alert_outbox.backlog(db),
+    }
+
+
+@router.post("/refresh", response_model=schemas.MarketplaceRefreshResponse)
+async def refresh_marketplace_deals(
+    payload: schemas.MarketplaceRefreshRequest,
+    db: Session = Depends(get_db),
+):
+    if payload.fan_out and max(len(payload.categories), 1) * max(len(payload.marketplaces), 1) > 1:
+        normalized = await _fetch_fanned_out_deals(payload)
+    else:
+        raw_deals = await _fetch_gateway_deals(
+            payload.query, payload.categories, payload.limit, payload.marketplaces or None
         )
+        normalized = [_normalize_deal_payload(raw) for raw in raw_deals[: payload.limit]]
+
+    return await run_in_threadpool(_persist_refresh, db, normalized)
+
 
-        if existing:
-            existing.category = normalized["category"]
-            existing.price = normalized["price"]
-            existing.original_price = normalized["original_price"]
-            existing.discount_percent = normalized["discount_percent"]
-            existing.product_url = normalized["product_url"]
-            existing.image_url = normalized["image_url"]
-            existing.is_active = True
-            persisted_ids.append(existing.id)
-        else:
-            new_deal = models.Deal(**normalized)
-            db.add(new_deal)
-            db.flush()
-            persisted_ids.append(new_deal.id)
+def _persist_refresh(db: Session, normalized: list[dict]) -> schemas.MarketplaceRefreshResponse:
+    """Upsert a refresh, queue its alerts and commit; run on a worker thread."""
+    result = deal_ingest.upsert_deals(db, normalized)
+    triggers = _fire_alerts(db, result)
 
+    # Build the response before committing: commit expires the RETURNING rows and
+    # reading them afterwards would cost one refresh query per deal.
+    response = _refresh_response(result, alerts_triggered=len(triggers))
+    index_rows = _index_rows(result)
+    category_deltas = category_counts.deltas_for(result)
+    deals_version = _bump_versions(db, result, triggers)
     db.commit()
+    recommendations.apply_deal_changes(index_rows, deals_version)
+    category_counts.apply_deltas(category_deltas, deals_version)
+    return response
+
+
+def _fire_alerts(db: Session, result: deal_ingest.UpsertResult) -> list[alert_matching.AlertTrigger]:
+    """Match written deals against alerts and queue notifications in the same transaction."""
+    written = result.inserted + result.changed
+    triggers = alert_matching.evaluate(db, written)
+    alert_outbox.enqueue(db, triggers, written)
+    return triggers
+
+
+def _bump_versions(
+    db: Session,
+    result: deal_ingest.UpsertResult,
+    triggers: list[alert_matching.AlertTrigger],
+) -> int | None:
+    """Bump the change counters an upsert affects; returns the new ``deals`` version."""
+    if not (result.inserted or result.changed):
+        return None
+    versions = change_versions.bump(
+        db,
+        change_versions.DEALS,
+        *(change_versions.alerts(trigger.device_id) for trigger in triggers),
+    )
+    return versions[change_versions.DEALS]
+
 
-    deals = (
-        db.query(models.Deal)
-        .filter(models.Deal.id.in_(persisted_ids))
-        .order_by(models.Deal.discount_percent.desc())
-        .all()
+def _index_rows(result: deal_ingest.UpsertResult) -> list[tuple[int, str, str, int, bool]]:
+    """Snapshot written deals for the recommendation index (read before commit expires them)."""
+    return [
+        (deal.id, deal.title, deal.category, deal.discount_percent, deal.is_active)
+        for deal in result.inserted + result.changed
+    ]
+
+
+def _refresh_response(
+    result: deal_ingest.UpsertResult,
+    deals: list | None = None,
+    alerts_triggered: int = 0,
+) -> schemas.MarketplaceRefreshResponse:
+    deals = sorted(
+        result.deals if deals is None else deals,
+        key=lambda deal: deal.discount_percent,
+        reverse=True,
     )
+    return schemas.MarketplaceRefreshResponse(
+        deals=deals,
+        total=len(deals),
+        inserted=len(result.inserted),
+        changed=len(result.changed),
+        unchanged=len(result.unchanged),
+        price_changes=result.price_changes,
+        alerts_triggered=alerts_triggered,
+    )
+
+
+def _persist_streamed_deal(
+    db: Session,
+    normalized: dict,
+    totals: deal_ingest.UpsertResult,
+    triggers: list[alert_matching.AlertTrigger],
+) -> list[schemas.DealResponse]:
+    """Upsert, queue alerts for and commit one streamed deal; run on a worker thread."""
+    result = deal_ingest.upsert_deals(db, [normalized])
+    batch_triggers = _fire_alerts(db, result)
+    triggers.extend(batch_triggers)
+    persisted = [schemas.DealResponse.model_validate(deal) for deal in result.deals]
+    index_rows = _index_rows(result)
+    category_deltas = category_counts.deltas_for(result)
+    deals_version = _bump_versions(db, result, batch_triggers)
+    db.commit()
+    recommendations.apply_deal_changes(index_rows, deals_version)
+    category_counts.apply_deltas(category_deltas, deals_version)
+    totals.extend(result)
+    return persisted
+
 
-    return schemas.DealSearchResponse(deals=deals, total=len(deals))
+async def _persist_streamed_deals(
+    payload: schemas.MarketplaceRefreshRequest,
+    raw_deals: AsyncIterator[dict],
+    totals: deal_ingest.UpsertResult,
+    triggers: list[alert_matching.AlertTrigger],
+) -> AsyncIterator[schemas.DealResponse]:
+    """Upsert and commit each streamed deal as soon as the gateway finishes it.
+
+    Runs with its own session because a streaming response outlives the
+    request-scoped ``get_db`` session.
+    """
+    db = get_session_local()()
+    seen: set[tuple[str, str]] = set()
+    try:
+        async for raw in raw_deals:
+            # Past the limit the rest of the stream is drained, not persisted, so the
+            # completed result still reaches the gateway cache.
+            if len(seen) >= payload.limit:
+                continue
+
+            normalized = _normalize_deal_payload(raw)
+            key = (normalized["title"], normalized["marketplace"])
+            if key in seen:
+                continue
+            seen.add(key)
+
+            for deal in await run_in_threadpool(_persist_streamed_deal, db, normalized, totals, triggers):
+                yield deal
+    finally:
+        await raw_deals.aclose()
+        await run_in_threadpool(db.close)
+
+
+@router.post("/refresh/stream")
+async def stream_refresh_marketplace_deals(
+    payload: schemas.MarketplaceRefreshRequest,
+    ndjson: bool = Query(default=True),
+):
+    """Refresh from a streamed gateway completion, persisting deals incrementally.
+
+    By default every persisted deal is streamed back as one NDJSON line the
+    moment it is committed. With ``ndjson=false`` the usual refresh summary is
+    returned once the stream completes.
+    """
+    totals = deal_ingest.UpsertResult()
+    triggers: list[alert_matching.AlertTrigger] = []
+    raw_deals = await _open_gateway_stream(payload)
+
+    if not ndjson:
+        persisted = [deal async for deal in _persist_streamed_deals(payload, raw_deals, totals, triggers)]
+        return _refresh_response(totals, deals=persisted, alerts_triggered=len(triggers))
+
+    async def lines() -> AsyncIterator[str]:
+        async for deal in _persist_streamed_deals(payload, raw_deals, totals, triggers):
+            yield deal.model_dump_json() + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
 
 
 @router.post("/favorites", response_model=schemas.FavoriteDealResponse)
-def add_favorite_deal(payload: schemas.FavoriteDealCreate, db: Session = Depends(get_db)):
-    deal = db.query(models.Deal).filter(models.Deal.id == payload.deal_id).first()
+async def add_favorite_deal(payload: schemas.FavoriteDealCreate, db: AsyncSession = Depends(get_async_db)):
+    deal = await db.get(models.Deal, payload.deal_id)
     if not deal:
         raise HTTPException(status_code=404, detail="Deal not found")
 
-    existing = (
-        db.query(models.FavoriteDeal)
-        .filter(
+    existing = await db.scalar(
+        select(models.FavoriteDeal).where(
             models.FavoriteDeal.device_id == payload.device_id,
             models.FavoriteDeal.deal_id == payload.deal_id,
         )
-        .first()
     )
     if existing:
         existing.deal = deal
@@ -280,82 +800,183 @@ def add_favorite_deal(payload: schemas.FavoriteDealCreate, db: Session = Depends
 
     favorite = models.FavoriteDeal(device_id=payload.device_id, deal_id=payload.deal_id)
     db.add(favorite)
-    db.commit()
-    db.refresh(favorite)
+    await db.run_sync(change_versions.bump, change_versions.favorites(payload.device_id))
+    await db.commit()
+    note_write(payload.device_id)
+    await db.refresh(favorite)
+    # Set rather than lazy-loaded: an async session cannot load it during serialization
+    favorite.deal = deal
     return favorite
 
 
 @router.get("/favorites/{device_id}", response_model=list[schemas.FavoriteDealResponse])
-def get_favorite_deals(device_id: str, db: Session = Depends(get_db)):
-    favorites = (
-        db.query(models.FavoriteDeal)
+async def get_favorite_deals(
+    device_id: str,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+):
+    versions = await db.run_sync(
+        change_versions.current, change_versions.DEALS, change_versions.favorites(device_id)
+    )
+    not_modified = _not_modified(request, response, "favorites", versions)
+    if not_modified:
+        return not_modified
+
+    favorites = await db.scalars(
+        select(models.FavoriteDeal)
         .options(joinedload(models.FavoriteDeal.deal))
-        .filter(models.FavoriteDeal.device_id == device_id)
+        .where(models.FavoriteDeal.device_id == device_id)
         .order_by(models.FavoriteDeal.created_at.desc())
-        .all()
     )
-    return favorites
+    return favorites.all()
+
+
+@router.post("/favorites/bulk", response_model=schemas.FavoriteBulkResponse)
+async def add_favorite_deals(payload: schemas.FavoriteBulkRequest, db: AsyncSession = Depends(get_async_db)):
+    """Favorite many deals in one statement; unknown and already-favorited ids are skipped."""
+    added = await db.run_sync(favorites.add_many, payload.device_id, payload.deal_ids)
+    if added:
+        await db.run_sync(change_versions.bump, change_versions.favorites(payload.device_id))
+    await db.commit()
+    if added:
+        note_write(payload.device_id)
+    return schemas.FavoriteBulkResponse(device_id=payload.device_id, deal_ids=added)
+
+
+@router.delete("/favorites/bulk", response_model=schemas.FavoriteBulkResponse)
+async def remove_favorite_deals(payload: schemas.FavoriteBulkRequest, db: AsyncSession = Depends(get_async_db)):
+    """Unfavorite many deals in one statement; ids that were not favorites are skipped."""
+    removed = await db.run_sync(favorites.remove_many, payload.device_id, payload.deal_ids)
+    if removed:
+        await db.run_sync(change_versions.bump, change_versions.favorites(payload.device_id))
+    await db.commit()
+    if removed:
+        note_write(payload.device_id)
+    return schemas.FavoriteBulkResponse(device_id=payload.device_id, deal_ids=removed)
+
+
+@router.get("/favorites/{device_id}/ids", response_model=schemas.FavoriteIdsResponse)
+async def get_favorite_deal_ids(
+    device_id: str,
+    request: Request,
+    response: Response,
+    limit: int = Query(default=500, ge=1, le=5000),
+    cursor: str | None = Query(default=None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Favorite deal ids only, newest first, keyset-paged over the covering index."""
+    after = None
+    if cursor:
+        try:
+            created_at, deal_id = pagination.decode_cursor(cursor, [str, int])
+            after = (datetime.fromisoformat(created_at), deal_id)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    versions = await db.run_sync(change_versions.current, change_versions.favorites(device_id))
+    not_modified = _not_modified(request, response, "favorite_ids", versions)
+    if not_modified:
+        return not_modified
+
+    rows = await db.run_sync(favorites.list_ids, device_id, limit=limit + 1, after=after)
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        deal_id, created_at = rows[-1]
+        next_cursor = pagination.encode_cursor([created_at.isoformat(), deal_id])
+
+    return schemas.FavoriteIdsResponse(deal_ids=[deal_id for deal_id, _ in rows], next_cursor=next_cursor)
 
 
 @router.delete("/favorites/{device_id}/{deal_id}")
-def remove_favorite_deal(device_id: str, deal_id: int, db: Session = Depends(get_db)):
-    favorite = (
-        db.query(models.FavoriteDeal)
-        .filter(
+async def remove_favorite_deal(device_id: str, deal_id: int, db: AsyncSession = Depends(get_async_db)):
+    favorite = await db.scalar(
+        select(models.FavoriteDeal).where(
             models.FavoriteDeal.device_id == device_id,
             models.FavoriteDeal.deal_id == deal_id,
         )
-        .first()
     )
     if not favorite:
         raise HTTPException(status_code=404, detail="Favorite deal not found")
 
-    db.delete(favorite)
-    db.commit()
+    await db.delete(favorite)
+    await db.run_sync(change_versions.bump, change_versions.favorites(device_id))
+    await db.commit()
+    note_write(device_id)
     return {"success": True}
 
 
 @router.post("/interests", response_model=schemas.UserInterestResponse)
-def add_interest(payload: schemas.UserInterestCreate, db: Session = Depends(get_db)):
+async def add_interest(payload: schemas.UserInterestCreate, db: AsyncSession = Depends(get_async_db)):
     interest = models.UserInterest(**payload.model_dump())
     db.add(interest)
-    db.commit()
-    db.refresh(interest)
+    await db.run_sync(change_versions.bump, change_versions.interests(payload.device_id))
+    await db.commit()
+    note_write(payload.device_id)
+    await db.refresh(interest)
     return interest
 
 
 @router.get("/interests/{device_id}", response_model=list[schemas.UserInterestResponse])
-def get_interests(device_id: str, db: Session = Depends(get_db)):
-    return (
-        db.query(models.UserInterest)
-        .filter(models.UserInterest.device_id == device_id)
+async def get_interests(
+    device_id: str,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+):
+    versions = await db.run_sync(change_versions.current, change_versions.interests(device_id))
+    not_modified = _not_modified(request, response, "interests", versions)
+    if not_modified:
+        return not_modified
+
+    interests = await db.scalars(
+        select(models.UserInterest)
+        .where(models.UserInterest.device_id == device_id)
         .order_by(models.UserInterest.priority.desc(), models.UserInterest.created_at.desc())
-        .all()
     )
+    return interests.all()
 
 
 @router.post("/alerts", response_model=schemas.DealAlertResponse)
-def create_alert(payload: schemas.DealAlertCreate, db: Session = Depends(get_db)):
+async def create_alert(payload: schemas.DealAlertCreate, db: AsyncSession = Depends(get_async_db)):
     alert = models.DealAlert(**payload.model_dump())
     db.add(alert)
-    db.commit()
-    db.refresh(alert)
+    await db.run_sync(change_versions.bump, change_versions.alerts(payload.device_id))
+    await db.commit()
+    note_write(payload.device_id)
+    alert_matching.invalidate()
+    await db.refresh(alert)
     return alert
 
 
 @router.get("/alerts/{device_id}", response_model=list[schemas.DealAlertResponse])
-def get_alerts(device_id: str, db: Session = Depends(get_db)):
-    return (
-        db.query(models.DealAlert)
-        .filter(models.DealAlert.device_id == device_id)
+async def get_alerts(
+    device_id: str,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+):
+    versions = await db.run_sync(change_versions.current, change_versions.alerts(device_id))
+    not_modified = _not_modified(request, response, "alerts", versions)
+    if not_modified:
+        return not_modified
+
+    alerts = await db.scalars(
+        select(models.DealAlert)
+        .where(models.DealAlert.device_id == device_id)
         .order_by(models.DealAlert.created_at.desc())
-        .all()
     )
+    return alerts.all()
 
 
 @router.patch("/alerts/{alert_id}", response_model=schemas.DealAlertResponse)
-def update_alert(alert_id: int, payload: schemas.DealAlertUpdate, db: Session = Depends(get_db)):
-    alert = db.query(models.DealAlert).filter(models.DealAlert.id == alert_id).first()
+async def update_alert(
+    alert_id: int,
+    payload: schemas.DealAlertUpdate,
+    db: AsyncSession = Depends(get_async_db),
+):
+    alert = await db.get(models.DealAlert, alert_id)
     if not alert:
         raise HTTPException(status_code=404, detail="Alert not found")
 
@@ -363,46 +984,90 @@ def update_alert(alert_id: int, payload: schemas.DealAlertUpdate, db: Session =
     for key, value in updates.items():
         setattr(alert, key, value)
 
-    if alert.is_enabled:
-        alert.last_triggered_at = datetime.utcnow()
-
-    db.commit()
-    db.refresh(alert)
+    await db.run_sync(change_versions.bump, change_versions.alerts(alert.device_id))
+    await db.commit()
+    alert_matching.invalidate()
+    await db.refresh(alert)
+    note_write(alert.device_id)
     return alert
 
 
-@router.get("/recommendations/{device_id}", response_model=schemas.RecommendationResponse)
-def get_recommendations(device_id: str, db: Session = Depends(get_db)):
-    interests = db.query(models.UserInterest).filter(models.UserInterest.device_id == device_id).all()
+def _rank_deals(
+    deals_version: int,
+    interests: list[recommendations.InterestWeight],
+    favorite_categories: set[str],
+) -> list[int]:
+    """Rank deal ids for one device; run on a worker thread, not the event loop.
 
-    favorite_categories = {
-        favorite.deal.category
-        for favorite in db.query(models.FavoriteDeal)
-        .options(joinedload(models.FavoriteDeal.deal))
-        .filter(models.FavoriteDeal.device_id == device_id)
-        .all()
-        if favorite.deal
-    }
+    Scoring is CPU work, and rebuilding the index holds a thread lock that must
+    not be held across an await. A rebuild reads the catalog from a replica when
+    one is configured, like the request's own reads; ``read_session`` connects
+    straight away, so it is only opened when the index is missing or stale.
+    """
+    index = recommendations.current_index(deals_version)
+    if index is None:
+        with read_session() as db:
+            index = recommendations.get_index(db, deals_version)
+    return recommendations.get_recommender(index).recommend(interests, favorite_categories)
 
-    deals = db.query(models.Deal).filter(models.Deal.is_active.is_(True)).all()
 
-    scored_deals: list[tuple[float, models.Deal]] = []
-    for deal in deals:
-        score = float(deal.discount_percent)
+@router.get("/recommendations/{device_id}", response_model=schemas.RecommendationResponse)
+async def get_recommendations(
+    device_id: str,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+):
+    versions = await db.run_sync(
+        change_versions.current,
+        change_versions.DEALS,
+        change_versions.interests(device_id),
+        change_versions.favorites(device_id),
+    )
+    not_modified = _not_modified(request, response, "recommendations", versions)
+    if not_modified:
+        return not_modified
+
+    # The cache may be Redis, whose client blocks
+    if recommendation_cache.enabled():
+        cache_key = recommendation_cache.key_for(device_id, versions)
+        cached = await run_in_threadpool(recommendation_cache.lookup, cache_key)
+        if cached is not None:
+            return deal_json.json_response(cached, response)
+
+    interests = (await db.run_sync(recommendations.load_interests, [device_id]))[device_id]
+    favorite_categories = (await db.run_sync(recommendations.load_favorite_categories, [device_id]))[device_id]
+    ranked_ids = await run_in_threadpool(_rank_deals, versions[0], interests, favorite_categories)
+
+    rows = await db.execute(
+        select(*deal_json.DEAL_COLUMNS).where(models.Deal.id.in_(ranked_ids), models.Deal.is_active.is_(True))
+    )
+    deals_by_id = {row.id: row for row in rows}
+    body = {
+        "device_id": device_id.strip(),
+        "recommendations": deal_json.deal_dicts(
+            deals_by_id[deal_id] for deal_id in ranked_ids if deal_id in deals_by_id
+        ),
+    }
+    if recommendation_cache.enabled():
+        await run_in_threadpool(recommendation_cache.store, cache_key, body)
+    return deal_json.json_response(body, response)
 
-        for interest in interests:
-            if deal.category.lower() == interest.category.lower():
-                score += 15 * interest.priority
-            if interest.keyword.lower() in deal.title.lower():
-                score += 10 * interest.priority
 
-        if deal.category in favorite_categories:
-            score += 18
+@router.post("/recommendations/batch")
+def get_batch_recommendations(payload: schemas.BatchRecommendationRequest):
+    """Stream recommendations for many devices as NDJSON, one line per device."""
 
-        scored_deals.append((score, deal))
+    def lines() -> Iterator[str]:
+        # Own session: the streaming body outlives the request-scoped one
+        db = read_session()
+        try:
+            for response in recommendations.iter_batch_recommendations(db, payload.device_ids):
+                yield response.model_dump_json() + "\n"
+        finally:
+            db.close()
 
-    ranked = [deal for _, deal in sorted(scored_deals, key=lambda item: item[0], reverse=True)[:12]]
-    return schemas.RecommendationResponse(device_id=device_id, recommendations=ranked)
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
 
 
 @router.post("/share", response_model=schemas.ShareDealResponse)
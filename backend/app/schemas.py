@@ -27,12 +27,47 @@ class DealResponse(DealBase):
 class DealSearchResponse(BaseSchema):
     deals: list[DealResponse]
     total: int
+    # Opaque keyset cursor for the next page; None on the last page
+    next_cursor: str | None = None
+
+
+class DealPriceChange(BaseSchema):
+    deal_id: int
+    title: str
+    marketplace: str
+    previous_price: float
+    price: float
+    price_delta: float
+
+
+class MarketplaceRefreshResponse(DealSearchResponse):
+    inserted: int = 0
+    changed: int = 0
+    unchanged: int = 0
+    price_changes: list[DealPriceChange] = Field(default_factory=list)
+    # Enabled alerts fired by the inserted/changed deals
+    alerts_triggered: int = 0
+
+
+class HomeFeedResponse(BaseSchema):
+    categories: list[str]
+    deals: list[DealResponse]
+    next_cursor: str | None = None
+    favorite_deal_ids: list[int]
+
+
+class CategoryCount(BaseSchema):
+    category: str
+    active_deals: int
 
 
 class MarketplaceRefreshRequest(BaseSchema):
     query: str | None = None
     categories: list[str] = Field(default_factory=list)
+    marketplaces: list[str] = Field(default_factory=list)
     limit: int = Field(default=18, ge=3, le=50)
+    # Split into concurrent per-category/marketplace gateway calls
+    fan_out: bool = False
 
 
 class UserInterestBase(BaseSchema):
@@ -64,6 +99,23 @@ class FavoriteDealResponse(BaseSchema):
     deal: DealResponse
 
 
+class FavoriteBulkRequest(BaseSchema):
+    device_id: str
+    deal_ids: list[int] = Field(min_length=1, max_length=500)
+
+
+class FavoriteBulkResponse(BaseSchema):
+    device_id: str
+    # Ids actually added (or removed); unknown deals and no-op ids are left out
+    deal_ids: list[int]
+
+
+class FavoriteIdsResponse(BaseSchema):
+    deal_ids: list[int]
+    # Opaque keyset cursor for the next page; None on the last page
+    next_cursor: str | None = None
+
+
 class DealAlertBase(BaseSchema):
     device_id: str
     alert_type: str
@@ -107,3 +159,7 @@ class ShareDealResponse(BaseSchema):
 class RecommendationResponse(BaseSchema):
     device_id: str
     recommendations: list[DealResponse]
+
+
+class BatchRecommendationRequest(BaseSchema):
+    device_ids: list[str] = Field(min_length=1, max_length=10000)
@@ -1,4 +1,22 @@
 # Services module
-#
-# TODO: Import your service modules here
-# from . import user_service, item_service
+from . import (
+    alert_matching,
+    alert_outbox,
+    category_counts,
+    change_versions,
+    circuit_breaker,
+    deal_export,
+    deal_ingest,
+    deal_json,
+    deal_search,
+    favorites,
+    gateway,
+    home_feed,
+    http_cache,
+    json_stream,
+    pagination,
+    recommendation_cache,
+    recommendations,
+    single_flight,
+    ttl_cache,
+)
@@ -0,0 +1,241 @@
+"""Match freshly written deals against every enabled ``DealAlert``.
+
+Alert semantics:
+- ``category`` alerts fire when the deal's category equals the query
+  (case-insensitive)
+- every other alert type is a product alert and fires when each term of the
+  query appears in the title, exactly what ``GET /deals?q=<query>`` would find
+- in both cases only when ``discount_percent >= min_discount``
+
+Instead of looping alerts x deals, the distinct terms of all product alerts
+are compiled into one Aho-Corasick automaton, so a title is scanned once
+regardless of how many alerts exist. Each matched term then bumps a counter
+for the alerts containing it, and an alert fires once all its terms were
+seen. Posting lists are sorted by ``min_discount`` so alerts whose threshold
+is above the deal's discount are skipped with a bisect.
+
+The compiled matcher is cached per process, rebuilt when alerts are created
+or updated here, and at least every ``ALERT_MATCHER_TTL`` seconds (default
+60) so alerts written by other processes are picked up.
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_right
+from collections import deque
+from dataclasses import dataclass
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app import models
+from app.services.deal_search import tokenize
+
+CATEGORY_ALERT = "category"
+
+
+@dataclass(frozen=True)
+class AlertTrigger:
+    alert_id: int
+    device_id: str
+    deal_id: int
+
+
+class _Automaton:
+    """Aho-Corasick automaton reporting which of ``terms`` occur in a text."""
+
+    def __init__(self, terms: list[str]):
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[tuple[int, ...]] = [()]
+
+        for term_id, term in enumerate(terms):
+            state = 0
+            for char in term:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                state = next_state
+            self._out[state] += (term_id,)
+
+        # Breadth-first so every fail target is finished before it is used
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._out[next_state] += self._out[self._fail[next_state]]
+
+    def find(self, text: str) -> set[int]:
+        goto, fail, out = self._goto, self._fail, self._out
+        found: set[int] = set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
+
+
+class _Postings:
+    """Alert indexes sorted by ``min_discount`` for threshold cut-offs."""
+
+    def __init__(self) -> None:
+        self.entries: list[tuple[int, int]] = []
+
+    def add(self, min_discount: int, alert_index: int) -> None:
+        self.entries.append((min_discount, alert_index))
+
+    def freeze(self) -> None:
+        self.entries.sort()
+        self.thresholds = [min_discount for min_discount, _ in self.entries]
+
+    def eligible(self, discount_percent: int) -> list[tuple[int, int]]:
+        return self.entries[: bisect_right(self.thresholds, discount_percent)]
+
+
+class AlertMatcher:
+    def __init__(self, alerts: list[tuple[int, str, str, str, int]]):
+        """``alerts`` holds (id, device_id, alert_type, query, min_discount) rows."""
+        self.built_at = time.monotonic()
+        self._alert_ids: list[int] = []
+        self._device_ids: list[str] = []
+        self._term_counts: list[int] = []
+        self._by_category: dict[str, _Postings] = {}
+        term_ids: dict[str, int] = {}
+        by_term: list[_Postings] = []
+
+        for alert_id, device_id, alert_type, query, min_discount in alerts:
+            index = len(self._alert_ids)
+            if alert_type == CATEGORY_ALERT:
+                category = query.strip().lower()
+                if not category:
+                    continue
+                self._by_category.setdefault(category, _Postings()).add(min_discount, index)
+                terms = []
+            else:
+                terms = tokenize(query)
+                if not terms:
+                    continue
+                for term in terms:
+                    if term not in term_ids:
+                        term_ids[term] = len(by_term)
+                        by_term.append(_Postings())
+                    by_term[term_ids[term]].add(min_discount, index)
+
+            self._alert_ids.append(alert_id)
+            self._device_ids.append(device_id)
+            self._term_counts.append(len(terms))
+
+        for postings in [*by_term, *self._by_category.values()]:
+            postings.freeze()
+        self._by_term = by_term
+        self._automaton = _Automaton(list(term_ids))
+
+    def __len__(self) -> int:
+        return len(self._alert_ids)
+
+    def match(self, deal_id: int, title: str, category: str, discount_percent: int) -> list[AlertTrigger]:
+        """Alerts fired by one deal."""
+        fired: list[int] = []
+
+        category_postings = self._by_category.get(category.lower())
+        if category_postings is not None:
+            fired.extend(index for _, index in category_postings.eligible(discount_percent))
+
+        seen: dict[int, int] = {}
+        for term_id in self._automaton.find(title.lower()):
+            for _, index in self._by_term[term_id].eligible(discount_percent):
+                seen[index] = seen.get(index, 0) + 1
+        fired.extend(index for index, count in seen.items() if count == self._term_counts[index])
+
+        return [
+            AlertTrigger(alert_id=self._alert_ids[index], device_id=self._device_ids[index], deal_id=deal_id)
+            for index in fired
+        ]
+
+
+_matcher: AlertMatcher | None = None
+_matcher_lock = threading.Lock()
+
+
+def _matcher_ttl() -> float:
+    value = os.getenv("ALERT_MATCHER_TTL")
+    return float(value) if value else 60.0
+
+
+def build_matcher(db: Session) -> AlertMatcher:
+    """Compile every enabled alert, loading only the matched columns."""
+    rows = db.execute(
+        select(
+            models.DealAlert.id,
+            models.DealAlert.device_id,
+            models.DealAlert.alert_type,
+            models.DealAlert.query,
+            models.DealAlert.min_discount,
+        ).where(models.DealAlert.is_enabled.is_(True))
+    )
+    return AlertMatcher([tuple(row) for row in rows])
+
+
+def get_matcher(db: Session) -> AlertMatcher:
+    """Return the process-wide matcher, (re)building it when missing or expired."""
+    global _matcher
+
+    matcher = _matcher
+    if matcher is not None and time.monotonic() - matcher.built_at < _matcher_ttl():
+        return matcher
+
+    with _matcher_lock:
+        if _matcher is None or time.monotonic() - _matcher.built_at >= _matcher_ttl():
+            _matcher = build_matcher(db)
+        return _matcher
+
+
+def invalidate() -> None:
+    """Drop the compiled matcher after alerts change; the next evaluation rebuilds it."""
+    global _matcher
+    with _matcher_lock:
+        _matcher = None
+
+
+def evaluate(db: Session, deals: list[models.Deal]) -> list[AlertTrigger]:
+    """Match ``deals`` against enabled alerts and stamp ``last_triggered_at``.
+
+    Runs inside the caller's transaction, so the stamps commit (or roll back)
+    together with the upsert that produced the deals.
+    """
+    active = [deal for deal in deals if deal.is_active]
+    if not active:
+        return []
+
+    matcher = get_matcher(db)
+    if not len(matcher):
+        return []
+
+    triggers = [
+        trigger
+        for deal in active
+        for trigger in matcher.match(deal.id, deal.title, deal.category, deal.discount_percent)
+    ]
+    if triggers:
+        db.execute(
+            update(models.DealAlert)
+            .where(models.DealAlert.id.in_({trigger.alert_id for trigger in triggers}))
+            # Firing is not an edit of the alert, so updated_at is left as is
+            .values(last_triggered_at=func.now(), updated_at=models.DealAlert.updated_at),
+            execution_options={"synchronize_session": False},
+        )
+    return triggers
@@ -0,0 +1,347 @@
+"""Transactional outbox for alert notifications and the worker that drains it.
+
+``enqueue`` inserts one ``alert_notifications`` row per fired alert inside the
+refresh transaction, so a notification exists exactly when its deal write
+committed and the request never waits on delivery.
+
+Workers (``python -m app.cli alerts-worker``) drain the table in batches:
+
+1. claim: ``SELECT ... FOR UPDATE SKIP LOCKED`` picks due pending rows and
+   leases them by pushing ``next_attempt_at`` forward, then commits. Concurrent
+   workers skip each other's rows, so delivery scales by adding processes, and
+   rows leased by a crashed worker come back once the lease expires.
+2. deliver: the batch goes to the configured sender outside any transaction.
+3. settle: delivered rows become ``sent``; failures are rescheduled with
+   exponential backoff until ``ALERT_MAX_ATTEMPTS``, then marked ``failed``.
+
+Configuration (all optional):
+- ALERT_SENDER: ``file`` (default) appends NDJSON to ALERT_SENDER_PATH
+  (default alert_notifications.ndjson); ``http`` POSTs each batch as JSON to
+  ALERT_SENDER_URL
+- ALERT_MAX_ATTEMPTS: deliveries tried before a row is marked failed (default 8)
+- ALERT_RETRY_BASE_SECONDS / ALERT_RETRY_MAX_SECONDS: backoff bounds (default 5 / 3600)
+- ALERT_LEASE_SECONDS: how long a claimed row stays invisible to other workers (default 60)
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Protocol
+
+import httpx
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app import models
+from app.services.alert_matching import AlertTrigger
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+SENT = "sent"
+FAILED = "failed"
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes; everything stored here is UTC
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def enqueue(db: Session, triggers: list[AlertTrigger], deals: list[models.Deal]) -> None:
+    """Add outbox rows for ``triggers`` to the caller's transaction (one INSERT)."""
+    if not triggers:
+        return
+
+    deals_by_id = {deal.id: deal for deal in deals}
+    rows = []
+    for trigger in triggers:
+        deal = deals_by_id[trigger.deal_id]
+        rows.append(
+            {
+                "alert_id": trigger.alert_id,
+                "device_id": trigger.device_id,
+                "deal_id": trigger.deal_id,
+                "payload": {
+                    "title": deal.title,
+                    "marketplace": deal.marketplace,
+                    "category": deal.category,
+                    "price": deal.price,
+                    "original_price": deal.original_price,
+                    "discount_percent": deal.discount_percent,
+                    "product_url": deal.product_url,
+                    "image_url": deal.image_url,
+                },
+            }
+        )
+    db.execute(insert(models.AlertNotification), rows)
+
+
+def backlog(db: Session) -> dict:
+    """Pending/failed counts and the age of the oldest undelivered notification."""
+    counts = dict(
+        db.execute(
+            select(models.AlertNotification.status, func.count())
+            .where(models.AlertNotification.status.in_([PENDING, FAILED]))
+            .group_by(models.AlertNotification.status)
+        ).all()
+    )
+    oldest = db.scalar(
+        select(func.min(models.AlertNotification.created_at)).where(
+            models.AlertNotification.status == PENDING
+        )
+    )
+    return {
+        "pending": counts.get(PENDING, 0),
+        "failed": counts.get(FAILED, 0),
+        "oldest_pending_age_seconds": (
+            round((_utcnow() - _as_utc(oldest)).total_seconds(), 3) if oldest else 0.0
+        ),
+    }
+
+
+@dataclass(frozen=True)
+class Notification:
+    id: int
+    alert_id: int
+    device_id: str
+    deal_id: int
+    payload: dict
+    attempts: int
+    created_at: datetime
+
+    def to_message(self) -> dict:
+        return {
+            "notification_id": self.id,
+            "alert_id": self.alert_id,
+            "device_id": self.device_id,
+            "deal_id": self.deal_id,
+            "deal": self.payload,
+        }
+
+
+class Sender(Protocol):
+    def send(self, batch: list[Notification]) -> dict[int, str]:
+        """Deliver ``batch``; return an error message per undelivered notification id."""
+
+
+class FileSender:
+    """Appends one NDJSON line per notification; a local stand-in for push delivery."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def send(self, batch: list[Notification]) -> dict[int, str]:
+        lines = "".join(json.dumps(item.to_message()) + "\n" for item in batch)
+        with self._lock, open(self.path, "a", encoding="utf-8") as handle:
+            handle.write(lines)
+        return {}
+
+
+class HttpSender:
+    """POSTs each batch as a JSON array; any non-2xx fails the whole batch."""
+
+    def __init__(self, url: str, timeout: float = 10.0):
+        self.url = url
+        self._client = httpx.Client(timeout=timeout)
+
+    def send(self, batch: list[Notification]) -> dict[int, str]:
+        try:
+            response = self._client.post(self.url, json=[item.to_message() for item in batch])
+            response.raise_for_status()
+        except httpx.HTTPError as exc:
+            return {item.id: str(exc) or type(exc).__name__ for item in batch}
+        return {}
+
+
+def build_sender() -> Sender:
+    kind = os.getenv("ALERT_SENDER", "file").lower()
+    if kind == "http":
+        url = os.getenv("ALERT_SENDER_URL")
+        if not url:
+            raise RuntimeError("ALERT_SENDER=http requires ALERT_SENDER_URL")
+        return HttpSender(url)
+    return FileSender(os.getenv("ALERT_SENDER_PATH", "alert_notifications.ndjson"))
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff after the ``attempts``-th failed delivery."""
+    base = _env_float("ALERT_RETRY_BASE_SECONDS", 5.0)
+    return min(_env_float("ALERT_RETRY_MAX_SECONDS", 3600.0), base * 2 ** (attempts - 1))
+
+
+def claim_batch(db: Session, batch_size: int) -> list[Notification]:
+    """Lease up to ``batch_size`` due notifications and commit the lease."""
+    now = _utcnow()
+    rows = db.scalars(
+        select(models.AlertNotification)
+        .where(
+            models.AlertNotification.status == PENDING,
+            models.AlertNotification.next_attempt_at <= now,
+        )
+        .order_by(models.AlertNotification.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if not rows:
+        db.rollback()
+        return []
+
+    batch = [
+        Notification(
+            id=row.id,
+            alert_id=row.alert_id,
+            device_id=row.device_id,
+            deal_id=row.deal_id,
+            payload=row.payload,
+            attempts=row.attempts + 1,
+            created_at=_as_utc(row.created_at),
+        )
+        for row in rows
+    ]
+    db.execute(
+        update(models.AlertNotification)
+        .where(models.AlertNotification.id.in_([item.id for item in batch]))
+        .values(
+            attempts=models.AlertNotification.attempts + 1,
+            next_attempt_at=now + timedelta(seconds=_env_float("ALERT_LEASE_SECONDS", 60.0)),
+        ),
+        execution_options={"synchronize_session": False},
+    )
+    db.commit()
+    return batch
+
+
+def settle(db: Session, batch: list[Notification], errors: dict[int, str]) -> tuple[int, int, int]:
+    """Record delivery outcomes; returns (sent, retried, failed) counts."""
+    now = _utcnow()
+    max_attempts = int(_env_float("ALERT_MAX_ATTEMPTS", 8))
+    sent_ids = [item.id for item in batch if item.id not in errors]
+    retried = failed = 0
+
+    if sent_ids:
+        db.execute(
+            update(models.AlertNotification)
+            .where(models.AlertNotification.id.in_(sent_ids))
+            .values(status=SENT, sent_at=now, last_error=None),
+            execution_options={"synchronize_session": False},
+        )
+    # Failures of one batch usually share their outcome, so group identical updates
+    outcomes: dict[tuple, list[int]] = {}
+    for item in batch:
+        if item.id not in errors:
+            continue
+        if item.attempts >= max_attempts:
+            outcome = (("status", FAILED), ("last_error", errors[item.id][:1000]))
+            failed += 1
+        else:
+            retry_at = now + timedelta(seconds=retry_delay(item.attempts))
+            outcome = (("next_attempt_at", retry_at), ("last_error", errors[item.id][:1000]))
+            retried += 1
+        outcomes.setdefault(outcome, []).append(item.id)
+    for outcome, ids in outcomes.items():
+        db.execute(
+            update(models.AlertNotification)
+            .where(models.AlertNotification.id.in_(ids))
+            .values(**dict(outcome)),
+            execution_options={"synchronize_session": False},
+        )
+    db.commit()
+    return len(sent_ids), retried, failed
+
+
+@dataclass
+class WorkerMetrics:
+    started_at: float = field(default_factory=time.monotonic)
+    batches: int = 0
+    sent: int = 0
+    retried: int = 0
+    failed: int = 0
+    # Seconds from enqueue to successful delivery, over the last batch
+    last_lag_seconds: float = 0.0
+    max_lag_seconds: float = 0.0
+
+    def record(self, batch: list[Notification], sent: int, retried: int, failed: int, errors: dict) -> None:
+        self.batches += 1
+        self.sent += sent
+        self.retried += retried
+        self.failed += failed
+        now = _utcnow()
+        lags = [(now - item.created_at).total_seconds() for item in batch if item.id not in errors]
+        if lags:
+            self.last_lag_seconds = round(max(lags), 3)
+            self.max_lag_seconds = max(self.max_lag_seconds, self.last_lag_seconds)
+
+    def snapshot(self) -> dict:
+        elapsed = time.monotonic() - self.started_at
+        return {
+            "batches": self.batches,
+            "sent": self.sent,
+            "retried": self.retried,
+            "failed": self.failed,
+            "sent_per_second": round(self.sent / elapsed, 2) if elapsed > 0 else 0.0,
+            "last_lag_seconds": self.last_lag_seconds,
+            "max_lag_seconds": self.max_lag_seconds,
+        }
+
+
+def run_worker(
+    session_factory: Callable[[], Session],
+    sender: Sender,
+    batch_size: int = 100,
+    poll_interval: float = 1.0,
+    once: bool = False,
+    stop: threading.Event | None = None,
+    metrics_interval: float = 30.0,
+) -> WorkerMetrics:
+    """Claim, deliver and settle batches until ``stop`` is set (or the queue is empty with ``once``)."""
+    stop = stop or threading.Event()
+    metrics = WorkerMetrics()
+    last_report = time.monotonic()
+
+    while not stop.is_set():
+        batch: list[Notification] = []
+        db = session_factory()
+        try:
+            batch = claim_batch(db, batch_size)
+            if batch:
+                try:
+                    errors = sender.send(batch)
+                except Exception as exc:
+                    logger.exception("Alert sender raised")
+                    errors = {item.id: str(exc) or type(exc).__name__ for item in batch}
+                sent, retried, failed = settle(db, batch, errors)
+                metrics.record(batch, sent, retried, failed, errors)
+        except Exception:
+            # e.g. the database is unreachable: keep polling. Leased rows come
+            # back once their lease expires, so nothing is lost.
+            logger.exception("Alert worker batch failed")
+            batch = []
+        finally:
+            db.close()
+
+        if time.monotonic() - last_report >= metrics_interval:
+            logger.info(f"Alert worker metrics: {metrics.snapshot()}")
+            last_report = time.monotonic()
+
+        # A full batch suggests more is due, so only idle on a short or empty one
+        if len(batch) < batch_size:
+            if once:
+                break
+            stop.wait(poll_interval)
+
+    return metrics
@@ -0,0 +1,53 @@
+"""``TTLCache`` persistence in the ``cache_entries`` table.
+
+Unlike a file under ``/tmp``, the table survives serverless cold starts and
+is shared by every instance. A cache loads its namespace once, when it is
+created, and from then on writes its own changes back in batches (see
+``TTLCache``), on the primary.
+"""
+
+from sqlalchemy import delete, select
+
+from app import database, models
+from app.services.deal_ingest import dialect_insert
+from app.services.ttl_cache import StoredEntry
+
+
+class DatabaseCacheStore:
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+
+    def load(self, limit: int) -> list[StoredEntry]:
+        table = models.CacheEntry.__table__
+        with database.get_session_local()() as db:
+            rows = db.execute(
+                select(table.c.key, table.c.stored_at, table.c.value)
+                .where(table.c.namespace == self.namespace)
+                .order_by(table.c.stored_at.desc())
+                .limit(limit)
+            ).all()
+        return [(key, stored_at, value) for key, stored_at, value in reversed(rows)]
+
+    def write(self, upserts: list[StoredEntry], deletes: list[str], cleared: bool) -> None:
+        table = models.CacheEntry.__table__
+        in_namespace = table.c.namespace == self.namespace
+        with database.get_session_local()() as db:
+            if cleared:
+                db.execute(delete(table).where(in_namespace))
+            if deletes:
+                db.execute(delete(table).where(in_namespace, table.c.key.in_(deletes)))
+            if upserts:
+                stmt = dialect_insert(db)(table)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[table.c.namespace, table.c.key],
+                    set_={"stored_at": stmt.excluded.stored_at, "value": stmt.excluded.value},
+                )
+                # Sorted so concurrent writers lock the same rows in the same order
+                db.execute(
+                    stmt,
+                    [
+                        {"namespace": self.namespace, "key": key, "stored_at": stored_at, "value": value}
+                        for key, stored_at, value in sorted(upserts, key=lambda entry: entry[0])
+                    ],
+                )
+            db.commit()
@@ -0,0 +1,153 @@
+"""Precomputed deal categories with per-category active-deal counts.
+
+``GET /deals/categories`` used to run ``SELECT DISTINCT category`` over the
+whole table on every home-screen load. The set is now built once with a single
+``GROUP BY`` and kept current incrementally: every committed deal write
+(refresh inserts and changes, including activation flips and category moves)
+is folded in as a delta. Each change bumps ``version`` and produces a new
+immutable snapshot holding the serialized bodies and their ETags, so requests
+only copy bytes.
+
+Writes made by other processes are picked up by a rebuild after
+``CATEGORY_COUNTS_TTL`` seconds (default 60), or right away when the caller
+passes a ``deals`` change counter the counts have not caught up with.
+"""
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session
+
+from app import models
+from app.services import deal_ingest
+from app.services.http_cache import dump_json, etag_for
+
+# (category before, active before, category after, active after); None before = new deal
+CategoryDelta = tuple[str | None, bool, str, bool]
+
+
+@dataclass(frozen=True)
+class CategorySnapshot:
+    version: int
+    categories: tuple[str, ...]
+    categories_body: bytes
+    categories_etag: str
+    counts_body: bytes
+    counts_etag: str
+
+
+class CategoryCounts:
+    def __init__(self, totals: dict[str, int], active: dict[str, int]):
+        self._lock = threading.Lock()
+        # Every deal counts toward ``totals`` (the category list); only active ones toward ``active``
+        self._totals = totals
+        self._active = active
+        self.version = 0
+        # The ``deals`` change counter these counts reflect, when known
+        self.deals_version: int | None = None
+        self.built_at = time.monotonic()
+        self.snapshot = self._render()
+
+    def apply(self, deltas: list[CategoryDelta], deals_version: int | None = None) -> None:
+        with self._lock:
+            if deltas:
+                for before, was_active, after, is_active in deltas:
+                    if before is not None:
+                        self._adjust(before, -1, -1 if was_active else 0)
+                    self._adjust(after, 1, 1 if is_active else 0)
+                self.version += 1
+                self.snapshot = self._render()
+            # Only adopt the write's counter when no other writer got in between
+            if deals_version is not None and self.deals_version == deals_version - 1:
+                self.deals_version = deals_version
+
+    def _adjust(self, category: str, total: int, active: int) -> None:
+        remaining = self._totals.get(category, 0) + total
+        if remaining > 0:
+            self._totals[category] = remaining
+            self._active[category] = self._active.get(category, 0) + active
+        else:
+            self._totals.pop(category, None)
+            self._active.pop(category, None)
+
+    def _render(self) -> CategorySnapshot:
+        categories = sorted(self._totals)
+        categories_body = dump_json(categories)
+        counts_body = dump_json(
+            [{"category": category, "active_deals": self._active.get(category, 0)} for category in categories]
+        )
+        return CategorySnapshot(
+            version=self.version,
+            categories=tuple(categories),
+            categories_body=categories_body,
+            categories_etag=etag_for(categories_body),
+            counts_body=counts_body,
+            counts_etag=etag_for(counts_body),
+        )
+
+
+_counts: CategoryCounts | None = None
+_counts_lock = threading.Lock()
+
+
+def _counts_ttl() -> float:
+    value = os.getenv("CATEGORY_COUNTS_TTL")
+    return float(value) if value else 60.0
+
+
+def build_counts(db: Session) -> CategoryCounts:
+    """Count deals per category in one grouped query."""
+    rows = db.execute(
+        select(
+            models.Deal.category,
+            func.count(),
+            func.sum(case((models.Deal.is_active.is_(True), 1), else_=0)),
+        ).group_by(models.Deal.category)
+    )
+    totals: dict[str, int] = {}
+    active: dict[str, int] = {}
+    for category, total, active_count in rows:
+        totals[category] = total
+        active[category] = active_count or 0
+    return CategoryCounts(totals, active)
+
+
+def _is_current(counts: CategoryCounts | None, deals_version: int | None) -> bool:
+    if counts is None or time.monotonic() - counts.built_at >= _counts_ttl():
+        return False
+    return deals_version is None or (counts.deals_version is not None and counts.deals_version >= deals_version)
+
+
+def get_snapshot(db: Session, deals_version: int | None = None) -> CategorySnapshot:
+    """Return the current snapshot, (re)building the counts when missing, expired or stale."""
+    global _counts
+
+    counts = _counts
+    if _is_current(counts, deals_version):
+        return counts.snapshot
+
+    with _counts_lock:
+        if not _is_current(_counts, deals_version):
+            _counts = build_counts(db)
+            _counts.deals_version = deals_version
+        return _counts.snapshot
+
+
+def deltas_for(result: deal_ingest.UpsertResult) -> list[CategoryDelta]:
+    """Category deltas of an upsert; read them before commit expires the deals."""
+    deltas: list[CategoryDelta] = [(None, False, deal.category, deal.is_active) for deal in result.inserted]
+    for deal in result.changed:
+        before, was_active = result.previous_states[deal.id]
+        if (before, was_active) != (deal.category, deal.is_active):
+            deltas.append((before, was_active, deal.category, deal.is_active))
+    return deltas
+
+
+def apply_deltas(deltas: list[CategoryDelta], deals_version: int | None = None) -> None:
+    """Fold committed deltas into built counts (no-op until the first build)."""
+    counts = _counts
+    if counts is not None:
+        counts.apply(deltas, deals_version)
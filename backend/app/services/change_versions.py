@@ -0,0 +1,68 @@
+"""Per-scope change counters backing version-based ETags.
+
+Every write bumps the counters of the scopes it affects, inside its own
+transaction, so a counter can never run ahead of or behind the data it
+describes and every process sees the same values:
+
+- ``deals``: any deal insert or change
+- ``favorites:<device_id>``, ``interests:<device_id>``, ``alerts:<device_id>``
+
+A read endpoint's ETag is its route name plus the counters its body depends
+on, e.g. ``W/"favorites-12-3"`` for the deals and favorites versions. Checking
+``If-None-Match`` costs one primary-key lookup and never loads the rows.
+"""
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app import models
+from app.services.deal_ingest import dialect_insert
+
+DEALS = "deals"
+
+
+def favorites(device_id: str) -> str:
+    return f"favorites:{device_id}"
+
+
+def interests(device_id: str) -> str:
+    return f"interests:{device_id}"
+
+
+def alerts(device_id: str) -> str:
+    return f"alerts:{device_id}"
+
+
+def bump(db: Session, *scopes: str) -> dict[str, int]:
+    """Increment ``scopes`` in the caller's transaction (one upsert statement).
+
+    Returns the new counter of each scope.
+    """
+    if not scopes:
+        return {}
+
+    table = models.ChangeVersion.__table__
+    stmt = dialect_insert(db)(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.scope],
+        set_={"version": table.c.version + 1},
+    ).returning(table.c.scope, table.c.version)
+    # Sorted so concurrent writers lock the same rows in the same order
+    rows = db.execute(stmt, [{"scope": scope, "version": 1} for scope in sorted(set(scopes))])
+    return dict(rows.all())
+
+
+def current(db: Session, *scopes: str) -> list[int]:
+    """Current counters of ``scopes``, in order (0 for scopes never written)."""
+    rows = dict(
+        db.execute(
+            select(models.ChangeVersion.scope, models.ChangeVersion.version).where(
+                models.ChangeVersion.scope.in_(scopes)
+            )
+        ).all()
+    )
+    return [rows.get(scope, 0) for scope in scopes]
+
+
+def etag(route: str, versions: list[int]) -> str:
+    return f'W/"{route}-{"-".join(str(version) for version in versions)}"'
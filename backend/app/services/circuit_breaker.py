@@ -0,0 +1,213 @@
+"""Circuit breaker with a latency-adaptive timeout for the deal gateway.
+
+States follow the usual pattern:
+- closed: calls go through; consecutive failures are counted
+- open: calls are refused immediately until ``reset_timeout`` has passed
+- half_open: a single trial call is let through; success closes the circuit,
+  failure re-opens it
+
+While closed, the per-call timeout tracks observed latency: p95 of recent
+calls times ``timeout_multiplier``, clamped to [min_timeout, max_timeout].
+Half-open trials always get ``max_timeout`` so a gateway that has merely
+become slower can still close the circuit again.
+"""
+
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Below this many samples the p95 is too noisy to tighten the timeout
+MIN_LATENCY_SAMPLES = 5
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling through while the circuit is open."""
+
+
+@dataclass
+class Attempt:
+    """One guarded call: the timeout it should use, and time to leave out of its latency."""
+
+    timeout: float
+    # Seconds a streaming caller spent suspended, handing results to its consumer
+    paused: float = 0.0
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        failure_threshold: int,
+        reset_timeout: float,
+        min_timeout: float,
+        max_timeout: float,
+        timeout_multiplier: float = 2.0,
+        latency_window: int = 50,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.timeout_multiplier = timeout_multiplier
+        self._latencies: deque[float] = deque(maxlen=latency_window)
+        self._transitions: deque[dict] = deque(maxlen=20)
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self.consecutive_failures = 0
+        self.successes = 0
+        self.failures = 0
+        self.short_circuited = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def allows_requests(self) -> bool:
+        """True unless the circuit is open (or half-open with its trial already running).
+
+        A refusal counts as a short-circuited call.
+        """
+        with self._lock:
+            state = self._current_state()
+            allowed = state == CLOSED or (state == HALF_OPEN and not self._trial_in_flight)
+            if not allowed:
+                self.short_circuited += 1
+            return allowed
+
+    def current_timeout(self) -> float:
+        """Timeout to apply to the next call, adapted to recent p95 latency."""
+        with self._lock:
+            if self._current_state() != CLOSED:
+                return self.max_timeout
+            return self._adaptive_timeout()
+
+    def call(self, fn: Callable[[float], Any]) -> Any:
+        """Invoke ``fn(timeout)`` through the breaker, recording its outcome."""
+        with self.attempt() as attempt:
+            return fn(attempt.timeout)
+
+    @contextmanager
+    def attempt(self) -> Iterator[Attempt]:
+        """Guard a block of gateway work, yielding its ``Attempt``.
+
+        Raises ``CircuitOpenError`` up front when the circuit refuses calls.
+        An exception escaping the block counts as a failure. A generator that
+        is closed early (``GeneratorExit``) or a cancelled task releases its
+        half-open trial without recording an outcome. Time added to
+        ``Attempt.paused`` is not counted as gateway latency.
+
+        The lock is only held briefly, never across the block, so the guard
+        can wrap awaits as well as blocking calls.
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == OPEN or (state == HALF_OPEN and self._trial_in_flight):
+                self.short_circuited += 1
+                raise CircuitOpenError("Gateway circuit is open")
+            if state == HALF_OPEN:
+                self._trial_in_flight = True
+                timeout = self.max_timeout
+            else:
+                timeout = self._adaptive_timeout()
+
+        attempt = Attempt(timeout)
+        started = time.monotonic()
+        try:
+            yield attempt
+        except (GeneratorExit, asyncio.CancelledError):
+            with self._lock:
+                self._trial_in_flight = False
+            raise
+        except BaseException:
+            self._record_failure(time.monotonic() - started - attempt.paused)
+            raise
+        self._record_success(time.monotonic() - started - attempt.paused)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            state = self._current_state()
+            return {
+                "state": state,
+                "consecutive_failures": self.consecutive_failures,
+                "failure_threshold": self.failure_threshold,
+                "reset_timeout_seconds": self.reset_timeout,
+                "retry_in_seconds": (
+                    round(max(0.0, self._opened_at + self.reset_timeout - time.monotonic()), 2)
+                    if state == OPEN
+                    else 0.0
+                ),
+                "current_timeout_seconds": round(
+                    self._adaptive_timeout() if state == CLOSED else self.max_timeout, 3
+                ),
+                "p95_latency_seconds": self._p95(),
+                "latency_samples": len(self._latencies),
+                "successes": self.successes,
+                "failures": self.failures,
+                "short_circuited": self.short_circuited,
+                "transitions": list(self._transitions),
+            }
+
+    def _record_success(self, latency: float) -> None:
+        with self._lock:
+            self.successes += 1
+            self.consecutive_failures = 0
+            self._latencies.append(latency)
+            self._trial_in_flight = False
+            if self._state != CLOSED:
+                self._transition(CLOSED)
+
+    def _record_failure(self, latency: float) -> None:
+        with self._lock:
+            self.failures += 1
+            self.consecutive_failures += 1
+            # Slow failures (typically timeouts) still say something about latency
+            self._latencies.append(latency)
+            was_trial = self._trial_in_flight
+            self._trial_in_flight = False
+            if was_trial or (
+                self._state == CLOSED and self.consecutive_failures >= self.failure_threshold
+            ):
+                self._opened_at = time.monotonic()
+                self._transition(OPEN)
+
+    def _current_state(self) -> str:
+        # Called with the lock held; promotes open -> half_open once the reset timeout passes.
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._transition(HALF_OPEN)
+        return self._state
+
+    def _transition(self, new_state: str) -> None:
+        self._transitions.append(
+            {
+                "from": self._state,
+                "to": new_state,
+                "at": datetime.now(timezone.utc).isoformat(),
+            }
+        )
+        self._state = new_state
+
+    def _p95(self) -> float | None:
+        if not self._latencies:
+            return None
+        ordered = sorted(self._latencies)
+        index = max(0, math.ceil(0.95 * len(ordered)) - 1)
+        return round(ordered[index], 3)
+
+    def _adaptive_timeout(self) -> float:
+        if len(self._latencies) < MIN_LATENCY_SAMPLES:
+            return self.max_timeout
+        adapted = self._p95() * self.timeout_multiplier
+        return min(self.max_timeout, max(self.min_timeout, adapted))
@@ -0,0 +1,85 @@
+"""Streaming export of the active deal catalog as NDJSON or CSV.
+
+Rows come off a server-side cursor (``yield_per``, which turns on
+``stream_results`` on PostgreSQL) one partition at a time. Each partition is
+rendered into a single chunk and handed on before the next is fetched, so
+memory stays flat however large the catalog is. Deals are exported in id
+order with the same fields and formatting as ``DealResponse`` (see
+``deal_json``).
+
+``gzip_chunks`` compresses the stream on the fly for ``Content-Encoding:
+gzip`` responses and ``.gz`` files.
+"""
+
+import csv
+import io
+import zlib
+from collections.abc import Iterable, Iterator
+
+from sqlalchemy import Select, select
+from sqlalchemy.orm import Session
+
+from app import models
+from app.services import deal_json
+
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+PARTITION_SIZE = 1000
+
+
+def export_query(
+    category: str | None = None,
+    marketplace: str | None = None,
+    min_discount: int = 0,
+) -> Select:
+    query = select(*deal_json.DEAL_COLUMNS).where(models.Deal.is_active.is_(True))
+    if category:
+        query = query.where(models.Deal.category == category)
+    if marketplace:
+        query = query.where(models.Deal.marketplace == marketplace)
+    if min_discount:
+        query = query.where(models.Deal.discount_percent >= min_discount)
+    return query.order_by(models.Deal.id)
+
+
+def _partitions(db: Session, query: Select) -> Iterator[list[dict]]:
+    result = db.execute(query.execution_options(yield_per=PARTITION_SIZE))
+    for rows in result.partitions():
+        yield deal_json.deal_dicts(rows)
+
+
+def iter_ndjson(db: Session, query: Select) -> Iterator[bytes]:
+    for deals in _partitions(db, query):
+        yield b"".join(deal_json.dumps(deal) + b"\n" for deal in deals)
+
+
+def iter_csv(db: Session, query: Select) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(deal_json.DEAL_FIELDS)
+    for deals in _partitions(db, query):
+        writer.writerows(deal.values() for deal in deals)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    # Header only, for an empty export
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def iter_export(db: Session, query: Select, export_format: str) -> Iterator[bytes]:
+    if export_format == "csv":
+        return iter_csv(db, query)
+    return iter_ndjson(db, query)
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Gzip a byte stream chunk by chunk."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
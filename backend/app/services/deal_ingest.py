@@ -0,0 +1,188 @@
+"""Set-based persistence for marketplace refresh batches.
+
+A refresh batch is written with a single ``INSERT ... ON CONFLICT`` statement
+keyed on the ``uq_deal_title_marketplace`` constraint. ``RETURNING`` hands the
+persisted rows straight back, so callers never need a second query to build
+their response.
+
+Incoming rows are compared with what is already stored first, and rows whose
+fields are all unchanged are left alone. That keeps ``updated_at`` meaningful
+and avoids rewriting (and WAL-logging) rows on every refresh.
+"""
+
+from dataclasses import dataclass, field
+
+from sqlalchemy import func, or_, select, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app import models
+
+# Columns refreshed from the incoming payload when a (title, marketplace) row exists
+UPSERT_COLUMNS = (
+    "category",
+    "price",
+    "original_price",
+    "discount_percent",
+    "product_url",
+    "image_url",
+    "is_active",
+)
+
+
+def dialect_insert(db: Session):
+    """Return the dialect-specific ``insert`` construct that supports ON CONFLICT."""
+    dialect_name = db.get_bind().dialect.name
+    if dialect_name == "postgresql":
+        return postgresql.insert
+    if dialect_name == "sqlite":
+        return sqlite.insert
+    raise RuntimeError(f"Deal upsert is not supported on the '{dialect_name}' dialect")
+
+
+def dedupe_batch(normalized_deals: list[dict]) -> list[dict]:
+    """Collapse rows sharing a (title, marketplace) key, keeping the last one.
+
+    ON CONFLICT DO UPDATE cannot touch the same row twice in one statement, and
+    the last occurrence is the one the old row-by-row loop would have persisted.
+    """
+    by_key: dict[tuple[str, str], dict] = {}
+    for deal in normalized_deals:
+        by_key[(deal["title"], deal["marketplace"])] = {**deal, "is_active": True}
+    return list(by_key.values())
+
+
+@dataclass
+class PriceChange:
+    deal_id: int
+    title: str
+    marketplace: str
+    previous_price: float
+    price: float
+
+    @property
+    def price_delta(self) -> float:
+        return round(self.price - self.previous_price, 2)
+
+
+@dataclass
+class UpsertResult:
+    deals: list[models.Deal] = field(default_factory=list)
+    inserted: list[models.Deal] = field(default_factory=list)
+    changed: list[models.Deal] = field(default_factory=list)
+    unchanged: list[models.Deal] = field(default_factory=list)
+    price_changes: list[PriceChange] = field(default_factory=list)
+    # Stored (category, is_active) of each changed deal before the write, by deal id
+    previous_states: dict[int, tuple[str, bool]] = field(default_factory=dict)
+
+    def extend(self, other: "UpsertResult") -> None:
+        """Fold another batch's outcome into this one."""
+        self.deals.extend(other.deals)
+        self.inserted.extend(other.inserted)
+        self.changed.extend(other.changed)
+        self.unchanged.extend(other.unchanged)
+        self.price_changes.extend(other.price_changes)
+        self.previous_states.update(other.previous_states)
+
+
+def _load_existing(db: Session, rows: list[dict]) -> dict[tuple[str, str], models.Deal]:
+    keys = [(row["title"], row["marketplace"]) for row in rows]
+    existing = db.scalars(
+        select(models.Deal).where(tuple_(models.Deal.title, models.Deal.marketplace).in_(keys))
+    )
+    return {(deal.title, deal.marketplace): deal for deal in existing}
+
+
+def _has_changes(stored: models.Deal, row: dict) -> bool:
+    return any(getattr(stored, column) != row[column] for column in UPSERT_COLUMNS)
+
+
+def upsert_deals(db: Session, normalized_deals: list[dict]) -> UpsertResult:
+    """Insert new deals, update changed ones and skip the rest.
+
+    Costs one SELECT for the batch keys plus one upsert for the rows that need
+    writing, and one more SELECT only when a concurrent writer got to some of
+    them first. The caller owns the transaction; nothing is committed here.
+    """
+    result = UpsertResult()
+    rows = dedupe_batch(normalized_deals)
+    if not rows:
+        return result
+
+    existing = _load_existing(db, rows)
+    pending: list[dict] = []
+    previous_prices: dict[tuple[str, str], float] = {}
+    previous_states: dict[tuple[str, str], tuple[str, bool]] = {}
+
+    for row in rows:
+        key = (row["title"], row["marketplace"])
+        stored = existing.get(key)
+        if stored is None:
+            pending.append(row)
+        elif _has_changes(stored, row):
+            previous_prices[key] = stored.price
+            previous_states[key] = (stored.category, stored.is_active)
+            pending.append(row)
+        else:
+            result.unchanged.append(stored)
+
+    if pending:
+        insert = dialect_insert(db)
+        stmt = insert(models.Deal)
+        # The WHERE clause keeps a concurrent refresh that already wrote the same
+        # values from turning into a no-op rewrite.
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[models.Deal.title, models.Deal.marketplace],
+            set_={
+                **{column: stmt.excluded[column] for column in UPSERT_COLUMNS},
+                "updated_at": func.now(),
+            },
+            where=or_(
+                *(
+                    getattr(models.Deal, column).is_distinct_from(stmt.excluded[column])
+                    for column in UPSERT_COLUMNS
+                )
+            ),
+        ).returning(models.Deal)
+
+        # Multiple parameter sets are sent through SQLAlchemy's "insertmanyvalues"
+        # batching, i.e. one round trip per ~1000 rows rather than one per deal.
+        written = list(db.scalars(stmt, pending, execution_options={"populate_existing": True}))
+        written_keys = {(deal.title, deal.marketplace) for deal in written}
+
+        for deal in written:
+            key = (deal.title, deal.marketplace)
+            if key not in existing:
+                result.inserted.append(deal)
+                continue
+
+            result.changed.append(deal)
+            result.previous_states[deal.id] = previous_states[key]
+            previous_price = previous_prices.get(key)
+            if previous_price is not None and previous_price != deal.price:
+                result.price_changes.append(
+                    PriceChange(
+                        deal_id=deal.id,
+                        title=deal.title,
+                        marketplace=deal.marketplace,
+                        previous_price=previous_price,
+                        price=deal.price,
+                    )
+                )
+
+        # Rows another writer inserted or brought up to date after our SELECT hit
+        # the WHERE guard and were not returned; read back what it committed.
+        missing = [
+            key for key in ((row["title"], row["marketplace"]) for row in pending) if key not in written_keys
+        ]
+        if missing:
+            result.unchanged.extend(
+                db.scalars(
+                    select(models.Deal)
+                    .where(tuple_(models.Deal.title, models.Deal.marketplace).in_(missing))
+                    .execution_options(populate_existing=True)
+                )
+            )
+
+    result.deals = result.inserted + result.changed + result.unchanged
+    return result
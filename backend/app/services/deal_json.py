@@ -0,0 +1,88 @@
+"""Deal lists serialized straight from column rows.
+
+The deal list endpoints select ``DEAL_COLUMNS`` as plain row tuples and turn
+them into JSON-ready dicts here, skipping ORM identity-map hydration, the
+``from_attributes`` validation of every ``DealResponse`` and FastAPI's second
+pass over ``response_model``. The output is byte-identical to what FastAPI
+renders for the same schemas:
+
+- keys follow ``DealResponse``'s field order (the columns are derived from it)
+- strings are stripped, as ``str_strip_whitespace`` does on validation
+- prices and counts are coerced to ``float``/``int`` as validation does, since
+  neither encoder accepts the ``Decimal`` a ``NUMERIC`` column or driver returns
+- datetimes use Pydantic's ISO format, with ``Z`` for UTC
+
+Bodies are encoded with orjson when it is installed, otherwise with
+``http_cache.dump_json``. Both match Pydantic's output for finite prices in
+the usual range (1e-4 to 1e16, where every encoder uses the shortest repr).
+"""
+
+from collections.abc import Iterable, Sequence
+from datetime import datetime
+from typing import Any
+
+from fastapi import Response
+
+from app import models, schemas
+from app.services.http_cache import dump_json
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+DEAL_FIELDS = tuple(schemas.DealResponse.model_fields)
+DEAL_COLUMNS = tuple(getattr(models.Deal, name) for name in DEAL_FIELDS)
+
+_STRING_FIELDS = frozenset(
+    index for index, field in enumerate(schemas.DealResponse.model_fields.values()) if field.annotation is str
+)
+_FLOAT_FIELDS = frozenset(
+    index for index, field in enumerate(schemas.DealResponse.model_fields.values()) if field.annotation is float
+)
+_INT_FIELDS = frozenset(
+    index for index, field in enumerate(schemas.DealResponse.model_fields.values()) if field.annotation is int
+)
+_DATETIME_FIELDS = frozenset(
+    index for index, field in enumerate(schemas.DealResponse.model_fields.values()) if field.annotation is datetime
+)
+
+
+def format_datetime(value: datetime) -> str:
+    text = value.isoformat()
+    return text[:-6] + "Z" if text.endswith("+00:00") else text
+
+
+def deal_dict(row: Sequence[Any]) -> dict[str, Any]:
+    """JSON-ready dict of one ``DEAL_COLUMNS`` row (extra trailing columns are ignored)."""
+    item = {}
+    for index, name in enumerate(DEAL_FIELDS):
+        value = row[index]
+        if index in _STRING_FIELDS:
+            value = value.strip()
+        elif index in _FLOAT_FIELDS:
+            value = float(value)
+        elif index in _INT_FIELDS:
+            value = int(value)
+        elif index in _DATETIME_FIELDS:
+            value = format_datetime(value)
+        item[name] = value
+    return item
+
+
+def deal_dicts(rows: Iterable[Sequence[Any]]) -> list[dict[str, Any]]:
+    return [deal_dict(row) for row in rows]
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content)
+    return dump_json(content)
+
+
+def json_response(content: Any, response: Response | None = None) -> Response:
+    """Encode ``content`` once; carries over headers set on the injected ``response``."""
+    encoded = Response(content=dumps(content), media_type="application/json")
+    if response is not None:
+        encoded.headers.raw.extend(response.headers.raw)
+    return encoded
@@ -0,0 +1,53 @@
+"""Relevance-ranked text matching for the deal search endpoint.
+
+Every whitespace-separated term of ``q`` must appear in the title
+(case-insensitive substring, so "air" also matches "AirPods"). On PostgreSQL
+those ``ILIKE '%term%'`` predicates are served by the ``ix_deals_title_trgm``
+pg_trgm GIN index instead of a sequential scan. SQLite has no trigram index
+but evaluates the same expressions, so local runs return identical results.
+
+Matches are ranked with a portable integer score:
+- 3: the title starts with the whole phrase
+- 2: the phrase starts a word somewhere in the title
+- 1: every term appears somewhere in the title
+"""
+
+from sqlalchemy import case
+from sqlalchemy.orm import Query
+from sqlalchemy.sql.elements import ColumnElement
+
+from app import models
+
+LIKE_ESCAPE = "\\"
+# Every score ``relevance`` can produce
+RELEVANCE_TIERS = range(1, 4)
+
+
+def _escape_like(value: str) -> str:
+    return (
+        value.replace(LIKE_ESCAPE, LIKE_ESCAPE * 2)
+        .replace("%", f"{LIKE_ESCAPE}%")
+        .replace("_", f"{LIKE_ESCAPE}_")
+    )
+
+
+def tokenize(q: str) -> list[str]:
+    """Split a search string into distinct lowercase terms, preserving order."""
+    return list(dict.fromkeys(q.lower().split()))
+
+
+def relevance(q: str) -> ColumnElement[int]:
+    """Integer relevance of a deal title for ``q`` (higher is better)."""
+    phrase = _escape_like(" ".join(tokenize(q)))
+    return case(
+        (models.Deal.title.ilike(f"{phrase}%", escape=LIKE_ESCAPE), 3),
+        (models.Deal.title.ilike(f"% {phrase}%", escape=LIKE_ESCAPE), 2),
+        else_=1,
+    )
+
+
+def filter_text(query: Query, q: str) -> Query:
+    """Restrict ``query`` to deals whose title contains every term of ``q``."""
+    for term in tokenize(q):
+        query = query.filter(models.Deal.title.ilike(f"%{_escape_like(term)}%", escape=LIKE_ESCAPE))
+    return query
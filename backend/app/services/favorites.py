@@ -0,0 +1,89 @@
+"""Set-based favorite writes and the ids-only favorite listing.
+
+Bulk adds are one ``INSERT ... SELECT ... ON CONFLICT DO NOTHING`` against
+``uq_device_favorite_deal``: the SELECT drops ids that are not deals and the
+conflict clause drops ones already favorited, so neither needs a lookup first.
+Bulk removes are one ``DELETE ... WHERE deal_id IN (...)``. Both return the
+ids they actually changed.
+
+Listing ids walks ``ix_favorite_deals_device_created_deal`` (device_id,
+created_at DESC, deal_id DESC): a page is one ordered range of that index, so
+its cost does not grow with the number of favorites. The index holds every
+selected column, so PostgreSQL can answer from it alone (an index-only scan)
+where the visibility map is current, and visits the heap otherwise.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import String, delete, literal, select, tuple_
+from sqlalchemy.orm import Session
+
+from app import models
+from app.services.deal_ingest import dialect_insert
+
+# (created_at, deal_id) of the last favorite on a page
+FavoriteKey = tuple[datetime, int]
+
+
+def add_many(db: Session, device_id: str, deal_ids: list[int]) -> list[int]:
+    """Favorite every existing deal in ``deal_ids``; returns the ids newly added."""
+    table = models.FavoriteDeal.__table__
+    source = select(literal(device_id, type_=table.c.device_id.type), models.Deal.id).where(
+        models.Deal.id.in_(set(deal_ids))
+    )
+    stmt = (
+        dialect_insert(db)(table)
+        .from_select(["device_id", "deal_id"], source)
+        .on_conflict_do_nothing(index_elements=[table.c.device_id, table.c.deal_id])
+        .returning(table.c.deal_id)
+    )
+    return sorted(db.scalars(stmt))
+
+
+def remove_many(db: Session, device_id: str, deal_ids: list[int]) -> list[int]:
+    """Unfavorite ``deal_ids``; returns the ids that were actually removed."""
+    table = models.FavoriteDeal.__table__
+    stmt = (
+        delete(table)
+        .where(table.c.device_id == device_id, table.c.deal_id.in_(set(deal_ids)))
+        .returning(table.c.deal_id)
+    )
+    return sorted(db.scalars(stmt))
+
+
+def _stored_created_at(db: Session, value: datetime):
+    """``value`` as the database compares it against stored ``created_at`` values.
+
+    SQLite keeps timestamps as text, and the ``CURRENT_TIMESTAMP`` default
+    writes ``YYYY-MM-DD HH:MM:SS`` while a bound datetime renders with
+    microseconds; compared as text, a tie would sort before the cursor and its
+    page would repeat forever. Bind the stored form there instead.
+    """
+    if db.get_bind().dialect.name != "sqlite":
+        return value
+    text = value.strftime("%Y-%m-%d %H:%M:%S")
+    if value.microsecond:
+        text += f".{value.microsecond:06d}"
+    return literal(text, String)
+
+
+def list_ids(
+    db: Session,
+    device_id: str,
+    limit: int | None = None,
+    after: FavoriteKey | None = None,
+) -> list[tuple[int, datetime]]:
+    """(deal_id, created_at) of the device's favorites, newest first, after ``after``."""
+    query = select(models.FavoriteDeal.deal_id, models.FavoriteDeal.created_at).where(
+        models.FavoriteDeal.device_id == device_id
+    )
+    if after is not None:
+        created_at, deal_id = after
+        query = query.where(
+            tuple_(models.FavoriteDeal.created_at, models.FavoriteDeal.deal_id)
+            < tuple_(_stored_created_at(db, created_at), deal_id)
+        )
+    query = query.order_by(models.FavoriteDeal.created_at.desc(), models.FavoriteDeal.deal_id.desc())
+    if limit is not None:
+        query = query.limit(limit)
+    return [(deal_id, created_at) for deal_id, created_at in db.execute(query)]
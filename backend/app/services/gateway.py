@@ -0,0 +1,319 @@
+"""Shared HTTP client for the Appifex LLM gateway.
+
+One pooled ``httpx.AsyncClient`` is created lazily and reused by every
+refresh, so keep-alive connections (and their TLS sessions) survive between
+requests instead of being re-established per call. Refresh routes are
+``async def`` and await the gateway on the event loop, so a slow completion
+does not hold a threadpool thread. The client belongs to the event loop that
+first uses it and is closed from the app's shutdown hook.
+
+Configuration (all optional, read on first use):
+- GATEWAY_CONNECT_TIMEOUT: seconds to establish a connection (default 5)
+- GATEWAY_READ_TIMEOUT: seconds to wait between response bytes (default 30)
+- GATEWAY_TOTAL_TIMEOUT: hard deadline for a whole gateway call (default 35)
+- GATEWAY_MAX_CONNECTIONS / GATEWAY_MAX_KEEPALIVE: pool sizing (default 20 / 10)
+- GATEWAY_HTTP2: negotiate HTTP/2 (default true; needs ``h2``, from ``httpx[http2]``)
+
+Successful gateway results are cached by normalized prompt parameters:
+- GATEWAY_CACHE_TTL: seconds a cached result stays fresh (default 300, 0 disables)
+- GATEWAY_CACHE_MAX_ENTRIES: LRU bound on cached prompts (default 256)
+- GATEWAY_CACHE_STORE: persist entries across cold starts in the ``database``
+  (the cache_entries table) or a ``file``; unset keeps them in memory only
+- GATEWAY_CACHE_PATH: the JSON file for the ``file`` store (setting it alone selects it)
+- GATEWAY_CACHE_FLUSH_INTERVAL: seconds between batched store writes; 0 writes
+  every change through before the request goes on (default 0 on the serverless
+  engine profile, where a frozen instance never runs a background write, else 1)
+
+Concurrent identical calls are coalesced and distinct calls are capped:
+- GATEWAY_MAX_CONCURRENT: outstanding gateway calls per process (default 8)
+- GATEWAY_MAX_QUEUED: calls allowed to wait for a slot before 429s (default 32)
+- GATEWAY_QUEUE_TIMEOUT: seconds a queued call waits for a slot (default 10)
+
+Calls go through a circuit breaker whose timeout adapts to observed latency:
+- GATEWAY_BREAKER_FAILURES: consecutive failures that open the circuit (default 5)
+- GATEWAY_BREAKER_RESET: seconds before a half-open trial call (default 30)
+- GATEWAY_MIN_TIMEOUT: lower bound for the adaptive timeout (default 3)
+- GATEWAY_TIMEOUT_P95_MULTIPLIER: adaptive timeout = p95 latency x this (default 2)
+
+Fan-out refreshes split one request into per-category/marketplace calls:
+- GATEWAY_FANOUT_WORKERS: fan-out calls one refresh runs concurrently (default 6)
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections.abc import AsyncIterator
+
+import httpx
+
+from app import database
+from app.services.cache_store import DatabaseCacheStore
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.single_flight import SingleFlight
+from app.services.ttl_cache import CacheStore, JSONFileStore, TTLCache
+
+logger = logging.getLogger(__name__)
+
+GATEWAY_URL = os.environ.get(
+    "GATEWAY_URL", "https://appifex-gateway.appifex-ai.workers.dev"
+)
+
+_client: httpx.AsyncClient | None = None
+_client_lock = threading.Lock()
+_cache: TTLCache | None = None
+_single_flight: SingleFlight | None = None
+_breaker: CircuitBreaker | None = None
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def _http2_requested() -> bool:
+    return os.getenv("GATEWAY_HTTP2", "true").lower() in ("1", "true", "yes")
+
+
+def _h2_installed() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _http2_enabled() -> bool:
+    return _http2_requested() and _h2_installed()
+
+
+def check_http2() -> None:
+    """Warn when HTTP/2 is requested but ``h2`` is missing (app startup hook)."""
+    if _http2_requested() and not _h2_installed():
+        logger.warning("h2 not installed (install httpx[http2]), gateway client will use HTTP/1.1")
+
+
+def total_timeout() -> float:
+    """Hard deadline in seconds for one gateway call, including the body read."""
+    return _env_float("GATEWAY_TOTAL_TIMEOUT", 35.0)
+
+
+def build_timeout(total: float | None = None) -> httpx.Timeout:
+    """Per-phase timeouts, with every phase capped by the total deadline."""
+    total = total_timeout() if total is None else total
+    return httpx.Timeout(
+        total,
+        connect=min(_env_float("GATEWAY_CONNECT_TIMEOUT", 5.0), total),
+        read=min(_env_float("GATEWAY_READ_TIMEOUT", 30.0), total),
+    )
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the shared gateway client, creating it on first use."""
+    global _client
+
+    if _client is not None:
+        return _client
+
+    with _client_lock:
+        if _client is None:
+            _client = httpx.AsyncClient(
+                base_url=GATEWAY_URL,
+                timeout=build_timeout(),
+                limits=httpx.Limits(
+                    max_connections=_env_int("GATEWAY_MAX_CONNECTIONS", 20),
+                    max_keepalive_connections=_env_int("GATEWAY_MAX_KEEPALIVE", 10),
+                    keepalive_expiry=30.0,
+                ),
+                http2=_http2_enabled(),
+            )
+    return _client
+
+
+def fanout_workers() -> int:
+    """How many shard calls one fan-out refresh awaits at a time."""
+    return max(1, _env_int("GATEWAY_FANOUT_WORKERS", 6))
+
+
+async def close_client() -> None:
+    """Close the shared client and its pooled connections (app shutdown hook).
+
+    Also writes the cache's pending changes to its store.
+    """
+    global _client
+
+    if _cache is not None:
+        _cache.close()
+
+    with _client_lock:
+        client, _client = _client, None
+    if client is not None:
+        await client.aclose()
+
+
+async def post_json(path: str, payload: dict, headers: dict, total: float | None = None) -> httpx.Response:
+    """POST ``payload`` and read the full body within the total deadline.
+
+    httpx only bounds individual phases, so the body is streamed and the
+    deadline is checked between chunks; a slow-dripping response cannot hold
+    the request past ``total`` seconds.
+    """
+    total = total_timeout() if total is None else total
+    deadline = time.monotonic() + total
+
+    async with get_client().stream(
+        "POST", path, json=payload, headers=headers, timeout=build_timeout(total)
+    ) as response:
+        raw_chunks = []
+        async for chunk in response.aiter_raw():
+            raw_chunks.append(chunk)
+            if time.monotonic() > deadline:
+                raise httpx.ReadTimeout(
+                    f"Gateway call exceeded total timeout of {total}s", request=response.request
+                )
+
+    # Rebuild a fully-read response; content decoding happens once, here.
+    return httpx.Response(
+        response.status_code,
+        headers=response.headers,
+        content=b"".join(raw_chunks),
+        request=response.request,
+    )
+
+
+async def stream_sse_data(
+    path: str, payload: dict, headers: dict, total: float | None = None
+) -> AsyncIterator[str]:
+    """POST ``payload`` and yield each ``data:`` payload of the server-sent event stream.
+
+    Stops at the ``[DONE]`` sentinel. The total deadline is checked between
+    lines, as in ``post_json``, and only counts time spent waiting on the
+    gateway: it is pushed back by however long the consumer holds each item.
+    """
+    total = total_timeout() if total is None else total
+    deadline = time.monotonic() + total
+
+    async with get_client().stream(
+        "POST", path, json=payload, headers=headers, timeout=build_timeout(total)
+    ) as response:
+        if response.status_code != 200:
+            raise httpx.HTTPStatusError(
+                f"Gateway returned HTTP {response.status_code}",
+                request=response.request,
+                response=response,
+            )
+        async for line in response.aiter_lines():
+            if time.monotonic() > deadline:
+                raise httpx.ReadTimeout(
+                    f"Gateway stream exceeded total timeout of {total}s", request=response.request
+                )
+            if not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                return
+            handed_off = time.monotonic()
+            yield data
+            deadline += time.monotonic() - handed_off
+
+
+def get_cache() -> TTLCache:
+    """Return the gateway result cache, creating it on first use."""
+    global _cache
+
+    if _cache is not None:
+        return _cache
+
+    with _client_lock:
+        if _cache is None:
+            _cache = TTLCache(
+                ttl_seconds=_env_float("GATEWAY_CACHE_TTL", 300.0),
+                max_entries=_env_int("GATEWAY_CACHE_MAX_ENTRIES", 256),
+                store=_cache_store(),
+                flush_interval=_env_float(
+                    "GATEWAY_CACHE_FLUSH_INTERVAL", 0.0 if database.engine_profile() == "serverless" else 1.0
+                ),
+            )
+    return _cache
+
+
+def _cache_store() -> CacheStore | None:
+    path = os.getenv("GATEWAY_CACHE_PATH")
+    kind = (os.getenv("GATEWAY_CACHE_STORE") or ("file" if path else "")).lower()
+    if kind == "database":
+        return DatabaseCacheStore("gateway")
+    if kind == "file":
+        if not path:
+            raise ValueError("GATEWAY_CACHE_STORE=file needs GATEWAY_CACHE_PATH")
+        return JSONFileStore(path)
+    if kind:
+        raise ValueError(f"Invalid GATEWAY_CACHE_STORE: '{kind}'. Must be 'database' or 'file'.")
+    return None
+
+
+def get_single_flight() -> SingleFlight:
+    """Return the process-wide gateway call coordinator, creating it on first use."""
+    global _single_flight
+
+    if _single_flight is not None:
+        return _single_flight
+
+    with _client_lock:
+        if _single_flight is None:
+            _single_flight = SingleFlight(
+                max_concurrent=_env_int("GATEWAY_MAX_CONCURRENT", 8),
+                max_queued=_env_int("GATEWAY_MAX_QUEUED", 32),
+                queue_timeout=_env_float("GATEWAY_QUEUE_TIMEOUT", 10.0),
+            )
+    return _single_flight
+
+
+def get_breaker() -> CircuitBreaker:
+    """Return the process-wide gateway circuit breaker, creating it on first use."""
+    global _breaker
+
+    if _breaker is not None:
+        return _breaker
+
+    with _client_lock:
+        if _breaker is None:
+            _breaker = CircuitBreaker(
+                failure_threshold=_env_int("GATEWAY_BREAKER_FAILURES", 5),
+                reset_timeout=_env_float("GATEWAY_BREAKER_RESET", 30.0),
+                min_timeout=_env_float("GATEWAY_MIN_TIMEOUT", 3.0),
+                max_timeout=total_timeout(),
+                timeout_multiplier=_env_float("GATEWAY_TIMEOUT_P95_MULTIPLIER", 2.0),
+            )
+    return _breaker
+
+
+def cache_enabled() -> bool:
+    return get_cache().ttl_seconds > 0
+
+
+def _normalize_names(names: list[str]) -> list[str]:
+    return sorted({name.strip().lower() for name in names if name.strip()})
+
+
+def cache_key(
+    query: str | None,
+    categories: list[str],
+    limit: int,
+    marketplaces: list[str] | None = None,
+) -> str:
+    """Normalize refresh parameters so equivalent prompts share one cache entry."""
+    normalized_query = " ".join((query or "").lower().split())
+    return json.dumps(
+        [
+            normalized_query,
+            _normalize_names(categories),
+            limit,
+            _normalize_names(marketplaces or []),
+        ]
+    )
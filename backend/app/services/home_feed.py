@@ -0,0 +1,74 @@
+"""Concurrent loaders for the aggregated home feed.
+
+``GET /deals/feed/{device_id}`` answers the home screen's bootstrap in one
+round trip. The deal search runs on the request's session while the favorite
+ids and the category list load on this module's pool, each with its own
+session (sessions are not thread-safe) on the same replica-or-primary routing
+as the request's reads. The category list is normally served
+from ``category_counts`` without touching the database at all.
+
+- FEED_WORKERS: threads shared by all feed requests (default 8)
+"""
+
+import os
+import threading
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from app.database import read_session
+from app.services import category_counts, favorites
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Return the feed worker pool, creating it on first use."""
+    global _executor
+
+    if _executor is not None:
+        return _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=int(os.getenv("FEED_WORKERS") or 8),
+                thread_name_prefix="home-feed",
+            )
+    return _executor
+
+
+def close_executor() -> None:
+    """Shut the pool down (app shutdown hook)."""
+    global _executor
+
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def _with_session(fn: Callable[[Session], Any], device_id: str | None = None) -> Any:
+    db = read_session(device_id)
+    try:
+        return fn(db)
+    finally:
+        db.close()
+
+
+def favorite_deal_ids(db: Session, device_id: str) -> list[int]:
+    """Ids of the device's favorited deals, newest first, without loading the deals."""
+    return [deal_id for deal_id, _ in favorites.list_ids(db, device_id)]
+
+
+def submit_favorite_deal_ids(device_id: str):
+    return get_executor().submit(_with_session, lambda db: favorite_deal_ids(db, device_id), device_id)
+
+
+def submit_categories(deals_version: int):
+    return get_executor().submit(
+        _with_session, lambda db: category_counts.get_snapshot(db, deals_version).categories
+    )
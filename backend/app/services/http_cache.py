@@ -0,0 +1,68 @@
+"""Conditional-GET helpers: ETags, Cache-Control and 304 responses.
+
+Cache-Control is configured per route with ``CACHE_CONTROL_<ROUTE>``
+environment variables (e.g. ``CACHE_CONTROL_DEALS="public, max-age=30"``).
+Per-device routes default to ``private, no-cache``: clients keep the body but
+revalidate it every time, which the version-based ETags make nearly free.
+"""
+
+import hashlib
+import json
+import os
+from typing import Any
+
+from fastapi import Request, Response
+
+
+DEFAULT_CACHE_CONTROL = {
+    "deals": "public, max-age=15, stale-while-revalidate=60",
+    "categories": "public, max-age=60, stale-while-revalidate=300",
+}
+PRIVATE_CACHE_CONTROL = "private, no-cache"
+
+
+def cache_control(route: str) -> str:
+    """Cache-Control policy for ``route``, overridable with ``CACHE_CONTROL_<ROUTE>``."""
+    return os.getenv(f"CACHE_CONTROL_{route.upper()}") or DEFAULT_CACHE_CONTROL.get(
+        route, PRIVATE_CACHE_CONTROL
+    )
+
+
+def dump_json(content: Any) -> bytes:
+    """Serialize exactly like FastAPI's ``JSONResponse`` so cached bodies are byte-identical."""
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def etag_for(body: bytes) -> str:
+    """Strong ETag derived from the body, so every process agrees on it."""
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """True when ``If-None-Match`` lists ``etag`` (weak comparison, as RFC 9110 requires for GET)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = {value.strip().removeprefix("W/") for value in header.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+
+def set_cache_headers(response: Response, etag: str, cache_control: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+
+
+def cached_json_response(request: Request, body: bytes, etag: str, cache_control: str) -> Response:
+    """Return ``body`` as JSON, or an empty 304 when the client already holds ``etag``."""
+    if etag_matches(request, etag):
+        return not_modified(etag, cache_control)
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,60 @@
+"""Incremental extraction of objects from a JSON array that arrives in pieces."""
+
+import json
+
+
+class ArrayItemParser:
+    """Yield each JSON object that is a direct element of an array, as soon as it closes.
+
+    Text is fed in arbitrary fragments (e.g. LLM completion deltas). Both a bare
+    top-level array and an array nested in a wrapper object such as
+    ``{"deals": [...]}`` work; text outside arrays (markdown fences, scalar
+    wrapper keys) is skipped. Objects that fail to parse are dropped.
+    """
+
+    def __init__(self) -> None:
+        self._stack: list[str] = []
+        self._in_string = False
+        self._escaped = False
+        self._item_depth: int | None = None
+        self._buffer: list[str] = []
+
+    def feed(self, text: str) -> list[dict]:
+        items: list[dict] = []
+        for char in text:
+            if self._item_depth is not None:
+                self._buffer.append(char)
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in "[{":
+                if char == "{" and self._item_depth is None and self._stack and self._stack[-1] == "[":
+                    self._item_depth = len(self._stack)
+                    self._buffer = ["{"]
+                self._stack.append(char)
+            elif char in "]}":
+                if self._stack:
+                    self._stack.pop()
+                if char == "}" and self._item_depth is not None and len(self._stack) == self._item_depth:
+                    item = self._parse_buffer()
+                    if item is not None:
+                        items.append(item)
+                    self._item_depth = None
+                    self._buffer = []
+        return items
+
+    def _parse_buffer(self) -> dict | None:
+        try:
+            item = json.loads("".join(self._buffer))
+        except ValueError:
+            return None
+        return item if isinstance(item, dict) else None
@@ -0,0 +1,45 @@
+"""Opaque keyset-pagination cursors.
+
+A cursor is the sort key of the last row a client has seen, JSON-encoded and
+base64url-wrapped so clients treat it as an opaque token.
+"""
+
+import base64
+import binascii
+import json
+from collections.abc import Sequence
+
+
+def encode_cursor(values: list) -> str:
+    raw = json.dumps(values, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, shape: Sequence[type | range]) -> list:
+    """Decode a cursor, raising ValueError if it is malformed or of the wrong shape.
+
+    ``shape`` gives the expected type of each value in order; a ``range``
+    stands for an int that must lie within it. Anything else would only fail
+    later, as a driver error while binding the keyset comparison.
+    """
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (binascii.Error, UnicodeError, ValueError) as exc:
+        raise ValueError("Malformed cursor") from exc
+
+    if not isinstance(values, list) or len(values) != len(shape):
+        raise ValueError("Cursor does not match this query")
+    for value, expected in zip(values, shape):
+        if not _matches(value, expected):
+            raise ValueError("Cursor does not match this query")
+    return values
+
+
+def _matches(value: object, expected: type | range) -> bool:
+    # bool is an int subclass, but never a valid sort key here
+    if isinstance(value, bool):
+        return False
+    if isinstance(expected, range):
+        return isinstance(value, int) and value in expected
+    return isinstance(value, expected)
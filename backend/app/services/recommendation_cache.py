@@ -0,0 +1,165 @@
+"""Per-device cache of recommendation responses with version-based invalidation.
+
+A device's recommendations only depend on its interests, its favorites and
+the active catalog, so every cache key embeds the ``change_versions`` counters
+of exactly those scopes:
+
+    <device_id>:<deals version>:<interests version>:<favorites version>
+
+The counters are bumped in the same transaction as the writes they track, so
+any write, from any process, moves the device to a new key. Stale entries
+simply stop being addressed and age out through TTL/LRU eviction, so
+invalidation never has to scan.
+
+Configuration (all optional, read on first use):
+- RECOMMENDATION_CACHE_BACKEND: ``memory`` (default) or ``redis``
+- RECOMMENDATION_CACHE_TTL: seconds an entry stays fresh (default 300, 0 disables)
+- RECOMMENDATION_CACHE_MAX_ENTRIES: LRU bound for the memory backend (default 10000)
+- REDIS_URL: Redis-compatible server for the ``redis`` backend (default
+  redis://localhost:6379/0). Entries are then shared by every process; LRU
+  eviction is left to the server's ``maxmemory-policy``. Falls back to ``memory`` when the ``redis`` package is
+  not installed.
+- REDIS_TIMEOUT: connect/read timeout in seconds for the ``redis`` backend
+  (default 0.5). Server errors and timeouts are logged and treated as misses
+  (reads) or skipped (writes), so an unreachable server only costs cache hits.
+"""
+
+import json
+import logging
+import os
+import threading
+from typing import Any
+
+from app.services.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "recs:"
+
+
+class MemoryBackend:
+    """In-process entries (``TTLCache``)."""
+
+    name = "memory"
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self._entries = TTLCache(ttl_seconds=ttl_seconds, max_entries=max_entries)
+
+    def get(self, key: str) -> Any | None:
+        return self._entries.get(key)
+
+    def set(self, key: str, value: Any) -> None:
+        self._entries.set(key, value)
+
+    def stats(self) -> dict:
+        return self._entries.stats()
+
+
+class RedisBackend:
+    """Entries in a Redis-compatible server."""
+
+    name = "redis"
+
+    def __init__(self, url: str, ttl_seconds: float):
+        import redis
+
+        self.ttl_seconds = ttl_seconds
+        timeout = float(os.getenv("REDIS_TIMEOUT") or 0.5)
+        self._client = redis.Redis.from_url(url, socket_timeout=timeout, socket_connect_timeout=timeout)
+        self._errors = redis.RedisError
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def get(self, key: str) -> Any | None:
+        try:
+            raw = self._client.get(KEY_PREFIX + key)
+        except self._errors as exc:
+            # An unreachable cache is a miss, never a failed request
+            logger.warning(f"Recommendation cache read failed: {exc}")
+            raw = None
+            with self._lock:
+                self.errors += 1
+        with self._lock:
+            if raw is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(raw)
+
+    def set(self, key: str, value: Any) -> None:
+        try:
+            self._client.set(KEY_PREFIX + key, json.dumps(value), ex=max(1, int(self.ttl_seconds)))
+        except self._errors as exc:
+            logger.warning(f"Recommendation cache write failed: {exc}")
+            with self._lock:
+                self.errors += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "errors": self.errors,
+            }
+
+
+_backend: MemoryBackend | RedisBackend | None = None
+_backend_lock = threading.Lock()
+
+
+def _build_backend() -> MemoryBackend | RedisBackend:
+    ttl_seconds = float(os.getenv("RECOMMENDATION_CACHE_TTL") or 300.0)
+    if os.getenv("RECOMMENDATION_CACHE_BACKEND", "memory").lower() == "redis":
+        try:
+            return RedisBackend(os.getenv("REDIS_URL", "redis://localhost:6379/0"), ttl_seconds)
+        except ImportError:
+            logger.warning("redis not installed, using the in-process recommendation cache")
+    return MemoryBackend(
+        ttl_seconds=ttl_seconds,
+        max_entries=int(os.getenv("RECOMMENDATION_CACHE_MAX_ENTRIES") or 10000),
+    )
+
+
+def get_backend() -> MemoryBackend | RedisBackend:
+    """Return the configured cache backend, creating it on first use."""
+    global _backend
+
+    if _backend is not None:
+        return _backend
+
+    with _backend_lock:
+        if _backend is None:
+            _backend = _build_backend()
+    return _backend
+
+
+def enabled() -> bool:
+    return get_backend().ttl_seconds > 0
+
+
+def key_for(device_id: str, versions: list[int]) -> str:
+    """Cache key for the device's inputs at ``versions``.
+
+    Read the versions before computing so a result is stored under the versions
+    it was computed from, never under ones bumped while it was being computed.
+    """
+    return ":".join([device_id, *(str(version) for version in versions)])
+
+
+def lookup(key: str) -> Any | None:
+    return get_backend().get(key)
+
+
+def store(key: str, value: Any) -> None:
+    get_backend().set(key, value)
+
+
+def stats() -> dict:
+    backend = get_backend()
+    return {"backend": backend.name, **backend.stats()}
@@ -0,0 +1,360 @@
+"""In-memory recommendation index over the active deal catalog.
+
+Scoring is the original ``get_recommendations`` formula, per active deal:
+
+    discount_percent
+    + 15 * priority   for each interest whose category equals the deal's (case-insensitive)
+    + 10 * priority   for each interest whose keyword is a substring of the title (case-insensitive)
+    + 18              if the deal's category is one of the device's favorite categories
+
+Rather than looping deals x interests, the index keeps postings from
+lowercased category, exact category and title trigram to deal ids. Only deals
+reached through a posting can score above their discount. All other deals
+are ranked by discount alone and read from per-discount buckets, and the top K
+is chosen with a bounded heap. Ties are broken by ascending deal id.
+
+The index is built from a column-only query, updated in place from refresh
+results, and rebuilt after ``RECOMMENDATION_INDEX_TTL`` seconds (default 300)
+so writes made by other processes are picked up. Callers that know the
+shared ``deals`` change counter pass it in, and an index built before that
+version is rebuilt right away.
+
+``RECOMMENDATION_BACKEND=numpy`` scores with the vectorized backend in
+``recommendations_numpy`` instead (requires numpy; falls back to the index
+when it is not installed). Both backends return identical rankings.
+"""
+
+import heapq
+import logging
+import os
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app import models, schemas
+from app.services import change_versions
+
+logger = logging.getLogger(__name__)
+
+TOP_K = 12
+CATEGORY_WEIGHT = 15
+KEYWORD_WEIGHT = 10
+FAVORITE_CATEGORY_BONUS = 18
+NGRAM = 3
+
+
+@dataclass(frozen=True)
+class IndexedDeal:
+    id: int
+    title_lower: str
+    category: str
+    category_lower: str
+    discount_percent: int
+
+
+@dataclass(frozen=True)
+class InterestWeight:
+    category: str
+    keyword: str
+    priority: int
+
+
+def _trigrams(text: str) -> set[str]:
+    return {text[i : i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+
+def _add_posting(postings: dict, key, deal_id: int) -> None:
+    postings.setdefault(key, set()).add(deal_id)
+
+
+def _remove_posting(postings: dict, key, deal_id: int) -> None:
+    bucket = postings.get(key)
+    if bucket is not None:
+        bucket.discard(deal_id)
+        if not bucket:
+            del postings[key]
+
+
+class RecommendationIndex:
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._deals: dict[int, IndexedDeal] = {}
+        self._by_category_lower: dict[str, set[int]] = {}
+        self._by_category: dict[str, set[int]] = {}
+        self._by_trigram: dict[str, set[int]] = {}
+        self._by_discount: dict[int, set[int]] = {}
+        self._sorted_buckets: dict[int, list[int]] = {}
+        self.built_at = time.monotonic()
+        # Bumped on every mutation so derived structures know when to rebuild
+        self.version = 0
+        # The ``deals`` change counter this index reflects, when known
+        self.deals_version: int | None = None
+
+    def __len__(self) -> int:
+        return len(self._deals)
+
+    def upsert(self, deal_id: int, title: str, category: str, discount_percent: int, is_active: bool = True) -> None:
+        """Insert, update or (when inactive) drop one deal."""
+        with self._lock:
+            self.version += 1
+            self._remove(deal_id)
+            if not is_active:
+                return
+
+            entry = IndexedDeal(
+                id=deal_id,
+                title_lower=title.lower(),
+                category=category,
+                category_lower=category.lower(),
+                discount_percent=discount_percent,
+            )
+            self._deals[deal_id] = entry
+            _add_posting(self._by_category_lower, entry.category_lower, deal_id)
+            _add_posting(self._by_category, entry.category, deal_id)
+            _add_posting(self._by_discount, entry.discount_percent, deal_id)
+            self._sorted_buckets.pop(entry.discount_percent, None)
+            for gram in _trigrams(entry.title_lower):
+                _add_posting(self._by_trigram, gram, deal_id)
+
+    def remove(self, deal_id: int) -> None:
+        with self._lock:
+            self.version += 1
+            self._remove(deal_id)
+
+    def snapshot(self) -> tuple[int, list[IndexedDeal]]:
+        """Consistent (version, deals ordered by id) copy for derived backends."""
+        with self._lock:
+            return self.version, sorted(self._deals.values(), key=lambda entry: entry.id)
+
+    def _remove(self, deal_id: int) -> None:
+        entry = self._deals.pop(deal_id, None)
+        if entry is None:
+            return
+        _remove_posting(self._by_category_lower, entry.category_lower, deal_id)
+        _remove_posting(self._by_category, entry.category, deal_id)
+        _remove_posting(self._by_discount, entry.discount_percent, deal_id)
+        self._sorted_buckets.pop(entry.discount_percent, None)
+        for gram in _trigrams(entry.title_lower):
+            _remove_posting(self._by_trigram, gram, deal_id)
+
+    def keyword_matches(self, keyword_lower: str) -> set[int]:
+        """Ids of deals whose lowercased title contains ``keyword_lower``."""
+        with self._lock:
+            if len(keyword_lower) < NGRAM:
+                # Too short for trigram postings (and "" matches everything)
+                return {deal_id for deal_id, entry in self._deals.items() if keyword_lower in entry.title_lower}
+
+            postings = []
+            for gram in _trigrams(keyword_lower):
+                bucket = self._by_trigram.get(gram)
+                if not bucket:
+                    return set()
+                postings.append(bucket)
+            postings.sort(key=len)
+            candidates = set(postings[0]).intersection(*postings[1:])
+            return {deal_id for deal_id in candidates if keyword_lower in self._deals[deal_id].title_lower}
+
+    def recommend(
+        self,
+        interests: list[InterestWeight],
+        favorite_categories: set[str],
+        k: int = TOP_K,
+    ) -> list[int]:
+        """Return the ids of the top ``k`` deals, best first."""
+        with self._lock:
+            boosts: dict[int, int] = {}
+
+            for interest in interests:
+                category_boost = CATEGORY_WEIGHT * interest.priority
+                for deal_id in self._by_category_lower.get(interest.category.lower(), ()):
+                    boosts[deal_id] = boosts.get(deal_id, 0) + category_boost
+
+                keyword_boost = KEYWORD_WEIGHT * interest.priority
+                for deal_id in self.keyword_matches(interest.keyword.lower()):
+                    boosts[deal_id] = boosts.get(deal_id, 0) + keyword_boost
+
+            for category in favorite_categories:
+                for deal_id in self._by_category.get(category, ()):
+                    boosts[deal_id] = boosts.get(deal_id, 0) + FAVORITE_CATEGORY_BONUS
+
+            boosted = (
+                (float(self._deals[deal_id].discount_percent + boost), deal_id)
+                for deal_id, boost in boosts.items()
+            )
+            ranked = heapq.nsmallest(k, boosted, key=lambda item: (-item[0], item[1]))
+            ranked.extend(self._top_by_discount(k, exclude=boosts))
+            return [deal_id for _, deal_id in heapq.nsmallest(k, ranked, key=lambda item: (-item[0], item[1]))]
+
+    def _top_by_discount(self, k: int, exclude: dict[int, int]) -> list[tuple[float, int]]:
+        """Best ``k`` deals by discount alone (ties by id), skipping ``exclude``."""
+        picked: list[tuple[float, int]] = []
+        for discount in sorted(self._by_discount, reverse=True):
+            bucket = self._sorted_buckets.get(discount)
+            if bucket is None:
+                bucket = self._sorted_buckets[discount] = sorted(self._by_discount[discount])
+            for deal_id in bucket:
+                if deal_id in exclude:
+                    continue
+                picked.append((float(discount), deal_id))
+                if len(picked) == k:
+                    return picked
+        return picked
+
+
+_index: RecommendationIndex | None = None
+_index_lock = threading.Lock()
+
+
+def _index_ttl() -> float:
+    value = os.getenv("RECOMMENDATION_INDEX_TTL")
+    return float(value) if value else 300.0
+
+
+def build_index(db: Session) -> RecommendationIndex:
+    """Build a fresh index from the active catalog, loading only the scored columns."""
+    index = RecommendationIndex()
+    rows = db.execute(
+        select(
+            models.Deal.id,
+            models.Deal.title,
+            models.Deal.category,
+            models.Deal.discount_percent,
+        ).where(models.Deal.is_active.is_(True))
+    )
+    for deal_id, title, category, discount_percent in rows:
+        index.upsert(deal_id, title, category, discount_percent)
+    return index
+
+
+def _is_current(index: RecommendationIndex | None, deals_version: int | None) -> bool:
+    if index is None or time.monotonic() - index.built_at >= _index_ttl():
+        return False
+    # Behind the shared change counter means another process wrote deals
+    return deals_version is None or (index.deals_version is not None and index.deals_version >= deals_version)
+
+
+def current_index(deals_version: int | None = None) -> RecommendationIndex | None:
+    """The built index when it is still current for ``deals_version``; never touches the database."""
+    index = _index
+    return index if _is_current(index, deals_version) else None
+
+
+def get_index(db: Session, deals_version: int | None = None) -> RecommendationIndex:
+    """Return the process-wide index, (re)building it when missing, expired or stale."""
+    global _index
+
+    index = _index
+    if _is_current(index, deals_version):
+        return index
+
+    with _index_lock:
+        if not _is_current(_index, deals_version):
+            _index = build_index(db)
+            _index.deals_version = deals_version
+        return _index
+
+
+def get_recommender(index: RecommendationIndex):
+    """Return the configured scoring backend over ``index``; both expose ``recommend()``."""
+    if os.getenv("RECOMMENDATION_BACKEND", "index").lower() != "numpy":
+        return index
+
+    try:
+        from app.services import recommendations_numpy
+    except ImportError:
+        logger.warning("numpy not installed, using the inverted-index recommender")
+        return index
+    return recommendations_numpy.get_scorer(index)
+
+
+def load_interests(db: Session, device_ids: list[str]) -> dict[str, list[InterestWeight]]:
+    """Interests for many devices in one grouped query."""
+    interests: dict[str, list[InterestWeight]] = {device_id: [] for device_id in device_ids}
+    rows = db.execute(
+        select(
+            models.UserInterest.device_id,
+            models.UserInterest.category,
+            models.UserInterest.keyword,
+            models.UserInterest.priority,
+        ).where(models.UserInterest.device_id.in_(device_ids))
+    )
+    for device_id, category, keyword, priority in rows:
+        interests[device_id].append(InterestWeight(category=category, keyword=keyword, priority=priority))
+    return interests
+
+
+def load_favorite_categories(db: Session, device_ids: list[str]) -> dict[str, set[str]]:
+    """Distinct categories of each device's favorited deals, in one grouped query."""
+    favorites: dict[str, set[str]] = {device_id: set() for device_id in device_ids}
+    rows = db.execute(
+        select(models.FavoriteDeal.device_id, models.Deal.category)
+        .join(models.Deal, models.FavoriteDeal.deal_id == models.Deal.id)
+        .where(models.FavoriteDeal.device_id.in_(device_ids))
+        .distinct()
+    )
+    for device_id, category in rows:
+        favorites[device_id].add(category)
+    return favorites
+
+
+def iter_batch_recommendations(
+    db: Session,
+    device_ids: Iterable[str],
+    chunk_size: int = 500,
+) -> Iterator[schemas.RecommendationResponse]:
+    """Yield one recommendation response per device, in input order.
+
+    Devices are processed in chunks: interests and favorite categories take one
+    grouped query each per chunk, every device is scored against the same
+    catalog snapshot, and each recommended deal is loaded and serialized once
+    for the whole batch.
+    """
+    recommender = get_recommender(get_index(db, change_versions.current(db, change_versions.DEALS)[0]))
+    deal_cache: dict[int, schemas.DealResponse] = {}
+
+    unique_ids = list(dict.fromkeys(device_ids))
+    for start in range(0, len(unique_ids), chunk_size):
+        chunk = unique_ids[start : start + chunk_size]
+        interests = load_interests(db, chunk)
+        favorite_categories = load_favorite_categories(db, chunk)
+
+        ranked = {
+            device_id: recommender.recommend(interests[device_id], favorite_categories[device_id])
+            for device_id in chunk
+        }
+
+        missing = {deal_id for deal_ids in ranked.values() for deal_id in deal_ids} - deal_cache.keys()
+        if missing:
+            for deal in db.scalars(
+                select(models.Deal).where(models.Deal.id.in_(missing), models.Deal.is_active.is_(True))
+            ):
+                deal_cache[deal.id] = schemas.DealResponse.model_validate(deal)
+
+        for device_id in chunk:
+            yield schemas.RecommendationResponse(
+                device_id=device_id,
+                recommendations=[deal_cache[deal_id] for deal_id in ranked[device_id] if deal_id in deal_cache],
+            )
+
+
+def apply_deal_changes(
+    rows: list[tuple[int, str, str, int, bool]],
+    deals_version: int | None = None,
+) -> None:
+    """Fold committed (id, title, category, discount_percent, is_active) rows into a built index.
+
+    ``deals_version`` is the change counter the write produced. The index only
+    adopts it when it was exactly one behind; otherwise another writer got in
+    between and the next read at the newer version rebuilds it.
+    """
+    index = _index
+    if index is None:
+        return
+    for deal_id, title, category, discount_percent, is_active in rows:
+        index.upsert(deal_id, title, category, discount_percent, is_active)
+    if deals_version is not None and index.deals_version == deals_version - 1:
+        index.deals_version = deals_version
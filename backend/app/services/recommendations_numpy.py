@@ -0,0 +1,130 @@
+"""Vectorized recommendation scoring with NumPy.
+
+A columnar copy of the recommendation index holds discounts and integer codes
+for exact and lowercased categories. The scoring formula then runs as a few
+array operations per interest instead of a Python loop over deals.
+Keyword hits are cached per keyword as boolean vectors; they come from the
+index's trigram postings, so a keyword is never matched against every title.
+The top K is chosen with ``argpartition``, and ties on the boundary score are
+resolved by ascending deal id, so rankings match ``RecommendationIndex.recommend``.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from app.services.recommendations import (
+    CATEGORY_WEIGHT,
+    FAVORITE_CATEGORY_BONUS,
+    KEYWORD_WEIGHT,
+    TOP_K,
+    InterestWeight,
+    RecommendationIndex,
+)
+
+KEYWORD_CACHE_SIZE = 512
+
+
+class ColumnarScorer:
+    def __init__(self, index: RecommendationIndex):
+        self.index = index
+        self.version, deals = index.snapshot()
+
+        # Positions follow ascending deal id, so position order is the tie-break order
+        self.ids = np.fromiter((deal.id for deal in deals), dtype=np.int64, count=len(deals))
+        self.discounts = np.fromiter(
+            (deal.discount_percent for deal in deals), dtype=np.float64, count=len(deals)
+        )
+        self._category_codes: dict[str, int] = {}
+        self._category_lower_codes: dict[str, int] = {}
+        self.categories = np.fromiter(
+            (self._category_codes.setdefault(deal.category, len(self._category_codes)) for deal in deals),
+            dtype=np.int32,
+            count=len(deals),
+        )
+        self.categories_lower = np.fromiter(
+            (
+                self._category_lower_codes.setdefault(deal.category_lower, len(self._category_lower_codes))
+                for deal in deals
+            ),
+            dtype=np.int32,
+            count=len(deals),
+        )
+        self._keyword_hits: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def keyword_hits(self, keyword_lower: str) -> np.ndarray:
+        """Boolean vector of deals whose title contains ``keyword_lower``."""
+        with self._lock:
+            hits = self._keyword_hits.get(keyword_lower)
+            if hits is not None:
+                self._keyword_hits.move_to_end(keyword_lower)
+                return hits
+
+        matched = np.fromiter(self.index.keyword_matches(keyword_lower), dtype=np.int64)
+        hits = np.zeros(len(self.ids), dtype=bool)
+        if matched.size:
+            positions = np.searchsorted(self.ids, matched)
+            # Deals added to the index after this snapshot have no column here
+            in_range = positions < len(self.ids)
+            positions = positions[in_range]
+            hits[positions[self.ids[positions] == matched[in_range]]] = True
+
+        with self._lock:
+            self._keyword_hits[keyword_lower] = hits
+            while len(self._keyword_hits) > KEYWORD_CACHE_SIZE:
+                self._keyword_hits.popitem(last=False)
+        return hits
+
+    def recommend(
+        self,
+        interests: list[InterestWeight],
+        favorite_categories: set[str],
+        k: int = TOP_K,
+    ) -> list[int]:
+        count = len(self.ids)
+        if count == 0 or k <= 0:
+            return []
+
+        scores = self.discounts.copy()
+        for interest in interests:
+            code = self._category_lower_codes.get(interest.category.lower())
+            if code is not None:
+                scores += (CATEGORY_WEIGHT * interest.priority) * (self.categories_lower == code)
+            scores += (KEYWORD_WEIGHT * interest.priority) * self.keyword_hits(interest.keyword.lower())
+
+        favorite_codes = [self._category_codes[c] for c in favorite_categories if c in self._category_codes]
+        if favorite_codes:
+            scores += FAVORITE_CATEGORY_BONUS * np.isin(self.categories, favorite_codes)
+
+        if count <= k:
+            selected = np.arange(count)
+        else:
+            # Everything strictly above the k-th best score is in; the remaining
+            # places go to boundary ties in ascending id (= position) order.
+            boundary = scores[np.argpartition(-scores, k - 1)[k - 1]]
+            above = np.flatnonzero(scores > boundary)
+            ties = np.flatnonzero(scores == boundary)[: k - len(above)]
+            selected = np.concatenate([above, ties])
+
+        order = np.lexsort((selected, -scores[selected]))
+        return [int(deal_id) for deal_id in self.ids[selected[order]]]
+
+
+_scorer: ColumnarScorer | None = None
+_scorer_lock = threading.Lock()
+
+
+def get_scorer(index: RecommendationIndex) -> ColumnarScorer:
+    """Return a columnar scorer matching the index's current version."""
+    global _scorer
+
+    scorer = _scorer
+    if scorer is not None and scorer.index is index and scorer.version == index.version:
+        return scorer
+
+    with _scorer_lock:
+        if _scorer is None or _scorer.index is not index or _scorer.version != index.version:
+            _scorer = ColumnarScorer(index)
+        return _scorer
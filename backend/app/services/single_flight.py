@@ -0,0 +1,165 @@
+"""Request coalescing and admission control for gateway calls.
+
+Gateway calls are made from ``async def`` routes on the event loop, so
+callers wait on asyncio primitives: concurrent callers asking for the same
+key await the leader's result instead of issuing their own call, and a slot
+counter with a bounded wait queue caps how many distinct calls are
+outstanding at once. The counters sit behind a ``threading.Lock`` (never
+held across an await) so sync code such as the stats endpoint can read them
+from a worker thread.
+
+``do``, ``acquire`` and ``release`` must be called from the event loop.
+"""
+
+import asyncio
+import threading
+from collections import deque
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+
+class OverloadedError(Exception):
+    """Raised when the call limit and its wait queue are both full."""
+
+
+class _InFlightCall:
+    def __init__(self) -> None:
+        self.done = asyncio.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """Coalesce identical concurrent calls and bound outstanding ones.
+
+    ``max_concurrent`` calls may run at a time; up to ``max_queued`` more wait
+    for a slot (at most ``queue_timeout`` seconds) and anything beyond that is
+    rejected with ``OverloadedError``. Followers of an in-flight key never take
+    a slot, they just wait for the leader.
+    """
+
+    def __init__(self, max_concurrent: int, max_queued: int, queue_timeout: float):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self._lock = threading.Lock()
+        self._calls: dict[str, _InFlightCall] = {}
+        # Futures of callers queued for a slot, oldest first
+        self._waiters: deque[asyncio.Future] = deque()
+        self._running = 0
+        self._queued = 0
+        self.leaders = 0
+        self.coalesced = 0
+        self.rejected = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Await ``fn()`` once per key among concurrent callers and share its result."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                is_leader = False
+            else:
+                self._admit()
+                call = _InFlightCall()
+                self._calls[key] = call
+                self.leaders += 1
+                is_leader = True
+
+        if not is_leader:
+            await call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = await self._run_with_slot(fn)
+        except Exception as exc:
+            call.error = exc
+            raise
+        except BaseException:
+            # The leader's request was cancelled; its followers still get an ordinary failure
+            call.error = RuntimeError("Coalesced gateway call was cancelled")
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result
+
+    async def acquire(self) -> None:
+        """Take a call slot without coalescing, for calls that cannot share a result.
+
+        Admission and queueing work as in ``do``. Pair with ``release``.
+        """
+        with self._lock:
+            self.leaders += 1
+            self._admit()
+        await self._wait_for_slot()
+
+    def release(self) -> None:
+        with self._lock:
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                if not waiter.done():
+                    # Hand the slot straight to the oldest waiter; ``_running`` is unchanged
+                    waiter.set_result(None)
+                    return
+            self._running -= 1
+
+    def _admit(self) -> None:
+        # Called with the lock held. Reserve a queue position now so admission cannot race.
+        if self._running + self._queued >= self.max_concurrent + self.max_queued:
+            self.rejected += 1
+            raise OverloadedError("Too many gateway calls in flight")
+        self._queued += 1
+
+    async def _wait_for_slot(self) -> None:
+        with self._lock:
+            if self._running < self.max_concurrent and not self._waiters:
+                self._queued -= 1
+                self._running += 1
+                return
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+        except (TimeoutError, asyncio.CancelledError) as exc:
+            with self._lock:
+                # ``release`` may have handed the slot over just as the wait ended
+                granted = waiter.done() and not waiter.cancelled()
+                waiter.cancel()
+                self._queued -= 1
+                if not granted and isinstance(exc, TimeoutError):
+                    self.rejected += 1
+            if isinstance(exc, asyncio.CancelledError):
+                if granted:
+                    self.release()
+                raise
+            if not granted:
+                raise OverloadedError("Timed out waiting for a gateway call slot") from None
+            return
+
+        with self._lock:
+            self._queued -= 1
+
+    async def _run_with_slot(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        await self._wait_for_slot()
+        try:
+            return await fn()
+        finally:
+            self.release()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "running": self._running,
+                "queued": self._queued,
+                "max_concurrent": self.max_concurrent,
+                "max_queued": self.max_queued,
+                "leaders": self.leaders,
+                "coalesced": self.coalesced,
+                "rejected": self.rejected,
+            }
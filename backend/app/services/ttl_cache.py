@@ -0,0 +1,245 @@
+"""Thread-safe in-process cache with TTL expiry and LRU eviction."""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Protocol
+
+logger = logging.getLogger(__name__)
+
+# (key, stored_at, value) as kept by a store; stored_at is a ``time.time()`` stamp
+StoredEntry = tuple[str, float, Any]
+
+
+class CacheStore(Protocol):
+    """Where a ``TTLCache`` persists its entries across processes and cold starts."""
+
+    def load(self, limit: int) -> list[StoredEntry]:
+        """Up to ``limit`` most recently stored entries, oldest first."""
+        ...
+
+    def write(self, upserts: list[StoredEntry], deletes: list[str], cleared: bool) -> None:
+        """Apply one batch of changes; ``cleared`` means drop everything first."""
+        ...
+
+
+class JSONFileStore:
+    """Entries in one JSON file, rewritten whole on every batch.
+
+    Only survives cold starts on a filesystem that does; ``/tmp`` on a
+    serverless platform is not one (use ``DatabaseCacheStore`` there).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._entries: dict[str, tuple[float, Any]] = {}
+
+    def load(self, limit: int) -> list[StoredEntry]:
+        try:
+            with open(self.path, encoding="utf-8") as handle:
+                stored = json.load(handle)
+        except FileNotFoundError:
+            return []
+        except (OSError, ValueError) as exc:
+            logger.warning(f"Ignoring unreadable cache file {self.path}: {exc}")
+            return []
+
+        # Entries past ``limit`` are dropped from the file on the next write
+        newest = sorted(stored, key=lambda entry: entry[1])[-limit:]
+        self._entries = {key: (stored_at, value) for key, stored_at, value in newest}
+        return [(key, stored_at, value) for key, stored_at, value in newest]
+
+    def write(self, upserts: list[StoredEntry], deletes: list[str], cleared: bool) -> None:
+        if cleared:
+            self._entries.clear()
+        for key in deletes:
+            self._entries.pop(key, None)
+        for key, stored_at, value in upserts:
+            self._entries[key] = (stored_at, value)
+
+        # Write to a temp file and rename so a crash mid-write never leaves a
+        # truncated cache behind
+        snapshot = [[key, stored_at, value] for key, (stored_at, value) in self._entries.items()]
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as handle:
+            json.dump(snapshot, handle)
+        os.replace(temp_path, self.path)
+
+
+class TTLCache:
+    """Size-bounded LRU cache whose entries expire after ``ttl_seconds``.
+
+    Expiry only hides an entry from plain reads; it is kept (and counts toward
+    ``max_entries``) until overwritten or evicted, for ``allow_stale`` reads.
+
+    With a ``store``, entries are loaded from it on construction, so a fresh
+    process (e.g. a serverless cold start) starts warm. Changes are written
+    back in batches by a background thread, at most every ``flush_interval``
+    seconds and never under the cache lock, so reads and writes do not wait
+    on the store. ``flush()`` writes pending changes immediately. With a
+    ``flush_interval`` of 0 every change is written through before the call
+    returns instead, for processes that may be frozen before a background
+    write runs. Values must be JSON-serializable in that case.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float,
+        max_entries: int,
+        store: CacheStore | None = None,
+        flush_interval: float = 1.0,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.store = store
+        self.flush_interval = flush_interval
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.flushes = 0
+        self.flush_failures = 0
+        # Keys set, evicted or deleted since the last flush
+        self._dirty: set[str] = set()
+        self._cleared = False
+        self._flush_lock = threading.Lock()
+        self._flush_wanted = threading.Event()
+        self._closed = False
+        if store is not None:
+            self._load()
+        if store is not None and flush_interval > 0:
+            threading.Thread(target=self._flush_loop, name="ttl-cache-flush", daemon=True).start()
+
+    def get(self, key: str, allow_stale: bool = False) -> Any | None:
+        """Return the cached value or None. ``allow_stale`` also returns expired entries."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            stored_at, value = entry
+            if time.time() - stored_at > self.ttl_seconds:
+                if allow_stale:
+                    return value
+                # Expired entries stay until replaced or evicted, so a later
+                # ``allow_stale`` read can still fall back to them
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            self._mark_dirty(key)
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._mark_dirty(evicted)
+                self.evictions += 1
+        self._schedule_flush()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._mark_dirty(key)
+        self._schedule_flush()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._dirty.clear()
+            self._cleared = self.store is not None
+        self._schedule_flush()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "persistent": self.store is not None,
+                "pending_writes": len(self._dirty),
+                "flushes": self.flushes,
+                "flush_failures": self.flush_failures,
+            }
+
+    def flush(self) -> None:
+        """Write every pending change to the store now."""
+        if self.store is None:
+            return
+
+        # One batch at a time, so batches reach the store in order
+        with self._flush_lock:
+            with self._lock:
+                dirty, self._dirty = self._dirty, set()
+                cleared, self._cleared = self._cleared, False
+                upserts = [(key, *self._entries[key]) for key in dirty if key in self._entries]
+                deletes = [key for key in dirty if key not in self._entries]
+            if not (dirty or cleared):
+                return
+
+            try:
+                self.store.write(upserts, deletes, cleared)
+                self.flushes += 1
+            except Exception as exc:
+                logger.warning(f"Could not persist cache entries: {exc}")
+                self.flush_failures += 1
+                # Retry these keys with the next batch
+                with self._lock:
+                    self._dirty |= dirty
+                    self._cleared |= cleared
+
+    def close(self) -> None:
+        """Flush pending changes and stop the background writer."""
+        self._closed = True
+        self._flush_wanted.set()
+        self.flush()
+
+    def _mark_dirty(self, key: str) -> None:
+        # Without a store nothing ever drains the set
+        if self.store is not None:
+            self._dirty.add(key)
+
+    def _schedule_flush(self) -> None:
+        if self.store is None:
+            return
+        if self.flush_interval <= 0:
+            self.flush()
+        else:
+            self._flush_wanted.set()
+
+    def _flush_loop(self) -> None:
+        while not self._closed:
+            self._flush_wanted.wait()
+            # Let changes that arrive close together share one write
+            time.sleep(self.flush_interval)
+            self._flush_wanted.clear()
+            if not self._closed:
+                self.flush()
+
+    def _load(self) -> None:
+        try:
+            stored = self.store.load(self.max_entries)
+        except Exception as exc:
+            logger.warning(f"Could not load persisted cache entries: {exc}")
+            return
+
+        # Expired entries are loaded too, for ``allow_stale`` reads
+        for key, stored_at, value in stored:
+            self._entries[key] = (stored_at, value)
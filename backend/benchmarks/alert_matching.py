@@ -0,0 +1,120 @@
+"""Matching a refresh batch against 100k enabled alerts.
+
+Builds an ``AlertMatcher`` over synthetic alerts (no database needed): a mix
+of category alerts and one- to three-term product alerts, with random
+``min_discount`` thresholds. It then matches a batch of benchmark deals
+against them. As a baseline, the alerts x deals loop the matcher replaces is
+run on the first ``--baseline-deals`` deals, and both must fire exactly the
+same alerts there. Run from ``backend/``::
+
+    python -m benchmarks.alert_matching --alerts 100000 --deals 500
+
+The matcher's build is reported separately: it happens once per
+``ALERT_MATCHER_TTL`` (or after an alert changes), not per refresh.
+"""
+
+import argparse
+import random
+import sys
+import time
+
+from app.services.alert_matching import CATEGORY_ALERT, AlertMatcher
+from app.services.deal_search import tokenize
+from benchmarks import seed
+from benchmarks.measure import ms, print_table
+
+Alert = tuple[int, str, str, str, int]
+Deal = tuple[int, str, str, int]
+
+
+def alerts(count: int) -> list[Alert]:
+    """(id, device_id, alert_type, query, min_discount) rows; most are narrow product alerts."""
+    rng = random.Random(0)
+    vocabulary = [*seed.KEYWORDS, "vintage", "wireless", "organic", "pro"]
+    rows = []
+    for alert_id in range(1, count + 1):
+        min_discount = rng.choice([0, 0, 10, 20, 30, 50, 70])
+        if alert_id % 50 == 0:
+            rows.append((alert_id, f"device-{alert_id}", CATEGORY_ALERT, rng.choice(seed.CATEGORIES), min_discount))
+            continue
+        terms = rng.sample(vocabulary, rng.randint(1, 2))
+        if rng.random() < 0.95:
+            # A number narrows the alert to a few titles, like a model number would
+            terms.append(str(rng.randrange(100000)))
+        rows.append((alert_id, f"device-{alert_id}", "keyword", " ".join(terms), min_discount))
+    return rows
+
+
+def deals(count: int) -> list[Deal]:
+    rows = []
+    for index in range(count):
+        row = seed.deal_row(index)
+        rows.append((index + 1, row["title"], row["category"], row["discount_percent"]))
+    return rows
+
+
+def loop_match(alert_rows: list[Alert], deal: Deal) -> set[int]:
+    """Alert ids fired by ``deal``, checking every alert in turn."""
+    deal_id, title, category, discount_percent = deal
+    title_lower = title.lower()
+    fired = set()
+    for alert_id, _, alert_type, query, min_discount in alert_rows:
+        if discount_percent < min_discount:
+            continue
+        if alert_type == CATEGORY_ALERT:
+            if query.strip() and query.strip().lower() == category.lower():
+                fired.add(alert_id)
+        else:
+            terms = tokenize(query)
+            if terms and all(term in title_lower for term in terms):
+                fired.add(alert_id)
+    return fired
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.alert_matching")
+    parser.add_argument("--alerts", type=int, default=100000, help="Enabled alerts")
+    parser.add_argument("--deals", type=int, default=500, help="Deals in the refresh batch")
+    parser.add_argument("--baseline-deals", type=int, default=20, help="Deals the alerts x deals loop checks")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    alert_rows = alerts(args.alerts)
+    batch = deals(args.deals)
+
+    started = time.perf_counter()
+    matcher = AlertMatcher(alert_rows)
+    build_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    fired = [{trigger.alert_id for trigger in matcher.match(*deal)} for deal in batch]
+    match_time = time.perf_counter() - started
+
+    baseline = batch[: args.baseline_deals]
+    started = time.perf_counter()
+    expected = [loop_match(alert_rows, deal) for deal in baseline]
+    loop_time = time.perf_counter() - started
+    for deal, matched, wanted in zip(baseline, fired, expected):
+        if matched != wanted:
+            raise AssertionError(f"deal {deal[0]}: matcher fired {len(matched)} alerts, loop fired {len(wanted)}")
+
+    per_deal = match_time / len(batch) if batch else 0.0
+    loop_per_deal = loop_time / len(baseline) if baseline else 0.0
+    print(f"{len(matcher)} alerts, {len(batch)} deals, {sum(map(len, fired))} triggers")
+    print_table(
+        ["strategy", "deals", "total ms", "ms/deal"],
+        [
+            ["matcher build", "", ms(build_time), ""],
+            ["matcher", len(batch), ms(match_time), ms(per_deal)],
+            ["alerts x deals loop", len(baseline), ms(loop_time), ms(loop_per_deal)],
+        ],
+    )
+    if per_deal:
+        print(f"\nmatcher is {loop_per_deal / per_deal:.0f}x faster per deal; same alerts fired on the checked deals")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""Throughput and latency of the hot-path endpoints under many concurrent clients.
+
+Start the API on a local Postgres with the pooled profile, for example::
+
+    export DATABASE_URL=postgresql+psycopg2://postgres@127.0.0.1:5432/deals
+    alembic upgrade head
+    DATABASE_ENGINE_PROFILE=pooled DATABASE_POOL_SIZE=20 DATABASE_MAX_OVERFLOW=0 \\
+        uvicorn app.main:app --port 8000 --log-level warning
+
+then, from ``backend/`` with the same DATABASE_URL::
+
+    python -m benchmarks.concurrency --seed --concurrency 500 --requests 20000
+
+Every client keeps one keep-alive connection open, so ``--concurrency`` is the
+number of simultaneous connections the server holds. Requests cycle through
+the deal search, favorites, interests, alerts and recommendations reads for
+the seeded devices (``--path`` replaces the mix; ``{device_id}`` is filled
+in). To compare with the sync handlers, run the same command against a server
+started from the commit before the async data layer.
+"""
+
+import argparse
+import asyncio
+import itertools
+import sys
+import time
+from collections import Counter, defaultdict
+
+import httpx
+
+from benchmarks import seed
+from benchmarks.measure import percentile
+
+DEFAULT_PATHS = [
+    "/deals?limit=40",
+    "/deals?q=headphones&limit=40",
+    "/deals/favorites/{device_id}",
+    "/deals/favorites/{device_id}/ids",
+    "/deals/interests/{device_id}",
+    "/deals/alerts/{device_id}",
+    "/deals/recommendations/{device_id}",
+]
+
+
+async def run(url: str, paths: list[str], device_ids: list[str], concurrency: int, total: int) -> None:
+    requests = itertools.islice(
+        zip(itertools.cycle(paths), itertools.cycle(device_ids)),
+        total,
+    )
+    latencies: dict[str, list[float]] = defaultdict(list)
+    statuses: Counter = Counter()
+
+    async def worker() -> None:
+        # One client per connection: a single shared httpx pool spends more
+        # CPU finding a free connection than sending requests at this scale
+        async with httpx.AsyncClient(base_url=url, limits=httpx.Limits(max_connections=1), timeout=120) as client:
+            for path, device_id in requests:
+                started = time.perf_counter()
+                try:
+                    response = await client.get(path.format(device_id=device_id))
+                    statuses[response.status_code] += 1
+                except httpx.HTTPError as exc:
+                    statuses[type(exc).__name__] += 1
+                    continue
+                latencies[path].append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    completed = sum(len(values) for values in latencies.values())
+    print(f"{completed} requests in {elapsed:.2f}s at concurrency {concurrency}: {completed / elapsed:.0f} req/s")
+    print(f"statuses: {dict(statuses)}")
+    print(f"{'path':40} {'count':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for path in paths:
+        values = sorted(latencies[path])
+        print(
+            f"{path:40} {len(values):7d} {percentile(values, 0.5) * 1000:8.1f} "
+            f"{percentile(values, 0.95) * 1000:8.1f} {percentile(values, 0.99) * 1000:8.1f}"
+        )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.concurrency")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Base URL of the running API")
+    parser.add_argument("--concurrency", type=int, default=500, help="Simultaneous clients (connections)")
+    parser.add_argument("--requests", type=int, default=20000, help="Total requests across all clients")
+    parser.add_argument("--devices", type=int, default=500, help="Distinct device ids to request")
+    parser.add_argument("--path", action="append", dest="paths", help="Request path (repeatable)")
+    parser.add_argument("--seed", action="store_true", help="Seed deals and devices through DATABASE_URL first")
+    parser.add_argument("--deals", type=int, default=5000, help="Catalog size to seed")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.seed:
+        from app.database import get_session_local
+
+        db = get_session_local()()
+        try:
+            seed.seed_deals(db, args.deals)
+            seed.seed_devices(db, args.devices)
+        finally:
+            db.close()
+
+    asyncio.run(run(args.url, args.paths or DEFAULT_PATHS, seed.device_ids(args.devices), args.concurrency, args.requests))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""Per-request connection overhead of each database engine profile.
+
+A "request" here is what a handler does with ``get_db``: open a session, run
+one small indexed query, close the session. Every profile runs the same
+requests against DATABASE_URL with an engine built by ``_create_engine``:
+
+- ``serverless``: NullPool, pre-ping, search_path on every checkout
+- ``pooled``: QueuePool, search_path once per physical connection
+- ``pooled+pre-ping``: the pooled profile with DATABASE_POOL_PRE_PING=1
+- ``pooled, no query cache``: the pooled profile with DATABASE_QUERY_CACHE_SIZE=0
+
+Run from ``backend/`` against a migrated PostgreSQL database::
+
+    export DATABASE_URL=postgresql+psycopg2://postgres@127.0.0.1:5432/deals
+    python -m benchmarks.engine_profiles --requests 500
+
+``--threads`` runs the requests from several threads at once. Queries are
+counted on the psycopg2 cursors, so they include the pre-pings and
+search_path statements the profiles send besides the request's own query. A
+local server without TLS understates what a new connection costs against a
+managed database, so compare the connection and query counts as well as the
+times.
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import psycopg2.extensions
+from sqlalchemy import event, select
+from sqlalchemy.orm import sessionmaker
+
+from app import database, models
+from benchmarks.measure import ms, percentile, print_table
+
+PROFILES = {
+    "serverless": {"DATABASE_ENGINE_PROFILE": "serverless"},
+    "pooled": {"DATABASE_ENGINE_PROFILE": "pooled"},
+    "pooled+pre-ping": {"DATABASE_ENGINE_PROFILE": "pooled", "DATABASE_POOL_PRE_PING": "1"},
+    "pooled, no query cache": {"DATABASE_ENGINE_PROFILE": "pooled", "DATABASE_QUERY_CACHE_SIZE": "0"},
+}
+
+
+class Counters:
+    def __init__(self) -> None:
+        self.connects = 0
+        self.queries = 0
+        self._lock = threading.Lock()
+
+    def add(self, connects: int = 0, queries: int = 0) -> None:
+        with self._lock:
+            self.connects += connects
+            self.queries += queries
+
+
+def run_profile(environment: dict, requests: int, threads: int) -> tuple[list[float], int, int]:
+    """Sorted request times, new connections and queries sent, for one profile."""
+    with mock.patch.dict(os.environ, environment):
+        engine = database._create_engine(database._database_url(), database._schema_name())
+    counters = Counters()
+
+    class CountingCursor(psycopg2.extensions.cursor):
+        def execute(self, query, vars=None):
+            counters.add(queries=1)
+            return super().execute(query, vars)
+
+    # Inserted first, so the profile's own connect listener already counts
+    @event.listens_for(engine, "connect", insert=True)
+    def count_connection(dbapi_connection, connection_record):
+        counters.add(connects=1)
+        dbapi_connection.cursor_factory = CountingCursor
+
+    session_local = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    deal_id = select(models.Deal.id).order_by(models.Deal.id).limit(1)
+
+    def request() -> float:
+        started = time.perf_counter()
+        with session_local() as db:
+            db.execute(select(models.Deal.title).where(models.Deal.id == deal_id.scalar_subquery())).first()
+        return time.perf_counter() - started
+
+    try:
+        # Warm up outside the measurement: the first connection and statement compile
+        request()
+        counters.connects = counters.queries = 0
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            values = sorted(executor.map(lambda _: request(), range(requests)))
+        return values, counters.connects, counters.queries
+    finally:
+        engine.dispose()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.engine_profiles")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per profile")
+    parser.add_argument("--threads", type=int, default=1, help="Threads issuing requests")
+    parser.add_argument("--profile", action="append", dest="profiles", choices=PROFILES, help="Profile (repeatable)")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    rows = []
+    for name in args.profiles or PROFILES:
+        values, connects, queries = run_profile(PROFILES[name], args.requests, args.threads)
+        rows.append(
+            [
+                name,
+                ms(sum(values) / len(values)),
+                ms(percentile(values, 0.5)),
+                ms(percentile(values, 0.95)),
+                connects,
+                f"{queries / args.requests:.1f}",
+            ]
+        )
+
+    print(f"{args.requests} requests per profile on {args.threads} thread(s)")
+    print_table(["profile", "mean ms", "p50 ms", "p95 ms", "connections", "queries/request"], rows)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""Timing, statement counting and table output shared by the benchmarks."""
+
+import time
+from collections.abc import Callable, Sequence
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def timings(fn: Callable[[], Any], repeat: int) -> list[float]:
+    """Sorted wall times of ``repeat`` calls to ``fn``, in seconds."""
+    values = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        values.append(time.perf_counter() - started)
+    return sorted(values)
+
+
+def ms(seconds: float) -> str:
+    return f"{seconds * 1000:.2f}"
+
+
+class StatementCounter:
+    """Counts the statements an engine sends while active.
+
+    ``before_cursor_execute`` fires once per ``execute`` and once per
+    ``executemany`` / insertmanyvalues batch, so the count is the number of
+    round trips SQLAlchemy makes. Statements sent straight on the DBAPI
+    connection (pre-ping, the search_path listeners) are not included;
+    ``connects`` counts new physical connections instead.
+    """
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.statements = 0
+        self.connects = 0
+
+    def _on_execute(self, *args) -> None:
+        self.statements += 1
+
+    def _on_connect(self, *args) -> None:
+        self.connects += 1
+
+    def __enter__(self) -> "StatementCounter":
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        event.listen(self.engine, "connect", self._on_connect)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+        event.remove(self.engine, "connect", self._on_connect)
+
+
+def print_table(headers: Sequence[str], rows: Sequence[Sequence[Any]]) -> None:
+    """Print ``rows`` as right-aligned columns (the first column left-aligned)."""
+    cells = [list(map(str, headers)), *([str(value) for value in row] for row in rows)]
+    widths = [max(len(row[index]) for row in cells) for index in range(len(headers))]
+    for row in cells:
+        print(
+            "  ".join(
+                value.ljust(width) if index == 0 else value.rjust(width)
+                for index, (value, width) in enumerate(zip(row, widths))
+            )
+        )
@@ -0,0 +1,143 @@
+"""Per-device recommendation scoring time at 10k, 100k and 1M deals.
+
+Builds an in-memory ``RecommendationIndex`` over synthetic deals (no database
+needed) and ranks the same device profiles three ways:
+
+- ``loop``: the original per-deal scoring loop of ``get_recommendations``
+- ``index``: ``RecommendationIndex.recommend`` (postings plus discount buckets)
+- ``numpy``: ``ColumnarScorer.recommend`` (skipped when numpy is missing)
+
+Every backend must return the loop's ranking for every profile; a mismatch
+aborts the run. Run from ``backend/``::
+
+    python -m benchmarks.recommendations --sizes 10000 100000 1000000
+
+Times are per device; the columnar scorer's one-off build (on the first
+request after the index changes) is reported separately.
+"""
+
+import argparse
+import random
+import sys
+import time
+
+from app.services.recommendations import (
+    CATEGORY_WEIGHT,
+    FAVORITE_CATEGORY_BONUS,
+    KEYWORD_WEIGHT,
+    TOP_K,
+    IndexedDeal,
+    InterestWeight,
+    RecommendationIndex,
+)
+from benchmarks import seed
+from benchmarks.measure import ms, percentile, print_table
+
+try:
+    from app.services.recommendations_numpy import ColumnarScorer
+except ImportError:  # numpy is optional
+    ColumnarScorer = None
+
+Profile = tuple[list[InterestWeight], set[str]]
+
+
+def build_index(count: int) -> RecommendationIndex:
+    index = RecommendationIndex()
+    for position in range(count):
+        row = seed.deal_row(position)
+        index.upsert(position + 1, row["title"], row["category"], row["discount_percent"])
+    return index
+
+
+def profiles(count: int) -> list[Profile]:
+    """Interests and favorite categories like the seeded devices', plus rarer keywords."""
+    rng = random.Random(0)
+    keywords = [*seed.KEYWORDS, "deal 42", "7 lego", "no match"]
+    result = []
+    for _ in range(count):
+        interests = [
+            InterestWeight(
+                category=rng.choice(seed.CATEGORIES).lower(),
+                keyword=rng.choice(keywords),
+                priority=priority,
+            )
+            for priority in range(1, rng.randint(1, 5) + 1)
+        ]
+        result.append((interests, set(rng.sample(seed.CATEGORIES, rng.randint(0, 3)))))
+    return result
+
+
+def loop_recommend(
+    deals: list[IndexedDeal], interests: list[InterestWeight], favorite_categories: set[str]
+) -> list[int]:
+    """The scoring loop the index replaced; ``deals`` in id order, so ties go to the lower id."""
+    scored = []
+    for deal in deals:
+        score = float(deal.discount_percent)
+        for interest in interests:
+            if deal.category_lower == interest.category.lower():
+                score += CATEGORY_WEIGHT * interest.priority
+            if interest.keyword.lower() in deal.title_lower:
+                score += KEYWORD_WEIGHT * interest.priority
+        if deal.category in favorite_categories:
+            score += FAVORITE_CATEGORY_BONUS
+        scored.append((score, deal.id))
+    return [deal_id for _, deal_id in sorted(scored, key=lambda item: item[0], reverse=True)[:TOP_K]]
+
+
+def time_backend(
+    recommend, device_profiles: list[Profile], expected: list[list[int]] | None = None
+) -> tuple[list[float], list[list[int]]]:
+    """Sorted per-profile times and the rankings, checked against ``expected`` when given."""
+    values = []
+    rankings = []
+    for position, (interests, favorite_categories) in enumerate(device_profiles):
+        started = time.perf_counter()
+        ranked = recommend(interests, favorite_categories)
+        values.append(time.perf_counter() - started)
+        if expected is not None and ranked != expected[position]:
+            raise AssertionError(f"ranking differs for profile {position}: {ranked} != {expected[position]}")
+        rankings.append(ranked)
+    return sorted(values), rankings
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.recommendations")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000], help="Catalog sizes")
+    parser.add_argument("--devices", type=int, default=20, help="Device profiles ranked per backend")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    device_profiles = profiles(args.devices)
+    rows = []
+
+    for size in args.sizes:
+        index = build_index(size)
+        _, deals = index.snapshot()
+
+        loop_times, expected = time_backend(lambda *profile: loop_recommend(deals, *profile), device_profiles)
+        backends = [("loop", loop_times), ("index", time_backend(index.recommend, device_profiles, expected)[0])]
+        build_time = None
+        if ColumnarScorer is not None:
+            started = time.perf_counter()
+            scorer = ColumnarScorer(index)
+            build_time = time.perf_counter() - started
+            backends.append(("numpy", time_backend(scorer.recommend, device_profiles, expected)[0]))
+
+        loop_p50 = percentile(loop_times, 0.5)
+        for name, values in backends:
+            p50 = percentile(values, 0.5)
+            rows.append([size, name, ms(p50), ms(percentile(values, 0.95)), f"{loop_p50 / p50:.1f}x"])
+        if build_time is not None:
+            rows.append([size, "numpy build", ms(build_time), "", ""])
+        del index, deals
+
+    print_table(["deals", "backend", "p50 ms", "p95 ms", "vs loop"], rows)
+    print("\nrankings identical across backends for every profile")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
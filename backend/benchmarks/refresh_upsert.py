@@ -0,0 +1,147 @@
+"""Round trips and wall time of persisting a ``POST /deals/refresh`` batch.
+
+Compares the set-based upsert in ``deal_ingest.upsert_deals`` with the loop it
+replaced (a ``SELECT ... first()`` per deal, a ``flush()`` per insert, then a
+re-query of every persisted id), at 50, 500 and 5,000 deals by default. Each
+size runs twice per strategy: once with all-new deals (inserts) and once with
+the same deals at new prices (updates). Run from ``backend/`` against a
+migrated database::
+
+    export DATABASE_URL=postgresql+psycopg2://postgres@127.0.0.1:5432/deals
+    alembic upgrade head
+    python -m benchmarks.refresh_upsert --sizes 50 500 5000
+
+Batches are committed like a real refresh and the benchmark rows (titles
+starting with ``Refresh benchmark``) are deleted afterwards. Only the
+persistence step is measured; alert matching and index updates are not.
+"""
+
+import argparse
+import sys
+import time
+from collections.abc import Callable
+
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+
+from app import models
+from app.services import deal_ingest
+from benchmarks import seed
+from benchmarks.measure import StatementCounter, ms, print_table
+
+TITLE_PREFIX = "Refresh benchmark"
+
+
+def refresh_batch(run: str, size: int, price_offset: float = 0.0) -> list[dict]:
+    """``size`` normalized deals unique to ``run``; ``price_offset`` changes every price."""
+    batch = []
+    for index in range(size):
+        row = seed.deal_row(index)
+        row["title"] = f"{TITLE_PREFIX} {run} {row['title']}"
+        row["price"] = round(row["price"] + price_offset, 2)
+        batch.append(row)
+    return batch
+
+
+def row_by_row(db: Session, normalized_deals: list[dict]) -> list[models.Deal]:
+    """The refresh loop ``upsert_deals`` replaced, statement for statement."""
+    persisted_ids: list[int] = []
+    for normalized in normalized_deals:
+        existing = (
+            db.query(models.Deal)
+            .filter(
+                models.Deal.title == normalized["title"],
+                models.Deal.marketplace == normalized["marketplace"],
+            )
+            .first()
+        )
+        if existing:
+            existing.category = normalized["category"]
+            existing.price = normalized["price"]
+            existing.original_price = normalized["original_price"]
+            existing.discount_percent = normalized["discount_percent"]
+            existing.product_url = normalized["product_url"]
+            existing.image_url = normalized["image_url"]
+            existing.is_active = True
+            persisted_ids.append(existing.id)
+        else:
+            new_deal = models.Deal(**normalized)
+            db.add(new_deal)
+            db.flush()
+            persisted_ids.append(new_deal.id)
+
+    db.commit()
+    return (
+        db.query(models.Deal)
+        .filter(models.Deal.id.in_(persisted_ids))
+        .order_by(models.Deal.discount_percent.desc())
+        .all()
+    )
+
+
+def set_based(db: Session, normalized_deals: list[dict]) -> list[models.Deal]:
+    deals = deal_ingest.upsert_deals(db, normalized_deals).deals
+    deals.sort(key=lambda deal: deal.discount_percent, reverse=True)
+    db.commit()
+    return deals
+
+
+STRATEGIES: dict[str, Callable[[Session, list[dict]], list[models.Deal]]] = {
+    "row-by-row": row_by_row,
+    "upsert": set_based,
+}
+
+
+def measure(session_local, strategy: Callable, batch: list[dict]) -> tuple[int, float]:
+    """(statements, seconds) of persisting ``batch`` in a fresh session."""
+    db = session_local()
+    try:
+        with StatementCounter(db.get_bind()) as counter:
+            started = time.perf_counter()
+            deals = strategy(db, batch)
+            elapsed = time.perf_counter() - started
+        assert len(deals) == len(batch), f"persisted {len(deals)} of {len(batch)} deals"
+        return counter.statements, elapsed
+    finally:
+        db.close()
+
+
+def cleanup(session_local) -> None:
+    db = session_local()
+    try:
+        db.execute(delete(models.Deal).where(models.Deal.title.like(f"{TITLE_PREFIX} %")))
+        db.commit()
+    finally:
+        db.close()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.refresh_upsert")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 500, 5000], help="Refresh batch sizes")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    from app.database import get_session_local
+
+    session_local = get_session_local()
+    cleanup(session_local)
+    rows = []
+    try:
+        for size in args.sizes:
+            for name, strategy in STRATEGIES.items():
+                run = f"{name} {size}"
+                inserted = measure(session_local, strategy, refresh_batch(run, size))
+                updated = measure(session_local, strategy, refresh_batch(run, size, price_offset=1.0))
+                for scenario, (statements, elapsed) in (("insert", inserted), ("update", updated)):
+                    rows.append([size, name, scenario, statements, ms(elapsed), ms(elapsed / size)])
+    finally:
+        cleanup(session_local)
+
+    print_table(["deals", "strategy", "batch", "statements", "total ms", "ms/deal"], rows)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
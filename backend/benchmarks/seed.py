@@ -0,0 +1,78 @@
+"""Synthetic catalog and devices for the benchmarks.
+
+Rows are written with the app's sync engine (DATABASE_URL, SCHEMA_NAME), in
+batches, and seeding is repeatable: deals are keyed on (title, marketplace)
+and devices that already have interests are left alone.
+"""
+
+import random
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app import models
+from app.services import change_versions, favorites
+from app.services.deal_ingest import dialect_insert
+
+CATEGORIES = ["Electronics", "Home & Kitchen", "Toys", "Sports", "Beauty", "Books", "Fashion", "Garden"]
+MARKETPLACES = ["Amazon", "Walmart", "Target"]
+KEYWORDS = ["headphones", "blender", "lego", "yoga", "serum", "novel", "sneakers", "planter"]
+BATCH_SIZE = 5000
+
+
+def deal_row(index: int) -> dict:
+    original_price = 20.0 + index % 480
+    discount_percent = 5 + index * 7 % 90
+    return {
+        "title": f"Benchmark deal {index} {KEYWORDS[index % len(KEYWORDS)]}",
+        "marketplace": MARKETPLACES[index % len(MARKETPLACES)],
+        "category": CATEGORIES[index % len(CATEGORIES)],
+        "price": round(original_price * (100 - discount_percent) / 100, 2),
+        "original_price": original_price,
+        "discount_percent": discount_percent,
+        "product_url": f"https://example.com/deal/{index}",
+        "image_url": f"https://example.com/deal/{index}.jpg",
+    }
+
+
+def seed_deals(db: Session, count: int) -> None:
+    """Make sure benchmark deals 0..count-1 exist, and bump the deals version once."""
+    table = models.Deal.__table__
+    for start in range(0, count, BATCH_SIZE):
+        rows = [deal_row(index) for index in range(start, min(start + BATCH_SIZE, count))]
+        db.execute(dialect_insert(db)(table).on_conflict_do_nothing(index_elements=["title", "marketplace"]), rows)
+        db.commit()
+    change_versions.bump(db, change_versions.DEALS)
+    db.commit()
+
+
+def device_ids(count: int) -> list[str]:
+    return [f"bench-device-{index}" for index in range(count)]
+
+
+def seed_devices(db: Session, count: int, favorites_per_device: int = 20, interests_per_device: int = 3) -> list[str]:
+    """Give each benchmark device favorites, interests and one alert; returns the ids."""
+    rng = random.Random(0)
+    deal_ids = list(db.scalars(select(models.Deal.id).order_by(models.Deal.id).limit(50000)))
+    seeded = set(db.scalars(select(models.UserInterest.device_id).where(models.UserInterest.device_id.like("bench-device-%"))))
+    ids = device_ids(count)
+
+    for device_id in ids:
+        if device_id in seeded:
+            continue
+        favorites.add_many(db, device_id, rng.sample(deal_ids, min(favorites_per_device, len(deal_ids))))
+        for index in range(interests_per_device):
+            keyword = KEYWORDS[rng.randrange(len(KEYWORDS))]
+            db.add(
+                models.UserInterest(
+                    device_id=device_id,
+                    category=CATEGORIES[KEYWORDS.index(keyword)],
+                    keyword=keyword,
+                    priority=index + 1,
+                )
+            )
+        db.add(models.DealAlert(device_id=device_id, alert_type="keyword", query=rng.choice(KEYWORDS)))
+        if len(db.new) >= BATCH_SIZE:
+            db.commit()
+    db.commit()
+    return ids
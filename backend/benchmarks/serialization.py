@@ -0,0 +1,110 @@
+"""Micro-benchmark of serializing a deal list response.
+
+Times both ways of turning a page of deals into the response body, from the
+query to the JSON bytes, for 12 deals (a recommendation list) and 100 (the
+largest search page):
+
+- ``orm+pydantic``: load ``Deal`` objects, build ``DealSearchResponse`` from
+  them (``from_attributes`` validation of every deal), then what FastAPI does
+  with a ``response_model``: dump, validate again and render with
+  ``JSONResponse``
+- ``rows+deal_json``: select ``DEAL_COLUMNS`` as rows and encode them with
+  ``deal_json`` (orjson when installed)
+
+Both bodies must be byte-identical; a difference aborts the run. Runs on an
+in-memory SQLite database by default, or on DATABASE_URL with ``--url-env``.
+Run from ``backend/``::
+
+    python -m benchmarks.serialization --sizes 12 100 --repeat 500
+"""
+
+import argparse
+import sys
+
+from fastapi.responses import JSONResponse
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app import models, schemas
+from app.database import Base
+from app.services import deal_json
+from benchmarks import seed
+from benchmarks.measure import ms, percentile, print_table, timings
+
+
+def orm_body(db: Session, limit: int) -> bytes:
+    deals = (
+        db.query(models.Deal)
+        .filter(models.Deal.is_active.is_(True))
+        .order_by(models.Deal.discount_percent.desc(), models.Deal.id.desc())
+        .limit(limit)
+        .all()
+    )
+    response = schemas.DealSearchResponse(deals=deals, total=len(deals))
+    validated = schemas.DealSearchResponse.model_validate(response.model_dump())
+    return JSONResponse(validated.model_dump(mode="json")).body
+
+
+def rows_body(db: Session, limit: int) -> bytes:
+    rows = (
+        db.query(*deal_json.DEAL_COLUMNS)
+        .filter(models.Deal.is_active.is_(True))
+        .order_by(models.Deal.discount_percent.desc(), models.Deal.id.desc())
+        .limit(limit)
+        .all()
+    )
+    deals = deal_json.deal_dicts(rows)
+    return deal_json.json_response({"deals": deals, "total": len(deals), "next_cursor": None}).body
+
+
+STRATEGIES = {
+    "orm+pydantic": orm_body,
+    "rows+deal_json": rows_body,
+}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.serialization")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[12, 100], help="Deals per response")
+    parser.add_argument("--repeat", type=int, default=500, help="Timed runs per size and strategy")
+    parser.add_argument("--url-env", action="store_true", help="Use DATABASE_URL instead of in-memory SQLite")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.url_env:
+        from app.database import get_session_local
+
+        session_local = get_session_local()
+    else:
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        session_local = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    db = session_local()
+    try:
+        seed.seed_deals(db, max(args.sizes))
+        rows = []
+        for size in args.sizes:
+            bodies = {name: strategy(db, size) for name, strategy in STRATEGIES.items()}
+            if len(set(bodies.values())) != 1:
+                raise AssertionError(f"bodies differ for {size} deals")
+
+            baseline = None
+            for name, strategy in STRATEGIES.items():
+                # Fresh session state each run, as for a new request
+                values = timings(lambda: (strategy(db, size), db.expunge_all()), args.repeat)
+                p50 = percentile(values, 0.5)
+                baseline = baseline or p50
+                rows.append([size, name, ms(p50), ms(percentile(values, 0.95)), f"{baseline / p50:.1f}x"])
+    finally:
+        db.close()
+
+    print_table(["deals", "strategy", "p50 ms", "p95 ms", "speedup"], rows)
+    print("\nbodies byte-identical for every size")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
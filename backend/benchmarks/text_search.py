@@ -0,0 +1,96 @@
+"""Latency of ``GET /deals?q=...`` text search at 100k and 1M deals.
+
+Seeds the catalog up to each size (see ``seed.seed_deals``), runs ANALYZE,
+then times the search handler's query (``_search_deals``: term filters,
+relevance ranking and the first page) for a few queries. Each query is also
+timed with bitmap scans turned off, which is the sequential scan every
+``ILIKE '%q%'`` needed before the ``ix_deals_title_trgm`` index. Run from
+``backend/`` against a migrated PostgreSQL database::
+
+    export DATABASE_URL=postgresql+psycopg2://postgres@127.0.0.1:5432/deals
+    alembic upgrade head
+    python -m benchmarks.text_search --sizes 100000 1000000
+
+Seeded deals are kept, so later runs (and the other benchmarks) reuse them.
+"""
+
+import argparse
+import sys
+
+from sqlalchemy import func, inspect, select, text
+from sqlalchemy.orm import Session
+
+from app import models
+from app.routers.deals import _search_deals
+from benchmarks import seed
+from benchmarks.measure import ms, percentile, print_table, timings
+
+DEFAULT_QUERIES = [
+    "headphones",
+    "lego 4242",
+    "benchmark deal 123456",
+    "no such product",
+]
+TRIGRAM_INDEX = "ix_deals_title_trgm"
+
+
+def search(db: Session, q: str, limit: int) -> dict:
+    return _search_deals(db, q, None, 0, None, limit, None)
+
+
+def has_trigram_index(db: Session) -> bool:
+    return any(index["name"] == TRIGRAM_INDEX for index in inspect(db.get_bind()).get_indexes("deals"))
+
+
+def time_queries(db: Session, queries: list[str], limit: int, repeat: int, mode: str) -> list[list]:
+    rows = []
+    for q in queries:
+        # One untimed run, so every query is measured with a warm cache
+        matches = len(search(db, q, limit)["deals"])
+        values = timings(lambda: search(db, q, limit), repeat)
+        rows.append([q, mode, matches, ms(percentile(values, 0.5)), ms(percentile(values, 0.95))])
+    return rows
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.text_search")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000, 1000000], help="Catalog sizes to seed")
+    parser.add_argument("--query", action="append", dest="queries", help="Search string (repeatable)")
+    parser.add_argument("--limit", type=int, default=40, help="Page size")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs per query")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    from app.database import get_session_local
+
+    db = get_session_local()()
+    try:
+        indexed = has_trigram_index(db)
+        if not indexed:
+            print(f"note: {TRIGRAM_INDEX} is missing (pg_trgm not installed?), timing sequential scans only")
+
+        for size in args.sizes:
+            seed.seed_deals(db, size)
+            db.execute(text("ANALYZE deals"))
+            db.commit()
+            active = db.scalar(select(func.count()).select_from(models.Deal).where(models.Deal.is_active.is_(True)))
+            print(f"\n{active} active deals")
+
+            queries = args.queries or DEFAULT_QUERIES
+            rows = time_queries(db, queries, args.limit, args.repeat, "index" if indexed else "seq scan")
+            if indexed:
+                # GIN indexes are only read through bitmap scans; SET LOCAL lasts until the rollback
+                db.execute(text("SET LOCAL enable_bitmapscan = off"))
+                rows += time_queries(db, queries, args.limit, args.repeat, "seq scan")
+                db.rollback()
+            rows.sort(key=lambda row: queries.index(row[0]))
+            print_table(["q", "plan", "results", "p50 ms", "p95 ms"], rows)
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""Shared fixtures: a throwaway SQLite database wired into the app.
+
+Every test gets a fresh database file and fresh in-process state (engine,
+caches, indexes), so tests can run in any order. The async handlers reach
+the same file through aiosqlite.
+"""
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app import database, models  # noqa: F401 - registers the models
+from app.database import Base
+from app.services import (
+    alert_matching,
+    category_counts,
+    gateway,
+    recommendation_cache,
+    recommendations,
+)
+
+
+def sqlite_engine(path):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    return engine
+
+
+def async_engine_for(url: str):
+    # NullPool: each TestClient runs its own event loop, and pooled aiosqlite
+    # connections belong to the loop that opened them
+    return create_async_engine(database._async_url(url), poolclass=NullPool)
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    engine = sqlite_engine(tmp_path / "primary.db")
+    monkeypatch.setattr(database, "_engine", engine)
+    monkeypatch.setattr(database, "_SessionLocal", sessionmaker(autocommit=False, autoflush=False, bind=engine))
+    async_engine = async_engine_for(str(engine.url))
+    monkeypatch.setattr(database, "_async_engine", async_engine)
+    monkeypatch.setattr(database, "_AsyncSessionLocal", database._async_sessionmaker(async_engine))
+    monkeypatch.setattr(database, "_replicas", [])
+    monkeypatch.setattr(database, "_recent_writes", {})
+    for module, name in (
+        (alert_matching, "_matcher"),
+        (category_counts, "_counts"),
+        (gateway, "_cache"),
+        (gateway, "_client"),
+        (gateway, "_single_flight"),
+        (gateway, "_breaker"),
+        (recommendation_cache, "_backend"),
+        (recommendations, "_index"),
+    ):
+        monkeypatch.setattr(module, name, None)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session_factory(engine):
+    return database.get_session_local()
+
+
+@pytest.fixture
+def client(engine):
+    from app.main import app
+
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def fake_gateway(engine, monkeypatch):
+    """A local gateway the shared client points at, with a fresh client, cache and breaker.
+
+    The async client belongs to the event loop that used it: tests that drive
+    it with ``asyncio.run`` close it inside that loop (see ``run_closing``),
+    and the app's shutdown hook closes it for ``client`` tests.
+    """
+    from tests.fake_gateway import FakeGateway
+
+    server = FakeGateway()
+    monkeypatch.setenv("APPIFEX_GATEWAY_API_KEY", "test-key")
+    monkeypatch.setattr(gateway, "GATEWAY_URL", server.url)
+    monkeypatch.setattr(gateway, "_client", None)
+    yield server
+    asyncio.run(gateway.close_client())
+    server.close()
+
+
+def run_closing(coroutine):
+    """``asyncio.run`` a coroutine, then close the gateway client on the same loop."""
+
+    async def run_and_close():
+        try:
+            return await coroutine
+        finally:
+            await gateway.close_client()
+
+    return asyncio.run(run_and_close())
+
+
+def make_deal(index: int, **overrides) -> dict:
+    """A normalized refresh row, as ``deal_ingest.upsert_deals`` receives it."""
+    return {
+        "title": f"Deal {index}",
+        "marketplace": "Amazon",
+        "category": "Electronics",
+        "price": 10.0 + index,
+        "original_price": 100.0,
+        "discount_percent": 50,
+        "product_url": f"https://example.com/deal/{index}",
+        "image_url": f"https://example.com/deal/{index}.jpg",
+        **overrides,
+    }
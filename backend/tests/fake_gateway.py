@@ -0,0 +1,110 @@
+"""A local stand-in for the LLM gateway's chat-completions endpoint.
+
+Serves buffered and SSE-streamed completions whose content is a JSON
+``{"deals": [...]}`` document. ``delay`` slows every response down and
+``status`` makes it fail, to exercise timeouts and the circuit breaker.
+``connect_delay`` is paid once per new connection, standing in for a TLS
+handshake, and ``connections`` counts them.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def gateway_deals(count: int = 6, tag: str = "") -> list[dict]:
+    return [
+        {
+            "title": f"Gateway deal {tag}{index}",
+            "marketplace": "amazon",
+            "category": "Electronics",
+            "price": 10 + index,
+            "original_price": 20 + index,
+            "discount_percent": 0,
+            "product_url": f"https://example.com/{index}",
+            "image_url": f"https://example.com/{index}.jpg",
+        }
+        for index in range(count)
+    ]
+
+
+class FakeGateway:
+    def __init__(self):
+        self.delay = 0.0
+        self.connect_delay = 0.0
+        self.status = 200
+        self.deals = gateway_deals()
+        self.calls = 0
+        self.connections = 0
+        self.concurrent = 0
+        self.max_concurrent = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self):
+        gateway = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def setup(self):
+                super().setup()
+                with gateway._lock:
+                    gateway.connections += 1
+                time.sleep(gateway.connect_delay)
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with gateway._lock:
+                    gateway.calls += 1
+                    gateway.concurrent += 1
+                    gateway.max_concurrent = max(gateway.max_concurrent, gateway.concurrent)
+                try:
+                    time.sleep(gateway.delay)
+                    if gateway.status != 200:
+                        self.send_response(gateway.status)
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                        return
+                    content = json.dumps({"deals": gateway.deals})
+                    if body.get("stream"):
+                        self._stream(content)
+                    else:
+                        self._buffered(content)
+                finally:
+                    with gateway._lock:
+                        gateway.concurrent -= 1
+
+            def _buffered(self, content: str) -> None:
+                data = json.dumps({"choices": [{"message": {"content": content}}]}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _stream(self, content: str) -> None:
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                for start in range(0, len(content), 40):
+                    delta = {"choices": [{"delta": {"content": content[start : start + 40]}}]}
+                    self.wfile.write(f"data: {json.dumps(delta)}\n\n".encode())
+                    self.wfile.flush()
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+                self.close_connection = True
+
+        return Handler
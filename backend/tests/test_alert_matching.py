@@ -0,0 +1,97 @@
+"""The Aho-Corasick alert matcher, and alerts firing from refreshes."""
+
+from app.services import alert_matching
+from app.services.alert_matching import AlertMatcher
+
+from tests.fake_gateway import gateway_deals
+
+
+def fired(matcher: AlertMatcher, title: str, category: str = "Electronics", discount: int = 50) -> list[int]:
+    return sorted(trigger.alert_id for trigger in matcher.match(99, title, category, discount))
+
+
+def product_alert(alert_id: int, query: str, min_discount: int = 10) -> tuple:
+    return (alert_id, f"device-{alert_id}", "keyword", query, min_discount)
+
+
+def test_overlapping_terms_are_all_found():
+    # The classic he/she/his/hers set: matches overlap and end inside each other
+    terms = ["he", "she", "his", "hers"]
+    matcher = AlertMatcher([product_alert(alert_id, term) for alert_id, term in enumerate(terms, 1)])
+    assert fired(matcher, "ushers") == [1, 2, 4]
+    assert fired(matcher, "this") == [3]
+
+
+def test_terms_that_prefix_other_terms():
+    matcher = AlertMatcher([product_alert(1, "air"), product_alert(2, "airpods"), product_alert(3, "airpods pro")])
+    assert fired(matcher, "AirPods Pro (2nd Gen)") == [1, 2, 3]
+    assert fired(matcher, "Air fryer") == [1]
+    assert fired(matcher, "Fresh airpod case") == [1]
+
+
+def test_matching_is_case_insensitive():
+    matcher = AlertMatcher([product_alert(1, "LEGO Shuttle"), (2, "device-2", "category", "  electronics ", 10)])
+    assert fired(matcher, "lego creator SPACE SHUTTLE") == [1, 2]
+    assert fired(matcher, "Lego shuttle", category="TOYS") == [1]
+    assert fired(matcher, "Lego set", category="ELECTRONICS") == [2]
+
+
+def test_every_term_must_appear():
+    matcher = AlertMatcher([product_alert(1, "ninja air fryer"), product_alert(2, "fryer fryer")])
+    assert fired(matcher, "Ninja 10-in-1 Air Fryer Oven") == [1, 2]
+    assert fired(matcher, "Ninja blender") == []
+    assert fired(matcher, "Air fryer") == [2]  # repeated terms count once
+
+
+def test_category_and_discount_filters():
+    matcher = AlertMatcher(
+        [
+            (1, "device-1", "category", "Toys", 30),
+            (2, "device-2", "category", "Toys", 10),
+            product_alert(3, "lego", min_discount=40),
+            product_alert(4, "lego", min_discount=0),
+        ]
+    )
+    assert fired(matcher, "Lego", category="Toys", discount=30) == [1, 2, 4]
+    assert fired(matcher, "Lego", category="Toys", discount=40) == [1, 2, 3, 4]
+    assert fired(matcher, "Lego", category="Toys", discount=9) == [4]
+    # Category alerts match the category, not the title
+    assert fired(matcher, "Toys for tots", category="Books", discount=90) == []
+
+
+def test_blank_alerts_never_fire():
+    matcher = AlertMatcher([product_alert(1, "   "), (2, "device-2", "category", "", 0)])
+    assert len(matcher) == 0
+    assert fired(matcher, "Anything", category="") == []
+
+
+def refresh(client):
+    return client.post("/deals/refresh", json={"query": "gateway", "limit": 6})
+
+
+def test_refresh_fires_alerts_until_one_is_disabled(client, fake_gateway, monkeypatch):
+    monkeypatch.setenv("GATEWAY_CACHE_TTL", "0")
+    payload = {"device_id": "d", "alert_type": "keyword", "query": "GATEWAY DEAL 3", "min_discount": 10}
+    alert = client.post("/deals/alerts", json=payload).json()
+
+    assert refresh(client).json()["alerts_triggered"] == 1
+    stamped = client.get("/deals/alerts/d").json()[0]["last_triggered_at"]
+    assert stamped is not None
+
+    # Editing an alert is not a trigger
+    updated = client.patch(f"/deals/alerts/{alert['id']}", json={"min_discount": 20}).json()
+    assert updated["last_triggered_at"] == stamped
+
+    # A disabled alert drops out of the rebuilt matcher
+    client.patch(f"/deals/alerts/{alert['id']}", json={"is_enabled": False})
+    fake_gateway.deals = gateway_deals(tag="new ")
+    assert refresh(client).json()["alerts_triggered"] == 0
+    assert alert_matching._matcher is not None and len(alert_matching._matcher) == 0
+
+
+def test_updating_an_alert_leaves_last_triggered_at_unset(client):
+    alert = client.post("/deals/alerts", json={"device_id": "d", "alert_type": "category", "query": "Toys"}).json()
+    updated = client.patch(f"/deals/alerts/{alert['id']}", json={"min_discount": 50, "is_enabled": False})
+    assert updated.status_code == 200
+    assert updated.json()["last_triggered_at"] is None
+    assert client.get("/deals/alerts/d").json()[0]["last_triggered_at"] is None
@@ -0,0 +1,153 @@
+"""The alert notification outbox: claiming, retries, dead-lettering and the worker loop."""
+
+import json
+from datetime import timedelta
+
+from sqlalchemy import select
+
+from app import models
+from app.services import alert_outbox, deal_ingest
+from app.services.alert_matching import AlertTrigger
+
+from tests.conftest import make_deal
+
+
+class FlakySender:
+    """Fails the listed notification ids (every time) and records what it was sent."""
+
+    def __init__(self, failing: set[int] = frozenset()):
+        self.failing = failing
+        self.batches = []
+
+    def send(self, batch):
+        self.batches.append([item.id for item in batch])
+        return {item.id: "push service unavailable" for item in batch if item.id in self.failing}
+
+
+def seed_notifications(db, count: int) -> list[int]:
+    """Enqueue ``count`` notifications as a refresh would; returns their ids in order."""
+    deals = deal_ingest.upsert_deals(db, [make_deal(index) for index in range(count)]).inserted
+    alert = models.DealAlert(device_id="d", alert_type="keyword", query="deal")
+    db.add(alert)
+    db.flush()
+    alert_outbox.enqueue(db, [AlertTrigger(alert.id, "d", deal.id) for deal in deals], deals)
+    db.commit()
+    return list(db.scalars(select(models.AlertNotification.id).order_by(models.AlertNotification.id)))
+
+
+def rows(db) -> dict[int, models.AlertNotification]:
+    db.expire_all()
+    return {row.id: row for row in db.query(models.AlertNotification)}
+
+
+def test_enqueue_snapshots_the_deal(session_factory):
+    db = session_factory()
+    [notification_id] = seed_notifications(db, 1)
+    row = rows(db)[notification_id]
+    assert (row.status, row.attempts) == (alert_outbox.PENDING, 0)
+    assert row.payload["title"] == "Deal 0"
+    assert row.payload["discount_percent"] == 50
+    db.close()
+
+
+def test_claimed_rows_are_leased_until_settled(session_factory):
+    db = session_factory()
+    ids = seed_notifications(db, 3)
+
+    first = alert_outbox.claim_batch(db, 2)
+    assert [item.id for item in first] == ids[:2]
+    assert [item.attempts for item in first] == [1, 1]
+    # Leased rows are skipped, so the next claim only gets the rest
+    assert [item.id for item in alert_outbox.claim_batch(db, 2)] == ids[2:]
+    assert alert_outbox.claim_batch(db, 2) == []
+    assert all(row.attempts == 1 for row in rows(db).values())
+    db.close()
+
+
+def test_expired_lease_is_claimed_again(session_factory, monkeypatch):
+    monkeypatch.setenv("ALERT_LEASE_SECONDS", "0")
+    db = session_factory()
+    [notification_id] = seed_notifications(db, 1)
+
+    assert [item.attempts for item in alert_outbox.claim_batch(db, 10)] == [1]
+    # The worker died before settling; the lease is already over
+    assert [(item.id, item.attempts) for item in alert_outbox.claim_batch(db, 10)] == [(notification_id, 2)]
+    db.close()
+
+
+def test_settle_marks_sent_and_reschedules_failures_with_backoff(session_factory, monkeypatch):
+    monkeypatch.setenv("ALERT_RETRY_BASE_SECONDS", "5")
+    db = session_factory()
+    ok, failing = seed_notifications(db, 2)
+    batch = alert_outbox.claim_batch(db, 10)
+
+    before = alert_outbox._utcnow()
+    assert alert_outbox.settle(db, batch, {failing: "HTTP 503"}) == (1, 1, 0)
+    settled = rows(db)
+    assert settled[ok].status == alert_outbox.SENT
+    assert settled[ok].sent_at is not None
+    assert settled[failing].status == alert_outbox.PENDING
+    assert settled[failing].last_error == "HTTP 503"
+    retry_at = alert_outbox._as_utc(settled[failing].next_attempt_at)
+    assert before + timedelta(seconds=5) <= retry_at <= alert_outbox._utcnow() + timedelta(seconds=5)
+    assert alert_outbox.backlog(db)["pending"] == 1
+    db.close()
+
+
+def test_retry_delay_doubles_up_to_the_cap(monkeypatch):
+    monkeypatch.setenv("ALERT_RETRY_BASE_SECONDS", "5")
+    monkeypatch.setenv("ALERT_RETRY_MAX_SECONDS", "30")
+    assert [alert_outbox.retry_delay(attempts) for attempts in range(1, 6)] == [5, 10, 20, 30, 30]
+
+
+def test_notifications_are_dead_lettered_after_max_attempts(session_factory, monkeypatch):
+    monkeypatch.setenv("ALERT_MAX_ATTEMPTS", "3")
+    monkeypatch.setenv("ALERT_RETRY_BASE_SECONDS", "0")
+    db = session_factory()
+    [notification_id] = seed_notifications(db, 1)
+    sender = FlakySender(failing={notification_id})
+
+    outcomes = []
+    for _ in range(4):
+        batch = alert_outbox.claim_batch(db, 10)
+        if batch:
+            outcomes.append(alert_outbox.settle(db, batch, sender.send(batch)))
+    assert outcomes == [(0, 1, 0), (0, 1, 0), (0, 0, 1)]
+
+    row = rows(db)[notification_id]
+    assert (row.status, row.attempts) == (alert_outbox.FAILED, 3)
+    assert alert_outbox.backlog(db) == {"pending": 0, "failed": 1, "oldest_pending_age_seconds": 0.0}
+    db.close()
+
+
+def test_worker_delivers_everything_due(session_factory, tmp_path):
+    db = session_factory()
+    ids = seed_notifications(db, 5)
+    db.close()
+
+    path = tmp_path / "sent.ndjson"
+    metrics = alert_outbox.run_worker(session_factory, alert_outbox.FileSender(str(path)), batch_size=2, once=True)
+    assert (metrics.batches, metrics.sent, metrics.retried) == (3, 5, 0)
+    assert [json.loads(line)["notification_id"] for line in path.read_text().splitlines()] == ids
+
+    db = session_factory()
+    assert {row.status for row in rows(db).values()} == {alert_outbox.SENT}
+    db.close()
+
+
+def test_worker_survives_a_failed_claim(session_factory, monkeypatch):
+    db = session_factory()
+    seed_notifications(db, 1)
+    db.close()
+
+    original = alert_outbox.claim_batch
+
+    def unreachable(db, batch_size):
+        raise ConnectionError("database unreachable")
+
+    monkeypatch.setattr(alert_outbox, "claim_batch", unreachable)
+    sender = FlakySender()
+    assert alert_outbox.run_worker(session_factory, sender, once=True).batches == 0
+
+    monkeypatch.setattr(alert_outbox, "claim_batch", original)
+    assert alert_outbox.run_worker(session_factory, sender, once=True).sent == 1
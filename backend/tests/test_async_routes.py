@@ -0,0 +1,71 @@
+"""The async per-device endpoints, end to end through the aiosqlite engine."""
+
+from app.services import recommendation_cache
+from tests.test_favorites import seed_deals
+
+
+def test_favorite_add_list_and_remove(client, session_factory):
+    seed_deals(session_factory, 3)
+
+    created = client.post("/deals/favorites", json={"device_id": "d", "deal_id": 2})
+    assert created.status_code == 200
+    assert created.json()["deal"]["title"] == "Deal 1"
+    again = client.post("/deals/favorites", json={"device_id": "d", "deal_id": 2})
+    assert again.json()["id"] == created.json()["id"]
+    assert again.json()["deal"]["id"] == 2
+    assert client.post("/deals/favorites", json={"device_id": "d", "deal_id": 99}).status_code == 404
+
+    listed = client.get("/deals/favorites/d")
+    assert [(favorite["deal_id"], favorite["deal"]["title"]) for favorite in listed.json()] == [(2, "Deal 1")]
+
+    assert client.delete("/deals/favorites/d/2").json() == {"success": True}
+    assert client.delete("/deals/favorites/d/2").status_code == 404
+    assert client.get("/deals/favorites/d").json() == []
+
+
+def test_interests_revalidate_until_written(client):
+    payload = {"device_id": "d", "category": "Electronics", "keyword": "headphones", "priority": 3}
+    assert client.post("/deals/interests", json=payload).status_code == 200
+
+    listed = client.get("/deals/interests/d")
+    assert [interest["keyword"] for interest in listed.json()] == ["headphones"]
+    etag = listed.headers["etag"]
+    assert client.get("/deals/interests/d", headers={"If-None-Match": etag}).status_code == 304
+
+    client.post("/deals/interests", json={**payload, "keyword": "speakers", "priority": 5})
+    changed = client.get("/deals/interests/d", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert [interest["keyword"] for interest in changed.json()] == ["speakers", "headphones"]
+
+
+def test_alert_create_update_and_list(client):
+    created = client.post(
+        "/deals/alerts",
+        json={"device_id": "d", "alert_type": "keyword", "query": "headphones", "min_discount": 20},
+    ).json()
+    assert created["is_enabled"] is True
+
+    updated = client.patch(f"/deals/alerts/{created['id']}", json={"is_enabled": False})
+    assert updated.status_code == 200
+    assert updated.json()["is_enabled"] is False
+    assert updated.json()["query"] == "headphones"
+    assert client.patch("/deals/alerts/999", json={"is_enabled": False}).status_code == 404
+
+    listed = client.get("/deals/alerts/d").json()
+    assert [(alert["id"], alert["is_enabled"]) for alert in listed] == [(created["id"], False)]
+
+
+def test_recommendations_rank_and_cache(client, session_factory, monkeypatch):
+    monkeypatch.setenv("RECOMMENDATION_CACHE_TTL", "60")
+    seed_deals(session_factory, 5)
+    client.post("/deals/interests", json={"device_id": "d", "category": "Electronics", "keyword": "deal"})
+
+    first = client.get("/deals/recommendations/d")
+    assert first.status_code == 200
+    assert first.json()["device_id"] == "d"
+    assert first.json()["recommendations"]
+    assert {deal["category"] for deal in first.json()["recommendations"]} == {"Electronics"}
+
+    second = client.get("/deals/recommendations/d")
+    assert second.json() == first.json()
+    assert recommendation_cache.stats()["hits"] == 1
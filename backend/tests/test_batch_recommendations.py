@@ -0,0 +1,111 @@
+"""Batch recommendations: the NDJSON endpoint, the grouped loading and the CLI job."""
+
+import json
+
+import pytest
+from sqlalchemy import event
+
+from app import cli, database, models
+from app.services import deal_ingest, recommendations
+
+from tests.conftest import make_deal
+
+CATEGORIES = ["Electronics", "Home", "Toys"]
+
+
+@pytest.fixture
+def catalog(session_factory):
+    """Thirty deals across three categories, and three devices with different tastes."""
+    db = session_factory()
+    rows = [
+        make_deal(
+            index,
+            title=f"Lego {index}" if index % 4 == 0 else f"Deal {index}",
+            category=CATEGORIES[index % 3],
+            discount_percent=10 + index,
+        )
+        for index in range(30)
+    ]
+    deals = deal_ingest.upsert_deals(db, rows).inserted
+    db.add_all(
+        [
+            models.UserInterest(device_id="toys-fan", category="Toys", keyword="lego", priority=5),
+            models.UserInterest(device_id="home-fan", category="Home", keyword="deal", priority=2),
+            models.UserInterest(device_id="home-fan", category="Electronics", keyword="nothing", priority=1),
+            models.FavoriteDeal(device_id="favoriter", deal_id=deals[1].id),
+        ]
+    )
+    db.commit()
+    db.close()
+
+
+def batch(client, device_ids: list[str]) -> list[dict]:
+    response = client.post("/deals/recommendations/batch", json={"device_ids": device_ids})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_batch_matches_the_single_device_endpoint(client, catalog):
+    device_ids = ["toys-fan", "home-fan", "favoriter", "stranger"]
+    lines = batch(client, device_ids)
+
+    assert [line["device_id"] for line in lines] == device_ids
+    for line in lines:
+        assert line == client.get(f"/deals/recommendations/{line['device_id']}").json()
+    assert {deal["category"] for deal in lines[0]["recommendations"][:3]} == {"Toys"}
+    # A device with no profile still gets the catalog's best discounts
+    assert len(lines[3]["recommendations"]) == recommendations.TOP_K
+
+
+def test_repeated_device_ids_are_answered_once(client, catalog):
+    assert [line["device_id"] for line in batch(client, ["home-fan", "toys-fan", "home-fan"])] == [
+        "home-fan",
+        "toys-fan",
+    ]
+
+
+def test_batch_size_is_validated(client):
+    assert client.post("/deals/recommendations/batch", json={"device_ids": []}).status_code == 422
+    too_many = [f"device-{index}" for index in range(10001)]
+    assert client.post("/deals/recommendations/batch", json={"device_ids": too_many}).status_code == 422
+
+
+def test_profiles_load_in_grouped_queries(session_factory, catalog):
+    db = session_factory()
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    device_ids = ["toys-fan", "home-fan", "favoriter"] + [f"device-{index}" for index in range(97)]
+    chunked = list(recommendations.iter_batch_recommendations(db, device_ids, chunk_size=50))
+    profile_queries = [sql for sql in statements if "user_interests" in sql or "favorite_deals" in sql]
+    # One interests and one favorites query per 50-device chunk, however many devices
+    assert len(profile_queries) == 4
+
+    single = list(recommendations.iter_batch_recommendations(db, device_ids, chunk_size=1))
+    assert chunked == single
+    db.close()
+
+
+def test_cli_writes_one_line_per_device(session_factory, catalog, tmp_path, capsys):
+    devices = tmp_path / "devices.txt"
+    devices.write_text("toys-fan\n\nstranger\n")
+    output = tmp_path / "recs.ndjson"
+
+    assert cli.main(["recommendations", "--device-ids-file", str(devices), "--output", str(output)]) == 0
+    lines = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [line["device_id"] for line in lines] == ["toys-fan", "stranger"]
+    assert "Wrote recommendations for 2 devices" in capsys.readouterr().err
+
+    db = database.get_session_local()()
+    responses = recommendations.iter_batch_recommendations(db, ["toys-fan", "stranger"])
+    expected = [response.model_dump(mode="json") for response in responses]
+    db.close()
+    assert lines == expected
+
+
+def test_cli_all_devices_covers_interests_and_favorites(session_factory, catalog, tmp_path):
+    output = tmp_path / "recs.ndjson"
+    assert cli.main(["recommendations", "--all-devices", "--output", str(output)]) == 0
+    device_ids = [json.loads(line)["device_id"] for line in output.read_text().splitlines()]
+    assert device_ids == ["favoriter", "home-fan", "toys-fan"]
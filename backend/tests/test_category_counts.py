@@ -0,0 +1,116 @@
+"""Category counts kept current by deltas instead of a GROUP BY per request."""
+
+import json
+
+from sqlalchemy import update
+
+from app import models
+from app.services import category_counts, deal_ingest
+
+from tests.conftest import make_deal
+
+
+def counts_of(counts: category_counts.CategoryCounts) -> dict[str, int]:
+    return {row["category"]: row["active_deals"] for row in json.loads(counts.snapshot.counts_body)}
+
+
+def test_inserts_add_categories():
+    counts = category_counts.CategoryCounts({}, {})
+    counts.apply([(None, False, "Toys", True), (None, False, "Toys", True), (None, False, "Home", False)])
+    # An inactive deal still lists its category, with no active deals
+    assert counts.snapshot.categories == ("Home", "Toys")
+    assert counts_of(counts) == {"Home": 0, "Toys": 2}
+    assert counts.version == 1
+
+
+def test_updates_move_deals_between_categories_and_states():
+    counts = category_counts.CategoryCounts({"Toys": 2, "Home": 1}, {"Toys": 2, "Home": 1})
+    counts.apply([("Toys", True, "Home", True)])
+    assert counts_of(counts) == {"Home": 2, "Toys": 1}
+
+    counts.apply([("Home", True, "Home", False), ("Toys", True, "Toys", False)])
+    assert counts_of(counts) == {"Home": 1, "Toys": 0}
+
+    counts.apply([("Toys", False, "Toys", True)])
+    assert counts_of(counts) == {"Home": 1, "Toys": 1}
+
+
+def test_a_category_is_dropped_with_its_last_deal():
+    counts = category_counts.CategoryCounts({"Toys": 1, "Home": 1}, {"Toys": 1, "Home": 0})
+    etag = counts.snapshot.categories_etag
+    counts.apply([("Toys", True, "Garden", True), ("Home", False, "Garden", True)])
+    assert counts.snapshot.categories == ("Garden",)
+    assert counts_of(counts) == {"Garden": 2}
+    assert counts.snapshot.categories_etag != etag
+
+
+def test_empty_deltas_keep_the_snapshot():
+    counts = category_counts.CategoryCounts({"Toys": 1}, {"Toys": 1})
+    counts.deals_version = 4
+    snapshot = counts.snapshot
+    counts.apply([], deals_version=5)
+    assert counts.snapshot is snapshot
+    assert (counts.version, counts.deals_version) == (0, 5)
+
+
+def test_a_skipped_write_is_not_adopted():
+    counts = category_counts.CategoryCounts({}, {})
+    counts.deals_version = 4
+    # Version 5 came from another writer whose deltas this process never saw
+    counts.apply([(None, False, "Toys", True)], deals_version=6)
+    assert counts.deals_version == 4
+
+
+def test_deltas_follow_upserts_and_match_a_rebuild(session_factory):
+    db = session_factory()
+    counts = category_counts.build_counts(db)
+
+    def upsert(rows):
+        result = deal_ingest.upsert_deals(db, rows)
+        deltas = category_counts.deltas_for(result)
+        db.commit()
+        counts.apply(deltas)
+        assert counts_of(counts) == counts_of(category_counts.build_counts(db))
+        return deltas
+
+    assert upsert([make_deal(0, category="Toys"), make_deal(1, category="Toys"), make_deal(2)]) == [
+        (None, False, "Toys", True),
+        (None, False, "Toys", True),
+        (None, False, "Electronics", True),
+    ]
+    assert counts_of(counts) == {"Electronics": 1, "Toys": 2}
+
+    # A price change alone does not touch the counts; a category move does
+    assert upsert([make_deal(0, category="Toys", price=1.0)]) == []
+    assert upsert([make_deal(1, category="Home")]) == [("Toys", True, "Home", True)]
+
+    # Deactivated out of band (the rebuild sees it); a later refresh brings it back
+    db.execute(update(models.Deal).where(models.Deal.title == "Deal 2").values(is_active=False))
+    db.commit()
+    counts.apply([("Electronics", True, "Electronics", False)])
+    assert counts_of(counts) == {"Electronics": 0, "Home": 1, "Toys": 1}
+    assert upsert([make_deal(2)]) == [("Electronics", False, "Electronics", True)]
+
+    # Moving the last Electronics deal away drops the category
+    upsert([make_deal(2, category="Home")])
+    assert counts.snapshot.categories == ("Home", "Toys")
+    db.close()
+
+
+def test_refresh_updates_served_counts_without_a_rebuild(client, fake_gateway, monkeypatch):
+    builds = []
+    build_counts = category_counts.build_counts
+    monkeypatch.setattr(category_counts, "build_counts", lambda db: builds.append(1) or build_counts(db))
+
+    assert client.get("/deals/categories/counts").json() == []
+    first = client.get("/deals/categories")
+    assert first.json() == []
+
+    client.post("/deals/refresh", json={"query": "gateway", "limit": 6})
+    assert client.get("/deals/categories/counts").json() == [{"category": "Electronics", "active_deals": 6}]
+    assert client.get("/deals/categories").json() == ["Electronics"]
+    assert len(builds) == 1
+
+    etag = client.get("/deals/categories").headers["etag"]
+    assert etag != first.headers["etag"]
+    assert client.get("/deals/categories", headers={"If-None-Match": etag}).status_code == 304
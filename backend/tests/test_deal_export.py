@@ -0,0 +1,125 @@
+"""Catalog export: NDJSON and CSV streams, filters, partitioning and gzip."""
+
+import csv
+import gzip
+import io
+import json
+import random
+
+import pytest
+from sqlalchemy import update
+
+from app import cli, models
+from app.services import deal_export, deal_ingest, deal_json
+
+from tests.conftest import make_deal
+
+
+@pytest.fixture
+def catalog(session_factory):
+    """Eight active deals (one with CSV-hostile text) and one inactive deal."""
+    db = session_factory()
+    rows = [
+        make_deal(
+            index,
+            category="Toys" if index % 2 else "Home",
+            marketplace="Ebay" if index == 3 else "Amazon",
+            discount_percent=10 * index,
+        )
+        for index in range(7)
+    ]
+    rows.append(make_deal(7, title='Crème "brûlée", torch\nset — ½ off'))
+    rows.append(make_deal(8, title="Gone"))
+    deal_ingest.upsert_deals(db, rows)
+    db.execute(update(models.Deal).where(models.Deal.title == "Gone").values(is_active=False))
+    db.commit()
+    db.close()
+
+
+def export(client, **params) -> str:
+    response = client.get("/deals/export", params=params)
+    assert response.status_code == 200
+    return response.text
+
+
+def test_ndjson_is_every_active_deal_in_id_order(client, catalog):
+    lines = [json.loads(line) for line in export(client).splitlines()]
+    assert [line["title"] for line in lines] == [f"Deal {index}" for index in range(7)] + [
+        'Crème "brûlée", torch\nset — ½ off'
+    ]
+    # Same fields and formatting as the search endpoint
+    by_id = {deal["id"]: deal for deal in client.get("/deals", params={"limit": 100}).json()["deals"]}
+    assert lines == [by_id[line["id"]] for line in lines]
+
+
+def test_filters(client, catalog):
+    def titles(**params):
+        return [json.loads(line)["title"] for line in export(client, **params).splitlines()]
+
+    assert titles(category="Toys") == ["Deal 1", "Deal 3", "Deal 5"]
+    assert titles(marketplace="Ebay") == ["Deal 3"]
+    assert titles(min_discount=40, category="Home") == ["Deal 4", "Deal 6"]
+    assert titles(category="Garden") == []
+
+
+def test_csv_round_trips_through_a_csv_reader(client, catalog):
+    response = client.get("/deals/export", params={"format": "csv"})
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.headers["content-disposition"] == 'attachment; filename="deals.csv"'
+
+    reader = csv.reader(io.StringIO(response.text, newline=""))
+    assert tuple(next(reader)) == deal_json.DEAL_FIELDS
+    rows = list(reader)
+    expected = [json.loads(line) for line in export(client).splitlines()]
+    assert rows == [[str(value) for value in deal.values()] for deal in expected]
+    assert rows[-1][0] == 'Crème "brûlée", torch\nset — ½ off'
+
+
+def test_empty_csv_is_just_the_header(client):
+    assert export(client, format="csv") == ",".join(deal_json.DEAL_FIELDS) + "\r\n"
+    assert export(client) == ""
+
+
+def test_unknown_format_is_rejected(client):
+    assert client.get("/deals/export", params={"format": "xml"}).status_code == 422
+
+
+def test_rows_stream_one_partition_per_chunk(session_factory, catalog, monkeypatch):
+    monkeypatch.setattr(deal_export, "PARTITION_SIZE", 3)
+    db = session_factory()
+    ndjson = list(deal_export.iter_ndjson(db, deal_export.export_query()))
+    assert [chunk.count(b"\n") for chunk in ndjson] == [3, 3, 2]
+
+    chunks = list(deal_export.iter_csv(db, deal_export.export_query()))
+    assert len(chunks) == 3
+    assert chunks[0].startswith(b"title,marketplace,")
+    assert not any(chunk.startswith(b"title,") for chunk in chunks[1:])
+    db.close()
+
+
+def test_gzip_chunks_decompress_to_the_input():
+    rng = random.Random(25)
+    data = [rng.randbytes(4096) for _ in range(50)]
+    compressed = list(deal_export.gzip_chunks(data))
+    # Output is produced as input arrives, not all at the end
+    assert len(compressed) > 2
+    assert gzip.decompress(b"".join(compressed)) == b"".join(data)
+    assert gzip.decompress(b"".join(deal_export.gzip_chunks([]))) == b""
+
+
+def test_gzipped_export_matches_the_plain_one(client, catalog):
+    plain = client.get("/deals/export", params={"format": "csv"})
+    gzipped = client.get("/deals/export", params={"format": "csv", "gzip": True})
+    assert gzipped.headers["content-encoding"] == "gzip"
+    # httpx undoes the Content-Encoding
+    assert gzipped.content == plain.content
+
+
+def test_cli_export_writes_gzip_for_gz_output(client, catalog, tmp_path):
+    output = tmp_path / "deals.csv.gz"
+    assert cli.main(["export", "--format", "csv", "--category", "Toys", "--output", str(output)]) == 0
+    assert gzip.decompress(output.read_bytes()).decode() == export(client, format="csv", category="Toys")
+
+    output = tmp_path / "deals.ndjson"
+    assert cli.main(["export", "--min-discount", "50", "--output", str(output)]) == 0
+    assert output.read_text() == export(client, min_discount=50)
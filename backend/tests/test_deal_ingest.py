@@ -0,0 +1,46 @@
+from app.services import deal_ingest
+
+from tests.conftest import make_deal
+
+
+def test_insert_then_unchanged_then_changed(session_factory):
+    db = session_factory()
+    first = deal_ingest.upsert_deals(db, [make_deal(1), make_deal(2)])
+    db.commit()
+    assert (len(first.inserted), len(first.changed), len(first.unchanged)) == (2, 0, 0)
+
+    second = deal_ingest.upsert_deals(db, [make_deal(1), make_deal(2, price=5.0)])
+    db.commit()
+    assert [deal.title for deal in second.unchanged] == ["Deal 1"]
+    assert [deal.title for deal in second.changed] == ["Deal 2"]
+    assert [(change.previous_price, change.price) for change in second.price_changes] == [(12.0, 5.0)]
+    db.close()
+
+
+def test_concurrent_writer_rows_are_reported_unchanged(session_factory, monkeypatch):
+    rows = [make_deal(index) for index in range(6)]
+    first, second = session_factory(), session_factory()
+
+    # Both sessions load the batch keys before either one writes
+    loaded = {}
+    original_load = deal_ingest._load_existing
+
+    def load_once_per_session(db, batch):
+        if db not in loaded:
+            loaded[db] = original_load(db, batch)
+        return loaded[db]
+
+    monkeypatch.setattr(deal_ingest, "_load_existing", load_once_per_session)
+    load_once_per_session(first, rows)
+    load_once_per_session(second, rows)
+
+    winner = deal_ingest.upsert_deals(first, rows)
+    first.commit()
+    follower = deal_ingest.upsert_deals(second, rows)
+    second.commit()
+
+    assert len(winner.inserted) == 6
+    assert (len(follower.inserted), len(follower.changed), len(follower.unchanged)) == (0, 0, 6)
+    assert sorted(deal.id for deal in follower.deals) == sorted(deal.id for deal in winner.deals)
+    first.close()
+    second.close()
@@ -0,0 +1,91 @@
+"""Row-based deal bodies are byte-identical to Pydantic's rendering of the same deals."""
+
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select
+
+from app import models, schemas
+from app.services import deal_ingest, deal_json
+
+from tests.conftest import make_deal
+
+
+@pytest.fixture(params=["orjson", "json"])
+def encoder(request, monkeypatch):
+    if request.param == "orjson":
+        if deal_json.orjson is None:
+            pytest.skip("orjson is not installed")
+    else:
+        monkeypatch.setattr(deal_json, "orjson", None)
+    return request.param
+
+
+def row(**overrides) -> tuple:
+    values = {
+        "title": "Deal",
+        "marketplace": "amazon",
+        "category": "Electronics",
+        "price": 19.99,
+        "original_price": 39.98,
+        "discount_percent": 50,
+        "product_url": "https://example.com/deal",
+        "image_url": "https://example.com/deal.jpg",
+        "is_active": True,
+        "id": 1,
+        "created_at": datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc),
+        "updated_at": datetime(2024, 5, 2, 8, 0, 0, 120000, tzinfo=timezone.utc),
+        **overrides,
+    }
+    return tuple(values[name] for name in deal_json.DEAL_FIELDS)
+
+
+def pydantic_json(deal_row: tuple) -> bytes:
+    return schemas.DealResponse.model_validate(dict(zip(deal_json.DEAL_FIELDS, deal_row))).model_dump_json().encode()
+
+
+@pytest.mark.parametrize(
+    "overrides",
+    [
+        {},
+        # Non-ASCII stays unescaped, and surrounding whitespace is stripped
+        {"title": "  Café Kaffeemühle – 東京 ✨ ", "category": " Küche "},
+        {"title": 'Quotes "and" back\\slashes\n'},
+        # NUMERIC columns and some drivers return Decimal
+        {"price": Decimal("19.99"), "original_price": Decimal("40"), "discount_percent": Decimal("50")},
+        {"price": 0.1 + 0.2, "original_price": 1234567.5, "discount_percent": 0},
+        # Naive (SQLite) and non-UTC datetimes, with and without microseconds
+        {"created_at": datetime(2024, 5, 1, 12, 30), "updated_at": datetime(2024, 5, 1, 12, 30, 0, 5)},
+        {"created_at": datetime(2024, 5, 1, 12, 30, tzinfo=timezone(timedelta(hours=-5, minutes=-30)))},
+        {"is_active": False, "id": 2**40},
+    ],
+)
+def test_deal_matches_model_dump_json(encoder, overrides):
+    deal_row = row(**overrides)
+    assert deal_json.dumps(deal_json.deal_dict(deal_row)) == pydantic_json(deal_row)
+
+
+def test_search_envelope_matches_model_dump_json(encoder):
+    rows = [row(id=1, title=" Ünïcode "), row(id=2, price=Decimal("5.50"))]
+    for next_cursor in (None, "eyJpZCI6IDJ9"):
+        expected = schemas.DealSearchResponse(
+            deals=[dict(zip(deal_json.DEAL_FIELDS, deal_row)) for deal_row in rows], total=2, next_cursor=next_cursor
+        )
+        body = {"deals": deal_json.deal_dicts(rows), "total": 2, "next_cursor": next_cursor}
+        assert deal_json.dumps(body) == expected.model_dump_json().encode()
+
+
+def test_database_rows_match_the_orm_rendering(encoder, session_factory):
+    db = session_factory()
+    deals = [make_deal(0), make_deal(1, title="Crème brûlée torch 🔥", price=9.95, original_price=19.9)]
+    deal_ingest.upsert_deals(db, deals)
+    db.commit()
+
+    rows = db.execute(select(*deal_json.DEAL_COLUMNS).order_by(models.Deal.id)).all()
+    orm = db.scalars(select(models.Deal).order_by(models.Deal.id)).all()
+    assert len(rows) == 2
+    for deal_row, deal in zip(rows, orm):
+        expected = schemas.DealResponse.model_validate(deal).model_dump_json().encode()
+        assert deal_json.dumps(deal_json.deal_dict(deal_row)) == expected
+    db.close()
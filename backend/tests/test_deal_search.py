@@ -0,0 +1,111 @@
+"""Text search on GET /deals: term matching, relevance ranking and LIKE escaping."""
+
+from app.services import deal_ingest, deal_search
+
+from tests.conftest import make_deal
+
+
+def seed(session_factory, titles: list[str]) -> None:
+    db = session_factory()
+    deal_ingest.upsert_deals(db, [make_deal(index, title=title) for index, title in enumerate(titles)])
+    db.commit()
+    db.close()
+
+
+def search(client, q: str, **params) -> list[str]:
+    response = client.get("/deals", params={"q": q, **params})
+    assert response.status_code == 200
+    return [deal["title"] for deal in response.json()["deals"]]
+
+
+def test_tokenize_lowercases_and_dedupes_terms():
+    assert deal_search.tokenize("  Air  FRYER air\tninja ") == ["air", "fryer", "ninja"]
+
+
+def test_every_term_must_appear_in_any_order(client, session_factory):
+    seed(session_factory, ["Ninja Air Fryer", "Fryer basket for Ninja", "Air purifier", "AirPods Pro"])
+    # Neither title contains the phrase, so the newer deal comes first
+    assert search(client, "ninja fryer") == ["Fryer basket for Ninja", "Ninja Air Fryer"]
+    # Substring matching: "air" also matches inside "AirPods"
+    assert sorted(search(client, "AIR")) == ["Air purifier", "AirPods Pro", "Ninja Air Fryer"]
+    assert search(client, "ninja blender") == []
+
+
+def test_results_rank_by_where_the_phrase_appears(client, session_factory):
+    # Equal discounts, so only relevance and then the newest id decide the order
+    seed(
+        session_factory,
+        [
+            "Lego case for Star Wars",  # terms scattered: 1
+            "Classic Lego Star Wars set",  # phrase starts a word: 2
+            "Star Wars lego",  # terms out of order: 1
+            "LEGO Star Wars X-Wing",  # title starts with the phrase: 3
+            "Minifigure: lego star wars",  # phrase starts a word: 2
+        ],
+    )
+    assert search(client, "lego star wars") == [
+        "LEGO Star Wars X-Wing",
+        "Minifigure: lego star wars",
+        "Classic Lego Star Wars set",
+        "Star Wars lego",
+        "Lego case for Star Wars",
+    ]
+
+
+def test_relevance_outranks_discount_and_pages_keep_the_order(client, session_factory):
+    db = session_factory()
+    deal_ingest.upsert_deals(
+        db,
+        [
+            make_deal(0, title="Phone case", discount_percent=90),
+            make_deal(1, title="Phone charger", discount_percent=10),
+            make_deal(2, title="Smart phone stand", discount_percent=80),
+            make_deal(3, title="Phone mount", discount_percent=30),
+        ],
+    )
+    db.commit()
+    db.close()
+
+    expected = ["Phone case", "Phone mount", "Phone charger", "Smart phone stand"]
+    assert search(client, "phone") == expected
+
+    titles, cursor = [], None
+    while True:
+        body = client.get("/deals", params={"q": "phone", "limit": 1, **({"cursor": cursor} if cursor else {})}).json()
+        titles += [deal["title"] for deal in body["deals"]]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+    assert titles == expected
+
+
+def test_like_wildcards_in_the_query_match_literally(client, session_factory):
+    seed(session_factory, ["50% off blender", "500 piece puzzle", "usb_c cable", "usbxc cable", "C:\\drive bag"])
+    assert search(client, "50%") == ["50% off blender"]
+    assert search(client, "%") == ["50% off blender"]
+    assert search(client, "usb_c") == ["usb_c cable"]
+    assert search(client, "_") == ["usb_c cable"]
+    assert search(client, "c:\\drive") == ["C:\\drive bag"]
+    assert search(client, "\\") == ["C:\\drive bag"]
+
+
+def test_blank_query_is_no_filter(client, session_factory):
+    seed(session_factory, ["Anything", "Something else"])
+    assert len(search(client, "   ")) == 2
+
+
+def test_text_search_combines_with_the_other_filters(client, session_factory):
+    db = session_factory()
+    deal_ingest.upsert_deals(
+        db,
+        [
+            make_deal(0, title="Kindle Paperwhite", category="Electronics", discount_percent=20),
+            make_deal(1, title="Kindle cover", category="Accessories", discount_percent=40),
+            make_deal(2, title="Kindle Scribe", category="Electronics", discount_percent=40),
+        ],
+    )
+    db.commit()
+    db.close()
+
+    assert search(client, "kindle", category="Electronics") == ["Kindle Scribe", "Kindle Paperwhite"]
+    assert search(client, "kindle", min_discount=30) == ["Kindle Scribe", "Kindle cover"]
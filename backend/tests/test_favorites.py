@@ -0,0 +1,58 @@
+from sqlalchemy import text
+
+from tests.conftest import make_deal
+
+
+def seed_deals(session_factory, count):
+    from app.services import deal_ingest
+
+    db = session_factory()
+    deal_ingest.upsert_deals(db, [make_deal(index) for index in range(count)])
+    db.commit()
+    db.close()
+
+
+def page_through(client, device_id, limit):
+    ids, cursors, cursor = [], [], None
+    while True:
+        params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        body = client.get(f"/deals/favorites/{device_id}/ids", params=params).json()
+        ids.extend(body["deal_ids"])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return ids, cursors
+        assert cursor not in cursors, "cursor did not advance"
+        cursors.append(cursor)
+
+
+def test_bulk_add_skips_unknown_and_existing(client, session_factory):
+    seed_deals(session_factory, 5)
+    added = client.post("/deals/favorites/bulk", json={"device_id": "d", "deal_ids": [1, 2, 3, 999]})
+    assert added.json()["deal_ids"] == [1, 2, 3]
+    again = client.post("/deals/favorites/bulk", json={"device_id": "d", "deal_ids": [3, 4]})
+    assert again.json()["deal_ids"] == [4]
+
+    removed = client.request("DELETE", "/deals/favorites/bulk", json={"device_id": "d", "deal_ids": [1, 5]})
+    assert removed.json()["deal_ids"] == [1]
+
+
+def test_ids_pages_through_ties_on_created_at(client, session_factory):
+    seed_deals(session_factory, 10)
+    # One bulk add stamps every row with the same created_at
+    client.post("/deals/favorites/bulk", json={"device_id": "d", "deal_ids": list(range(1, 11))})
+
+    ids, _ = page_through(client, "d", limit=3)
+    assert ids == list(range(10, 0, -1))
+
+
+def test_ids_pages_newest_first_across_timestamps(client, session_factory, engine):
+    seed_deals(session_factory, 8)
+    client.post("/deals/favorites/bulk", json={"device_id": "d", "deal_ids": list(range(1, 9))})
+    with engine.begin() as connection:
+        # Stored the way the CURRENT_TIMESTAMP default writes them
+        connection.execute(text("UPDATE favorite_deals SET created_at = '2026-01-01 00:00:00' WHERE deal_id <= 4"))
+        connection.execute(text("UPDATE favorite_deals SET created_at = '2026-01-02 00:00:00' WHERE deal_id > 4"))
+
+    ids, cursors = page_through(client, "d", limit=3)
+    assert ids == [8, 7, 6, 5, 4, 3, 2, 1]
+    assert len(cursors) == 2
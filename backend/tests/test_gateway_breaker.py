@@ -0,0 +1,94 @@
+import time
+
+import pytest
+
+from app.routers import deals
+from app.services import gateway
+from app.services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+from tests.conftest import run_closing
+from tests.fake_gateway import gateway_deals
+
+
+@pytest.fixture
+def breaker_env(monkeypatch):
+    monkeypatch.setenv("GATEWAY_BREAKER_FAILURES", "2")
+    monkeypatch.setenv("GATEWAY_BREAKER_RESET", "0.2")
+    monkeypatch.setenv("GATEWAY_CACHE_TTL", "0.2")
+    monkeypatch.setenv("GATEWAY_TOTAL_TIMEOUT", "1")
+
+
+def fetch():
+    return run_closing(deals._fetch_gateway_deals("headphones", [], 6))
+
+
+def test_breaker_opens_after_consecutive_failures_and_recovers():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05, min_timeout=0.1, max_timeout=1.0)
+
+    def fail(timeout):
+        raise RuntimeError("down")
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            breaker.call(fail)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda timeout: "unreachable")
+
+    time.sleep(0.06)
+    assert breaker.state == HALF_OPEN
+    assert breaker.call(lambda timeout: timeout) == 1.0  # trials get the full timeout
+    assert breaker.state == CLOSED
+
+
+def test_adaptive_timeout_tracks_p95_latency():
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=1, min_timeout=0.05, max_timeout=10.0)
+    assert breaker.current_timeout() == 10.0
+    for _ in range(10):
+        breaker.call(lambda timeout: time.sleep(0.02))
+    assert 0.05 <= breaker.current_timeout() < 1.0
+
+
+def test_slow_gateway_times_out_and_opens_the_circuit(fake_gateway, breaker_env):
+    fake_gateway.delay = 1.5
+    assert fetch() == deals._fallback_deals()
+    assert fetch() == deals._fallback_deals()
+    assert gateway.get_breaker().state == OPEN
+
+    calls = fake_gateway.calls
+    assert fetch() == deals._fallback_deals()
+    assert fake_gateway.calls == calls  # short-circuited, the gateway was not called
+
+
+def test_failed_call_serves_the_expired_cached_result(fake_gateway, breaker_env):
+    fresh = fetch()
+    assert [deal["title"] for deal in fresh] == [deal["title"] for deal in gateway_deals()]
+
+    time.sleep(0.25)  # cache entry expires
+    fake_gateway.status = 503
+    assert fetch() == fresh
+
+
+def test_open_circuit_serves_the_expired_cached_result(fake_gateway, breaker_env):
+    fresh = fetch()
+    time.sleep(0.25)
+    fake_gateway.status = 503
+    fetch()
+    fetch()
+    assert gateway.get_breaker().state == OPEN
+
+    calls = fake_gateway.calls
+    assert fetch() == fresh
+    assert fake_gateway.calls == calls
+
+
+def test_half_open_trial_closes_the_circuit_once_the_gateway_recovers(fake_gateway, breaker_env):
+    fake_gateway.status = 503
+    fetch()
+    fetch()
+    assert gateway.get_breaker().state == OPEN
+
+    fake_gateway.status = 200
+    time.sleep(0.25)
+    assert [deal["title"] for deal in fetch()] == [deal["title"] for deal in gateway_deals()]
+    assert gateway.get_breaker().state == CLOSED
@@ -0,0 +1,71 @@
+"""The shared gateway client: connection reuse across concurrent refreshes."""
+
+import asyncio
+import logging
+import time
+
+import httpx
+
+from app.routers import deals
+from app.services import gateway
+
+from tests.conftest import run_closing
+
+
+def _refresh_concurrently(
+    count: int, clients: list[httpx.AsyncClient] | None = None
+) -> tuple[float, list[list[dict]]]:
+    """Await ``count`` distinct refresh fetches at once; returns (seconds, results).
+
+    GATEWAY_MAX_CONCURRENT (8) caps how many calls are outstanding. ``clients``
+    opened along the way are closed on the same event loop.
+    """
+
+    async def fetch_all() -> list[list[dict]]:
+        try:
+            fetches = (deals._fetch_gateway_deals(f"query {index}", [], 6) for index in range(count))
+            return await asyncio.gather(*fetches)
+        finally:
+            for client in clients or []:
+                await client.aclose()
+
+    started = time.perf_counter()
+    results = run_closing(fetch_all())
+    return time.perf_counter() - started, results
+
+
+def test_pooled_client_beats_a_client_per_call(fake_gateway, monkeypatch):
+    monkeypatch.setenv("GATEWAY_CACHE_TTL", "0")
+    fake_gateway.connect_delay = 0.1
+
+    pooled_seconds, results = _refresh_concurrently(24)
+    assert all(deal["title"].startswith("Gateway deal") for result in results for deal in result)
+    assert fake_gateway.calls == 24
+    # One connection per concurrent caller, reused for every later call
+    assert fake_gateway.connections <= 8
+
+    # The old behaviour: a fresh client, and so a fresh connection, per call
+    fake_gateway.connections = 0
+    clients = []
+
+    def client_per_call() -> httpx.AsyncClient:
+        clients.append(httpx.AsyncClient(base_url=fake_gateway.url, timeout=gateway.build_timeout()))
+        return clients[-1]
+
+    monkeypatch.setattr(gateway, "get_client", client_per_call)
+    per_call_seconds, _ = _refresh_concurrently(24, clients)
+
+    assert fake_gateway.connections == 24
+    assert pooled_seconds < per_call_seconds * 0.7
+
+
+def test_missing_h2_is_reported_at_startup(monkeypatch, caplog):
+    monkeypatch.setattr(gateway, "_h2_installed", lambda: False)
+    with caplog.at_level(logging.WARNING, logger=gateway.__name__):
+        gateway.check_http2()
+    assert "HTTP/1.1" in caplog.text
+
+    caplog.clear()
+    monkeypatch.setenv("GATEWAY_HTTP2", "false")
+    gateway.check_http2()
+    assert not caplog.text
@@ -0,0 +1,85 @@
+"""The home feed: categories, a deals page and favorite ids in one response."""
+
+import threading
+
+from app.services import home_feed
+
+from tests.test_favorites import seed_deals
+
+
+def favorite(client, device_id: str, *deal_ids: int) -> None:
+    response = client.post("/deals/favorites/bulk", json={"device_id": device_id, "deal_ids": list(deal_ids)})
+    assert response.status_code == 200
+
+
+def test_feed_is_the_three_bootstrap_calls_in_one(client, session_factory):
+    seed_deals(session_factory, 12)
+    favorite(client, "d", 3, 7)
+    favorite(client, "someone-else", 5)
+
+    feed = client.get("/deals/feed/d", params={"limit": 5})
+    assert feed.status_code == 200
+    body = feed.json()
+    assert set(body) == {"categories", "deals", "next_cursor", "favorite_deal_ids"}
+
+    search = client.get("/deals", params={"limit": 5}).json()
+    assert body["categories"] == client.get("/deals/categories").json()
+    assert body["deals"] == search["deals"]
+    assert body["next_cursor"] == search["next_cursor"]
+    # Bare ids, as GET /favorites/{device_id}/ids returns them
+    assert body["favorite_deal_ids"] == client.get("/deals/favorites/d/ids").json()["deal_ids"]
+    assert sorted(body["favorite_deal_ids"]) == [3, 7]
+
+
+def test_search_filters_apply_to_the_deals_page_only(client, session_factory):
+    seed_deals(session_factory, 6)
+    favorite(client, "d", 1)
+
+    params = {"q": "deal 4", "min_discount": 10, "limit": 3}
+    body = client.get("/deals/feed/d", params=params).json()
+    assert body["deals"] == client.get("/deals", params=params).json()["deals"]
+    assert [deal["title"] for deal in body["deals"]] == ["Deal 4"]
+    assert body["categories"] == ["Electronics"]
+    assert body["favorite_deal_ids"] == [1]
+
+
+def test_new_device_gets_an_empty_favorites_list(client, session_factory):
+    seed_deals(session_factory, 2)
+    body = client.get("/deals/feed/new-device").json()
+    assert body["favorite_deal_ids"] == []
+    assert len(body["deals"]) == 2
+
+
+def test_feed_revalidates_until_deals_or_favorites_change(client, session_factory, fake_gateway):
+    seed_deals(session_factory, 3)
+    etag = client.get("/deals/feed/d").headers["etag"]
+    assert client.get("/deals/feed/d", headers={"If-None-Match": etag}).status_code == 304
+
+    # Another device's favorites leave this feed's ETag alone
+    favorite(client, "someone-else", 1)
+    assert client.get("/deals/feed/d", headers={"If-None-Match": etag}).status_code == 304
+
+    favorite(client, "d", 2)
+    changed = client.get("/deals/feed/d", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json()["favorite_deal_ids"] == [2]
+
+    etag = changed.headers["etag"]
+    client.post("/deals/refresh", json={"query": "gateway", "limit": 6})
+    refreshed = client.get("/deals/feed/d", headers={"If-None-Match": etag})
+    assert refreshed.status_code == 200
+    assert len(refreshed.json()["deals"]) == 9
+
+
+def test_side_queries_run_on_the_feed_pool(client, session_factory, monkeypatch):
+    seed_deals(session_factory, 2)
+    threads = []
+    favorite_deal_ids = home_feed.favorite_deal_ids
+
+    def record_thread(db, device_id):
+        threads.append(threading.current_thread().name)
+        return favorite_deal_ids(db, device_id)
+
+    monkeypatch.setattr(home_feed, "favorite_deal_ids", record_thread)
+    assert client.get("/deals/feed/d").status_code == 200
+    assert threads and threads[0].startswith("home-feed")
@@ -0,0 +1,45 @@
+import pytest
+
+from app.services import pagination
+
+from tests.conftest import make_deal
+
+
+def test_round_trip():
+    cursor = pagination.encode_cursor([3, 40, 17])
+    assert pagination.decode_cursor(cursor, [range(1, 4), int, int]) == [3, 40, 17]
+
+
+@pytest.mark.parametrize(
+    "values",
+    [[{}, {}], ["a", "b"], [1.5, 2], [True, 2], [None, 2], [1], [1, 2, 3]],
+)
+def test_rejects_values_of_the_wrong_shape(values):
+    with pytest.raises(ValueError):
+        pagination.decode_cursor(pagination.encode_cursor(values), [int, int])
+
+
+def test_rejects_relevance_outside_its_tiers():
+    with pytest.raises(ValueError):
+        pagination.decode_cursor(pagination.encode_cursor([7, 10, 1]), [range(1, 4), int, int])
+
+
+@pytest.mark.parametrize("values", [[{}, {}], ["a", "b"], [4, 10, 1], [0, "x", 1]])
+def test_search_answers_bad_cursors_with_400(client, session_factory, values):
+    from app.services import deal_ingest
+
+    db = session_factory()
+    deal_ingest.upsert_deals(db, [make_deal(index) for index in range(3)])
+    db.commit()
+    db.close()
+
+    cursor = pagination.encode_cursor(values)
+    assert client.get("/deals", params={"cursor": cursor}).status_code == 400
+    assert client.get("/deals", params={"q": "deal", "cursor": cursor}).status_code == 400
+    assert client.get("/deals", params={"cursor": "not base64!"}).status_code == 400
+
+
+def test_favorite_ids_answers_bad_cursors_with_400(client):
+    for values in (["2026-01-01T00:00:00", "x"], [1, 2], ["yesterday", 1]):
+        cursor = pagination.encode_cursor(values)
+        assert client.get("/deals/favorites/d/ids", params={"cursor": cursor}).status_code == 400
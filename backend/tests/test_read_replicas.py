@@ -0,0 +1,187 @@
+"""Read routing: replicas round-robin, dead-replica skipping and read-your-writes.
+
+Replicas here are separate SQLite files that nothing replicates into, so
+which database served a read shows in the data it returns.
+"""
+
+import asyncio
+import time
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from app import database
+from app.routers import deals
+from app.services import deal_ingest, recommendations
+from tests.conftest import async_engine_for, make_deal, sqlite_engine
+
+
+def _served_by(db) -> str:
+    try:
+        return db.execute(text("SELECT keyword FROM user_interests WHERE device_id = 'marker'")).scalar_one()
+    finally:
+        db.close()
+
+
+def _mark(engine, marker: str) -> None:
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO user_interests (device_id, category, keyword, priority) "
+                "VALUES ('marker', 'Electronics', :marker, 1)"
+            ),
+            {"marker": marker},
+        )
+
+
+def _database(path, marker: str) -> str:
+    engine = sqlite_engine(path)
+    _mark(engine, marker)
+    engine.dispose()
+    return f"sqlite:///{path}"
+
+
+@pytest.fixture
+def replica_urls(engine, tmp_path, monkeypatch):
+    """Wire two replica files in through DATABASE_READ_URLS; the primary is marked too."""
+    _mark(engine, "primary")
+    urls = [_database(tmp_path / "replica-a.db", "replica-a"), _database(tmp_path / "replica-b.db", "replica-b")]
+    # SQLite has no search_path; build plain engines instead
+    monkeypatch.setattr(database, "_create_engine", lambda url, schema_name: create_engine(url))
+    monkeypatch.setattr(database, "_create_async_engine", lambda url, schema_name: async_engine_for(url))
+    monkeypatch.setattr(database, "_replicas", None)
+    monkeypatch.setenv("DATABASE_READ_URLS", ",".join(urls))
+    yield urls
+    for replica in database._replicas or []:
+        replica.session_local.kw["bind"].dispose()
+
+
+def _configure(monkeypatch, urls):
+    monkeypatch.setattr(database, "_replicas", None)
+    monkeypatch.setenv("DATABASE_READ_URLS", ",".join(urls))
+
+
+def test_reads_alternate_between_replicas(replica_urls):
+    served = [_served_by(database.read_session()) for _ in range(4)]
+
+    assert set(served) == {"replica-a", "replica-b"}
+    assert served[0] != served[1] and served[0] == served[2] and served[1] == served[3]
+
+
+def test_no_replicas_reads_from_the_primary(engine, monkeypatch):
+    monkeypatch.setattr(database, "_replicas", None)
+    monkeypatch.delenv("DATABASE_READ_URLS", raising=False)
+    monkeypatch.delenv("DATABASE_READ_URL", raising=False)
+    _mark(engine, "primary")
+
+    assert _served_by(database.read_session()) == "primary"
+
+
+def test_dead_replica_is_skipped_until_the_retry_window_passes(replica_urls, tmp_path, monkeypatch):
+    # The directory does not exist yet, so connecting to this replica fails
+    dead_path = tmp_path / "missing" / "replica-c.db"
+    _configure(monkeypatch, [replica_urls[0], f"sqlite:///{dead_path}"])
+    monkeypatch.setenv("DATABASE_READ_RETRY_SECONDS", "0.3")
+
+    assert [_served_by(database.read_session()) for _ in range(4)] == ["replica-a"] * 4
+    down = database._get_replicas()[1]
+    assert down.down_until > time.monotonic()
+
+    dead_path.parent.mkdir()
+    _database(dead_path, "replica-c")
+    # Still inside the window: the replica is not retried yet
+    assert [_served_by(database.read_session()) for _ in range(2)] == ["replica-a"] * 2
+
+    time.sleep(0.35)
+    served = [_served_by(database.read_session()) for _ in range(4)]
+    assert set(served) == {"replica-a", "replica-c"}
+
+
+def test_all_replicas_down_falls_back_to_the_primary(replica_urls, tmp_path, monkeypatch):
+    _configure(monkeypatch, [f"sqlite:///{tmp_path / 'missing' / 'replica.db'}"])
+
+    assert _served_by(database.read_session()) == "primary"
+
+
+def test_device_reads_stay_on_the_primary_after_a_write(replica_urls, monkeypatch):
+    monkeypatch.setenv("READ_YOUR_WRITES_SECONDS", "0.3")
+
+    database.note_write("device")
+
+    assert [_served_by(database.read_session("device")) for _ in range(3)] == ["primary"] * 3
+    assert _served_by(database.read_session("other-device")) != "primary"
+    assert _served_by(database.read_session()) != "primary"
+
+    time.sleep(0.35)
+    assert _served_by(database.read_session("device")) != "primary"
+
+
+async def _async_served_by(device_id: str | None = None) -> str:
+    db = await database.async_read_session(device_id)
+    try:
+        return (
+            await db.execute(text("SELECT keyword FROM user_interests WHERE device_id = 'marker'"))
+        ).scalar_one()
+    finally:
+        await db.close()
+
+
+def test_async_reads_share_routing_and_replica_health(replica_urls, tmp_path, monkeypatch):
+    async def reads(count: int, device_id: str | None = None) -> list[str]:
+        return [await _async_served_by(device_id) for _ in range(count)]
+
+    assert set(asyncio.run(reads(4))) == {"replica-a", "replica-b"}
+
+    database.note_write("device")
+    assert asyncio.run(reads(2, "device")) == ["primary"] * 2
+
+    _configure(monkeypatch, [replica_urls[0], f"sqlite:///{tmp_path / 'missing' / 'replica.db'}"])
+    assert asyncio.run(reads(4)) == ["replica-a"] * 4
+    # The sync path sees the replica the async path marked down
+    assert database._get_replicas()[1].down_until > time.monotonic()
+
+
+def test_writes_use_the_primary_and_the_writer_reads_them_back(replica_urls, client, monkeypatch):
+    monkeypatch.setenv("READ_YOUR_WRITES_SECONDS", "0.3")
+    payload = {"device_id": "device", "category": "Electronics", "keyword": "headphones", "priority": 2}
+
+    created = client.post("/deals/interests", json=payload)
+    assert created.status_code == 200
+
+    # The POST went to the primary; the replicas never saw it
+    with database.get_session_local()() as db:
+        assert db.execute(text("SELECT keyword FROM user_interests WHERE device_id = 'device'")).scalar_one() == (
+            "headphones"
+        )
+    for replica in database._get_replicas():
+        with replica.session_local() as db:
+            assert db.execute(text("SELECT count(*) FROM user_interests WHERE device_id = 'device'")).scalar_one() == 0
+
+    # Pinned to the primary, the device sees its write despite the lagging replicas
+    listed = client.get("/deals/interests/device")
+    assert [interest["keyword"] for interest in listed.json()] == ["headphones"]
+
+    time.sleep(0.35)
+    assert client.get("/deals/interests/device").json() == []
+
+
+
+def test_recommendation_index_is_rebuilt_from_a_replica(replica_urls, monkeypatch):
+    # The replicas hold three deals and the primary one, so the ranking shows where the index was built
+    for url, count in [(str(database.get_engine().url), 1)] + [(url, 3) for url in replica_urls]:
+        engine = create_engine(url)
+        with Session(engine) as db:
+            deal_ingest.upsert_deals(db, [make_deal(index) for index in range(count)])
+            db.commit()
+        engine.dispose()
+
+    opened = []
+    read_session = database.read_session
+    monkeypatch.setattr(deals, "read_session", lambda: opened.append(1) or read_session())
+
+    assert len(deals._rank_deals(1, [], set())) == 3
+    assert recommendations.current_index(1) is not None
+    # A current index is scored without opening a session at all
+    assert len(deals._rank_deals(1, [], set())) == 3
+    assert len(opened) == 1
@@ -0,0 +1,22 @@
+import pytest
+
+from app.services import recommendation_cache
+
+
+def test_memory_backend_round_trip(engine):
+    key = recommendation_cache.key_for("device", [1, 2, 3])
+    assert recommendation_cache.lookup(key) is None
+    recommendation_cache.store(key, {"device_id": "device", "recommendations": []})
+    assert recommendation_cache.lookup(key) == {"device_id": "device", "recommendations": []}
+
+
+def test_unreachable_redis_is_a_miss_not_an_error(client, monkeypatch):
+    pytest.importorskip("redis")
+    monkeypatch.setenv("RECOMMENDATION_CACHE_BACKEND", "redis")
+    # Nothing listens on port 1, so every command fails to connect
+    monkeypatch.setenv("REDIS_URL", "redis://127.0.0.1:1/0")
+
+    response = client.get("/deals/recommendations/device")
+    assert response.status_code == 200
+    assert response.json() == {"device_id": "device", "recommendations": []}
+    assert recommendation_cache.stats()["errors"] == 2  # one failed read, one failed write
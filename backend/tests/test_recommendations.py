@@ -0,0 +1,136 @@
+"""Index-backed and NumPy recommendations rank exactly like the per-deal scoring loop they replaced."""
+
+import random
+
+import pytest
+
+from app.services.recommendations import (
+    CATEGORY_WEIGHT,
+    FAVORITE_CATEGORY_BONUS,
+    KEYWORD_WEIGHT,
+    TOP_K,
+    InterestWeight,
+    RecommendationIndex,
+)
+
+CATEGORIES = ["Electronics", "Home", "Toys", "Books"]
+WORDS = ["lego", "Headphones", "air", "fryer", "TV", "pro", "mini", "x"]
+
+
+def reference_recommend(
+    deals: list[dict], interests: list[InterestWeight], favorite_categories: set[str]
+) -> list[int]:
+    """The original loop: score every active deal, ties going to the lower id."""
+    scored = []
+    for deal in sorted(deals, key=lambda deal: deal["id"]):
+        if not deal["is_active"]:
+            continue
+        score = float(deal["discount_percent"])
+        for interest in interests:
+            if deal["category"].lower() == interest.category.lower():
+                score += CATEGORY_WEIGHT * interest.priority
+            if interest.keyword.lower() in deal["title"].lower():
+                score += KEYWORD_WEIGHT * interest.priority
+        if deal["category"] in favorite_categories:
+            score += FAVORITE_CATEGORY_BONUS
+        scored.append((score, deal["id"]))
+    return [deal_id for _, deal_id in sorted(scored, key=lambda item: item[0], reverse=True)[:TOP_K]]
+
+
+def random_deals(rng: random.Random, count: int) -> list[dict]:
+    # Few categories and discounts, so equal scores (ties) are common
+    return [
+        {
+            "id": deal_id,
+            "title": " ".join(rng.sample(WORDS, rng.randint(1, 3))),
+            "category": rng.choice(CATEGORIES),
+            "discount_percent": rng.choice([10, 20, 25, 30]),
+            "is_active": rng.random() > 0.1,
+        }
+        for deal_id in rng.sample(range(1, count * 3), count)
+    ]
+
+
+def random_profile(rng: random.Random) -> tuple[list[InterestWeight], set[str]]:
+    interests = []
+    for priority in range(1, rng.randint(0, 4) + 1):
+        category = rng.choice(CATEGORIES + ["Garden"])
+        # Mixed case, keywords shorter than a trigram, and phrases spanning words
+        keyword = rng.choice(WORDS + ["ai", "o", "air fryer", "nothing"])
+        if rng.random() < 0.3:
+            category, keyword = category.swapcase(), keyword.swapcase()
+        interests.append(InterestWeight(category=category, keyword=keyword, priority=priority))
+    return interests, set(rng.sample(CATEGORIES, rng.randint(0, 2)))
+
+
+def build_index(deals: list[dict]) -> RecommendationIndex:
+    index = RecommendationIndex()
+    for deal in deals:
+        index.upsert(deal["id"], deal["title"], deal["category"], deal["discount_percent"], deal["is_active"])
+    return index
+
+
+def test_index_matches_the_reference_loop():
+    rng = random.Random(11)
+    for _ in range(20):
+        deals = random_deals(rng, rng.randint(0, 200))
+        index = build_index(deals)
+        for _ in range(10):
+            interests, favorite_categories = random_profile(rng)
+            assert index.recommend(interests, favorite_categories) == reference_recommend(
+                deals, interests, favorite_categories
+            )
+
+
+def test_index_matches_the_reference_loop_after_updates():
+    rng = random.Random(12)
+    deals = random_deals(rng, 150)
+    index = build_index(deals)
+
+    # Edits, deactivations and removals must leave no stale postings behind
+    for deal in rng.sample(deals, 60):
+        deal.update(random_deals(rng, 1)[0], id=deal["id"])
+        index.upsert(deal["id"], deal["title"], deal["category"], deal["discount_percent"], deal["is_active"])
+    for deal in rng.sample(deals, 20):
+        deal["is_active"] = False
+        index.remove(deal["id"])
+
+    for _ in range(50):
+        interests, favorite_categories = random_profile(rng)
+        assert index.recommend(interests, favorite_categories) == reference_recommend(
+            deals, interests, favorite_categories
+        )
+
+
+def test_ties_go_to_the_lower_id():
+    deals = [
+        {"id": deal_id, "title": "Same deal", "category": "Toys", "discount_percent": 20, "is_active": True}
+        for deal_id in (40, 7, 19, 3)
+    ]
+    index = build_index(deals)
+    assert index.recommend([], set()) == [3, 7, 19, 40]
+    assert index.recommend([InterestWeight("toys", "same", 1)], {"Toys"}) == [3, 7, 19, 40]
+
+
+def test_columnar_scorer_matches_the_reference_loop():
+    recommendations_numpy = pytest.importorskip("app.services.recommendations_numpy")
+    rng = random.Random(13)
+    for _ in range(20):
+        deals = random_deals(rng, rng.randint(0, 200))
+        scorer = recommendations_numpy.ColumnarScorer(build_index(deals))
+        for _ in range(10):
+            interests, favorite_categories = random_profile(rng)
+            assert scorer.recommend(interests, favorite_categories) == reference_recommend(
+                deals, interests, favorite_categories
+            )
+
+
+def test_columnar_scorer_breaks_boundary_ties_by_id():
+    recommendations_numpy = pytest.importorskip("app.services.recommendations_numpy")
+    # More equal scores than fit in the top K, so argpartition's pick must be re-sorted
+    deals = [
+        {"id": deal_id, "title": "Same deal", "category": "Toys", "discount_percent": 20, "is_active": True}
+        for deal_id in range(60, 0, -3)
+    ]
+    scorer = recommendations_numpy.ColumnarScorer(build_index(deals))
+    assert scorer.recommend([], set()) == sorted(deal["id"] for deal in deals)[:TOP_K]
@@ -0,0 +1,98 @@
+"""Fan-out refreshes: one gateway call per shard, merged and deduplicated."""
+
+import asyncio
+
+from app import schemas
+from app.routers import deals
+
+
+class ShardGateway:
+    """Stands in for ``_fetch_gateway_deals``, returning deals named after their shard."""
+
+    def __init__(self, overlap: list[dict] = (), delay: float = 0.0):
+        self.overlap = list(overlap)
+        self.delay = delay
+        self.calls = []
+        self.concurrent = 0
+        self.max_concurrent = 0
+
+    async def __call__(self, query, categories, limit, marketplaces=None):
+        self.calls.append((tuple(categories), tuple(marketplaces or ()), limit))
+        self.concurrent += 1
+        self.max_concurrent = max(self.max_concurrent, self.concurrent)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.concurrent -= 1
+        category = categories[0] if categories else "Any"
+        marketplace = marketplaces[0] if marketplaces else "Amazon"
+        # One more than asked for: the shard limit must be enforced here too
+        own = [raw(f"{category} {marketplace} {index}", category, marketplace) for index in range(limit + 1)]
+        return self.overlap + own
+
+
+def raw(title: str, category: str = "Toys", marketplace: str = "Amazon") -> dict:
+    return {"title": title, "marketplace": marketplace, "category": category, "price": 5, "original_price": 10}
+
+
+def fan_out(monkeypatch, fake: ShardGateway, **request) -> list[dict]:
+    monkeypatch.setattr(deals, "_fetch_gateway_deals", fake)
+    payload = schemas.MarketplaceRefreshRequest(fan_out=True, **request)
+    return asyncio.run(deals._fetch_fanned_out_deals(payload))
+
+
+def test_one_call_per_shard_with_a_shared_limit(monkeypatch):
+    fake = ShardGateway()
+    merged = fan_out(monkeypatch, fake, categories=["Toys", "Home"], marketplaces=["Amazon", "Ebay"], limit=10)
+
+    # ceil(10 / 4) deals from each of the four shards
+    assert sorted(fake.calls) == [
+        (("Home",), ("Amazon",), 3),
+        (("Home",), ("Ebay",), 3),
+        (("Toys",), ("Amazon",), 3),
+        (("Toys",), ("Ebay",), 3),
+    ]
+    assert len(merged) == 10
+
+
+def test_results_are_interleaved_so_every_shard_survives_the_trim(monkeypatch):
+    merged = fan_out(monkeypatch, ShardGateway(), categories=["Toys", "Home", "Books"], limit=4)
+    # Shards are walked round robin: first deal of each, then the second of each
+    assert [deal["title"] for deal in merged] == ["Toys Amazon 0", "Home Amazon 0", "Books Amazon 0", "Toys Amazon 1"]
+
+
+def test_duplicates_across_shards_are_merged(monkeypatch):
+    # Every shard also returns the same bestseller; marketplaces are title-cased before comparing
+    fake = ShardGateway(overlap=[raw("Bestseller", marketplace="amazon")])
+    merged = fan_out(monkeypatch, fake, categories=["Toys", "Home"], limit=6)
+
+    titles = [deal["title"] for deal in merged]
+    assert titles.count("Bestseller") == 1
+    assert titles[0] == "Bestseller"
+    assert len(set((deal["title"], deal["marketplace"]) for deal in merged)) == len(merged) == 5
+
+
+def test_shards_run_concurrently_up_to_the_worker_limit(monkeypatch):
+    monkeypatch.setenv("GATEWAY_FANOUT_WORKERS", "2")
+    fake = ShardGateway(delay=0.05)
+    fan_out(monkeypatch, fake, categories=["A", "B", "C", "D", "E"], limit=10)
+    assert len(fake.calls) == 5
+    assert fake.max_concurrent == 2
+
+
+def test_fan_out_refresh_persists_merged_deals(client, fake_gateway, monkeypatch):
+    monkeypatch.setenv("GATEWAY_CACHE_TTL", "0")
+    # The fake gateway returns the same six deals for every shard's prompt
+    payload = {"query": "gateway", "categories": ["Electronics", "Toys"], "limit": 12, "fan_out": True}
+    body = client.post("/deals/refresh", json=payload).json()
+
+    assert fake_gateway.calls == 2
+    assert body["inserted"] == 6
+    assert sorted(deal["title"] for deal in body["deals"]) == [f"Gateway deal {index}" for index in range(6)]
+
+
+def test_single_shard_refresh_is_not_fanned_out(client, fake_gateway, monkeypatch):
+    monkeypatch.setenv("GATEWAY_CACHE_TTL", "0")
+    payload = {"query": "gateway", "categories": ["Electronics"], "limit": 6, "fan_out": True}
+    assert client.post("/deals/refresh", json=payload).json()["inserted"] == 6
+    assert fake_gateway.calls == 1
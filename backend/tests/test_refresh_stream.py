@@ -0,0 +1,54 @@
+import asyncio
+import json
+import time
+
+from app.services import deal_ingest, gateway
+
+
+def refresh_stream(client, **params):
+    return client.post("/deals/refresh/stream", params=params, json={"query": "headphones", "limit": 6})
+
+
+def test_stream_persists_every_deal(client, fake_gateway):
+    response = refresh_stream(client)
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert len(lines) == 6
+    assert gateway.get_single_flight().stats()["running"] == 0
+
+
+def test_stream_takes_a_gateway_slot_and_429s_when_none_is_free(client, fake_gateway, monkeypatch):
+    monkeypatch.setenv("GATEWAY_MAX_CONCURRENT", "1")
+    monkeypatch.setenv("GATEWAY_MAX_QUEUED", "0")
+    monkeypatch.setenv("GATEWAY_CACHE_TTL", "0")
+
+    single_flight = gateway.get_single_flight()
+    asyncio.run(single_flight.acquire())  # a free slot is taken without waiting
+    try:
+        assert refresh_stream(client).status_code == 429
+        assert refresh_stream(client, ndjson="false").status_code == 429
+    finally:
+        single_flight.release()
+
+    assert refresh_stream(client).status_code == 200
+    assert single_flight.stats()["running"] == 0
+
+
+def test_downstream_work_is_not_gateway_latency(client, fake_gateway, monkeypatch):
+    monkeypatch.setenv("GATEWAY_TOTAL_TIMEOUT", "0.5")
+    original = deal_ingest.upsert_deals
+
+    def slow_upsert(db, rows):
+        time.sleep(0.15)
+        return original(db, rows)
+
+    monkeypatch.setattr(deal_ingest, "upsert_deals", slow_upsert)
+
+    started = time.monotonic()
+    lines = refresh_stream(client).text.splitlines()
+    assert time.monotonic() - started > 0.8
+
+    # Six slow commits outlast the total deadline, but only gateway time counts against it
+    assert len(lines) == 6
+    breaker = gateway.get_breaker().snapshot()
+    assert breaker["failures"] == 0
+    assert breaker["p95_latency_seconds"] < 0.4
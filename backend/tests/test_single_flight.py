@@ -0,0 +1,155 @@
+"""Coalescing identical gateway calls, and the limit on outstanding ones."""
+
+import asyncio
+import threading
+
+import pytest
+
+from app.services import gateway
+from app.services.single_flight import OverloadedError, SingleFlight
+
+
+def run(coroutine):
+    return asyncio.run(asyncio.wait_for(coroutine, 5))
+
+
+class SlowCall:
+    """An awaitable gateway stand-in that holds until ``release`` is set."""
+
+    def __init__(self, result="deals"):
+        self.result = result
+        self.calls = 0
+        self.release: asyncio.Event | None = None
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+async def start_together(flight: SingleFlight, call: SlowCall, keys: list[str]) -> list:
+    call.release = asyncio.Event()
+    tasks = [asyncio.create_task(flight.do(key, call)) for key in keys]
+    await asyncio.sleep(0.01)  # every caller is now leading or following
+    call.release.set()
+    return await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def test_identical_calls_share_one_result():
+    flight = SingleFlight(max_concurrent=2, max_queued=0, queue_timeout=1)
+    call = SlowCall()
+
+    assert run(start_together(flight, call, ["a"] * 5)) == ["deals"] * 5
+    assert call.calls == 1
+    stats = flight.stats()
+    assert (stats["leaders"], stats["coalesced"], stats["in_flight"], stats["running"]) == (1, 4, 0, 0)
+
+    # Once the call is over the next caller leads a new one
+    assert run(start_together(flight, call, ["a"])) == ["deals"]
+    assert call.calls == 2
+
+
+def test_followers_get_the_leaders_error():
+    flight = SingleFlight(max_concurrent=1, max_queued=0, queue_timeout=1)
+    error = ValueError("gateway said no")
+    results = run(start_together(flight, SlowCall(error), ["a"] * 3))
+    assert results == [error] * 3
+    assert flight.stats()["running"] == 0
+
+
+def test_followers_of_a_cancelled_leader_fail_cleanly():
+    flight = SingleFlight(max_concurrent=1, max_queued=0, queue_timeout=1)
+    call = SlowCall()
+
+    async def cancel_leader():
+        call.release = asyncio.Event()
+        leader = asyncio.create_task(flight.do("a", call))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(flight.do("a", call))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await asyncio.gather(leader, follower, return_exceptions=True)
+
+    leader, follower = run(cancel_leader())
+    assert isinstance(leader, asyncio.CancelledError)
+    assert isinstance(follower, RuntimeError)
+    assert flight.stats()["running"] == 0
+
+
+def test_distinct_calls_queue_then_overflow():
+    flight = SingleFlight(max_concurrent=2, max_queued=1, queue_timeout=1)
+    call = SlowCall()
+
+    results = run(start_together(flight, call, ["a", "b", "c", "d", "a"]))
+    # Two run, one waits for a slot, the fourth is turned away; the repeated key coalesces
+    assert results[:3] == ["deals"] * 3
+    assert isinstance(results[3], OverloadedError)
+    assert results[4] == "deals"
+    assert call.calls == 3
+    stats = flight.stats()
+    assert (stats["rejected"], stats["coalesced"], stats["running"], stats["queued"]) == (1, 1, 0, 0)
+
+
+def test_queued_call_times_out():
+    flight = SingleFlight(max_concurrent=1, max_queued=1, queue_timeout=0.05)
+    call = SlowCall()
+
+    async def hold_the_slot():
+        call.release = asyncio.Event()
+        running = asyncio.create_task(flight.do("a", call))
+        await asyncio.sleep(0.01)
+        with pytest.raises(OverloadedError):
+            await flight.do("b", call)
+        call.release.set()
+        return await running
+
+    assert run(hold_the_slot()) == "deals"
+    stats = flight.stats()
+    assert (stats["rejected"], stats["running"], stats["queued"]) == (1, 0, 0)
+
+
+def refresh(client):
+    return client.post("/deals/refresh", json={"query": "headphones", "limit": 6})
+
+
+def test_concurrent_identical_refreshes_make_one_gateway_call(client, fake_gateway, monkeypatch):
+    monkeypatch.setenv("GATEWAY_CACHE_TTL", "0")
+    fake_gateway.delay = 0.3
+    start = threading.Barrier(5)
+    statuses = []
+
+    def refresh_together():
+        start.wait()
+        statuses.append(refresh(client).status_code)
+
+    threads = [threading.Thread(target=refresh_together) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert statuses == [200] * 5
+    assert fake_gateway.calls == 1
+    calls = client.get("/deals/stats").json()["gateway_calls"]
+    assert (calls["leaders"], calls["coalesced"], calls["running"]) == (1, 4, 0)
+
+
+def test_refresh_429s_when_no_gateway_slot_is_free(client, fake_gateway, monkeypatch):
+    monkeypatch.setenv("GATEWAY_MAX_CONCURRENT", "1")
+    monkeypatch.setenv("GATEWAY_MAX_QUEUED", "0")
+    monkeypatch.setenv("GATEWAY_CACHE_TTL", "0")
+
+    single_flight = gateway.get_single_flight()
+    asyncio.run(single_flight.acquire())  # a free slot is taken without waiting
+    try:
+        response = refresh(client)
+        assert response.status_code == 429
+        assert response.json()["detail"] == "Too many gateway calls in flight"
+    finally:
+        single_flight.release()
+
+    assert refresh(client).status_code == 200
+    assert fake_gateway.calls == 1
+    assert single_flight.stats()["rejected"] == 1
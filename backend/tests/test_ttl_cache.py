@@ -0,0 +1,193 @@
+"""Persistent ``TTLCache``: batched background writes and cold-start loads."""
+
+import threading
+import time
+
+import pytest
+
+from app.services import gateway
+from app.services.cache_store import DatabaseCacheStore
+from app.services.ttl_cache import JSONFileStore, TTLCache
+
+
+class RecordingStore:
+    """Records write batches; ``gate`` holds a write open until it is set."""
+
+    def __init__(self, fail: int = 0):
+        self.batches = []
+        self.fail = fail
+        self.gate = threading.Event()
+        self.gate.set()
+        self.writing = threading.Event()
+
+    def load(self, limit):
+        return []
+
+    def write(self, upserts, deletes, cleared):
+        self.writing.set()
+        self.gate.wait(5)
+        if self.fail:
+            self.fail -= 1
+            raise OSError("store unavailable")
+        self.batches.append((sorted(upserts), sorted(deletes), cleared))
+
+
+def test_writes_are_batched_in_the_background():
+    store = RecordingStore()
+    cache = TTLCache(ttl_seconds=60, max_entries=10, store=store, flush_interval=0.2)
+
+    for i in range(5):
+        cache.set(f"k{i}", i)
+    cache.delete("k0")
+    # Nothing written synchronously by set()/delete()
+    assert store.batches == []
+
+    deadline = time.time() + 5
+    while not store.batches and time.time() < deadline:
+        time.sleep(0.05)
+
+    assert len(store.batches) == 1
+    upserts, deletes, cleared = store.batches[0]
+    assert [key for key, _, _ in upserts] == ["k1", "k2", "k3", "k4"]
+    assert deletes == ["k0"]
+    assert cleared is False
+    assert cache.stats()["pending_writes"] == 0
+    cache.close()
+
+
+def test_a_slow_store_write_does_not_block_the_cache():
+    store = RecordingStore()
+    cache = TTLCache(ttl_seconds=60, max_entries=10, store=store, flush_interval=60)
+    cache.set("a", 1)
+    store.gate.clear()
+
+    flusher = threading.Thread(target=cache.flush)
+    flusher.start()
+    assert store.writing.wait(5)
+
+    # The write is in progress, yet reads and writes go straight through
+    started = time.perf_counter()
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    assert time.perf_counter() - started < 0.5
+
+    store.gate.set()
+    flusher.join(5)
+    cache.flush()
+    assert [[key for key, _, _ in upserts] for upserts, _, _ in store.batches] == [["a"], ["b"]]
+    cache.close()
+
+
+def test_failed_writes_are_retried_with_the_next_batch():
+    store = RecordingStore(fail=1)
+    cache = TTLCache(ttl_seconds=60, max_entries=10, store=store, flush_interval=60)
+    cache.set("a", 1)
+
+    cache.flush()
+    assert store.batches == []
+    assert cache.stats()["flush_failures"] == 1
+    assert cache.stats()["pending_writes"] == 1
+
+    cache.set("b", 2)
+    cache.flush()
+    upserts, _, _ = store.batches[0]
+    assert [key for key, _, _ in upserts] == ["a", "b"]
+    cache.close()
+
+
+def test_file_store_round_trip(tmp_path):
+    path = str(tmp_path / "cache.json")
+    cache = TTLCache(ttl_seconds=60, max_entries=2, store=JSONFileStore(path), flush_interval=60)
+    cache.set("a", {"deals": [1]})
+    cache.set("b", {"deals": [2]})
+    cache.set("c", {"deals": [3]})
+    cache.close()
+
+    reloaded = TTLCache(ttl_seconds=60, max_entries=2, store=JSONFileStore(path), flush_interval=60)
+    assert reloaded.get("a") is None
+    assert reloaded.get("b") == {"deals": [2]}
+    assert reloaded.get("c") == {"deals": [3]}
+    reloaded.close()
+
+
+def test_database_store_survives_a_new_cache(engine):
+    cache = TTLCache(ttl_seconds=60, max_entries=10, store=DatabaseCacheStore("gateway"), flush_interval=60)
+    cache.set("a", {"deals": [1]})
+    cache.set("b", {"deals": [2]})
+    cache.flush()
+    cache.set("a", {"deals": [3]})
+    cache.delete("b")
+    cache.close()
+
+    # A cold start: a new cache, same table
+    reloaded = TTLCache(ttl_seconds=60, max_entries=10, store=DatabaseCacheStore("gateway"), flush_interval=60)
+    assert reloaded.get("a") == {"deals": [3]}
+    assert reloaded.get("b") is None
+    reloaded.clear()
+    reloaded.close()
+
+    other = TTLCache(ttl_seconds=60, max_entries=10, store=DatabaseCacheStore("gateway"), flush_interval=60)
+    assert other.stats()["entries"] == 0
+    other.close()
+
+
+def test_expired_entries_are_loaded_for_stale_reads(engine):
+    store = DatabaseCacheStore("gateway")
+    store.write([("old", time.time() - 120, [1])], [], False)
+
+    cache = TTLCache(ttl_seconds=60, max_entries=10, store=store, flush_interval=60)
+    assert cache.get("old") is None
+    assert cache.get("old", allow_stale=True) == [1]
+    cache.close()
+
+
+def test_gateway_cache_store_setting(monkeypatch, tmp_path):
+    monkeypatch.delenv("GATEWAY_CACHE_STORE", raising=False)
+    monkeypatch.delenv("GATEWAY_CACHE_PATH", raising=False)
+    assert gateway._cache_store() is None
+
+    monkeypatch.setenv("GATEWAY_CACHE_PATH", str(tmp_path / "cache.json"))
+    assert isinstance(gateway._cache_store(), JSONFileStore)
+
+    monkeypatch.setenv("GATEWAY_CACHE_STORE", "database")
+    assert isinstance(gateway._cache_store(), DatabaseCacheStore)
+
+    monkeypatch.setenv("GATEWAY_CACHE_STORE", "redis")
+    with pytest.raises(ValueError):
+        gateway._cache_store()
+
+
+def test_no_store_keeps_no_pending_writes():
+    cache = TTLCache(ttl_seconds=60, max_entries=10)
+    for i in range(1000):
+        cache.set(f"k{i}", i)
+    cache.delete("k999")
+    cache.clear()
+
+    assert cache._dirty == set()
+    assert cache._cleared is False
+    assert cache.stats()["pending_writes"] == 0
+
+
+def test_zero_flush_interval_writes_through():
+    store = RecordingStore()
+    cache = TTLCache(ttl_seconds=60, max_entries=10, store=store, flush_interval=0)
+
+    cache.set("a", 1)
+    assert [[key for key, _, _ in upserts] for upserts, _, _ in store.batches] == [["a"]]
+    cache.delete("a")
+    assert store.batches[-1][1] == ["a"]
+    assert cache.stats()["pending_writes"] == 0
+
+
+def test_gateway_cache_writes_through_on_serverless(engine, monkeypatch):
+    monkeypatch.setenv("GATEWAY_CACHE_STORE", "database")
+    monkeypatch.delenv("GATEWAY_CACHE_FLUSH_INTERVAL", raising=False)
+    monkeypatch.setenv("DATABASE_ENGINE_PROFILE", "serverless")
+
+    cache = gateway.get_cache()
+    assert cache.flush_interval == 0
+    cache.set("prompt", [{"title": "Deal"}])
+
+    # Already in the table, without a flush or shutdown
+    assert DatabaseCacheStore("gateway").load(10)[0][::2] == ("prompt", [{"title": "Deal"}])
@@ -1,5 +1,13 @@
 import { useEffect, useMemo, useState } from 'react';
-import { Linking, ScrollView, Share, StyleSheet, View } from 'react-native';
+import {
+  Linking,
+  NativeScrollEvent,
+  NativeSyntheticEvent,
+  ScrollView,
+  Share,
+  StyleSheet,
+  View,
+} from 'react-native';
 import { SafeAreaView } from 'react-native-safe-area-context';
 import {
   ActivityIndicator,
@@ -14,9 +22,8 @@ import {
 import { DealCard } from '@/components/DealCard';
 import {
   addFavorite,
-  fetchCategories,
   fetchDeals,
-  fetchFavorites,
+  fetchHomeFeed,
   recordShare,
   refreshDeals,
   removeFavorite,
@@ -24,6 +31,7 @@ import {
 import type { Deal } from '@/types/deals';
 
 const marketplaceFilters = ['All', 'Amazon', 'Walmart', 'Target'];
+const LOAD_MORE_THRESHOLD = 320;
 
 export default function DiscoverScreen() {
   const theme = useTheme();
@@ -34,36 +42,58 @@ export default function DiscoverScreen() {
 
   const [categories, setCategories] = useState<string[]>(['All']);
   const [deals, setDeals] = useState<Deal[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [favoriteIds, setFavoriteIds] = useState<Set<number>>(new Set());
   const [loading, setLoading] = useState(true);
   const [snackbarText, setSnackbarText] = useState('');
 
   const discountLevels = useMemo(() => [0, 10, 20, 30, 40], []);
 
-  const loadCategories = async () => {
-    const fetchedCategories = await fetchCategories();
-    setCategories(['All', ...fetchedCategories]);
-  };
+  const currentFilters = () => ({
+    q: search.trim() || undefined,
+    category: selectedCategory,
+    marketplace: selectedMarketplace,
+    minDiscount,
+  });
 
   const loadDeals = async () => {
-    const result = await fetchDeals({
-      q: search.trim() || undefined,
-      category: selectedCategory,
-      marketplace: selectedMarketplace,
-      minDiscount,
-    });
+    const result = await fetchDeals(currentFilters());
     setDeals(result.deals);
+    setNextCursor(result.next_cursor);
   };
 
-  const loadFavorites = async () => {
-    const favorites = await fetchFavorites();
-    setFavoriteIds(new Set(favorites.map((item) => item.deal_id)));
+  const loadMoreDeals = async () => {
+    if (!nextCursor || loadingMore) return;
+
+    try {
+      setLoadingMore(true);
+      const result = await fetchDeals({ ...currentFilters(), cursor: nextCursor });
+      setDeals((prev) => [...prev, ...result.deals]);
+      setNextCursor(result.next_cursor);
+    } catch {
+      setSnackbarText('Unable to load more deals.');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  const onScroll = ({ nativeEvent }: NativeSyntheticEvent<NativeScrollEvent>) => {
+    const { layoutMeasurement, contentOffset, contentSize } = nativeEvent;
+    const distanceFromEnd = contentSize.height - (layoutMeasurement.height + contentOffset.y);
+    if (distanceFromEnd < LOAD_MORE_THRESHOLD) {
+      loadMoreDeals();
+    }
   };
 
   const bootstrap = async () => {
     try {
       setLoading(true);
-      await Promise.all([loadCategories(), loadDeals(), loadFavorites()]);
+      const feed = await fetchHomeFeed(currentFilters());
+      setCategories(['All', ...feed.categories]);
+      setDeals(feed.deals);
+      setNextCursor(feed.next_cursor);
+      setFavoriteIds(new Set(feed.favorite_deal_ids));
     } catch {
       setSnackbarText('Unable to load deals right now.');
     } finally {
@@ -139,7 +169,12 @@ export default function DiscoverScreen() {
 
   return (
     <SafeAreaView style={[styles.container, { backgroundColor: theme.colors.background }]} edges={['top']}>
-      <ScrollView contentContainerStyle={styles.content} keyboardShouldPersistTaps="handled">
+      <ScrollView
+        contentContainerStyle={styles.content}
+        keyboardShouldPersistTaps="handled"
+        onScroll={onScroll}
+        scrollEventThrottle={120}
+      >
         <Text variant="headlineMedium" style={styles.heroTitle}>
           Deal Radar 🛍️
         </Text>
@@ -225,6 +260,8 @@ export default function DiscoverScreen() {
             />
           ))
         )}
+
+        {loadingMore ? <ActivityIndicator style={styles.loader} /> : null}
       </ScrollView>
 
       <Snackbar visible={Boolean(snackbarText)} onDismiss={() => setSnackbarText('')} duration={2200}>
@@ -2,7 +2,9 @@ import type {
   DealAlert,
   DealSearchResponse,
   FavoriteDeal,
+  HomeFeedResponse,
   Interest,
+  MarketplaceRefreshResponse,
   RecommendationResponse,
 } from '@/types/deals';
 
@@ -10,6 +12,9 @@ const API_BASE_URL = process.env.EXPO_PUBLIC_API_URL || 'http://localhost:8000';
 
 export const DEVICE_ID = 'demo-user-1';
 
+// Last body and ETag per GET endpoint, so revalidations answered with 304 reuse them
+const etagCache = new Map<string, { etag: string; body: unknown }>();
+
 async function apiRequest<T>(endpoint: string, options?: RequestInit): Promise<T> {
   const mergedHeaders = new Headers({
     'Content-Type': 'application/json',
@@ -20,25 +25,42 @@ async function apiRequest<T>(endpoint: string, options?: RequestInit): Promise<T
     incomingHeaders.forEach((value, key) => mergedHeaders.set(key, value));
   }
 
+  const isGet = !options?.method || options.method.toUpperCase() === 'GET';
+  const cached = isGet ? etagCache.get(endpoint) : undefined;
+  if (cached) {
+    mergedHeaders.set('If-None-Match', cached.etag);
+  }
+
   const response = await fetch(`${API_BASE_URL}${endpoint}`, {
     ...options,
     headers: mergedHeaders,
   });
 
+  if (response.status === 304 && cached) {
+    return cached.body as T;
+  }
+
   if (!response.ok) {
     const errorText = await response.text();
     throw new Error(errorText || 'Request failed');
   }
 
-  return (await response.json()) as T;
+  const body = (await response.json()) as T;
+  const etag = response.headers.get('ETag');
+  if (isGet && etag) {
+    etagCache.set(endpoint, { etag, body });
+  }
+  return body;
 }
 
-export function fetchDeals(params: {
+type DealFilters = {
   q?: string;
   category?: string;
   minDiscount?: number;
   marketplace?: string;
-}): Promise<DealSearchResponse> {
+};
+
+function dealQueryParams(params: DealFilters): URLSearchParams {
   const queryParams = new URLSearchParams();
 
   if (params.q) queryParams.set('q', params.q);
@@ -49,14 +71,26 @@ export function fetchDeals(params: {
   if (params.marketplace && params.marketplace !== 'All') {
     queryParams.set('marketplace', params.marketplace);
   }
+  return queryParams;
+}
+
+export function fetchDeals(params: DealFilters & { cursor?: string | null }): Promise<DealSearchResponse> {
+  const queryParams = dealQueryParams(params);
+  if (params.cursor) queryParams.set('cursor', params.cursor);
 
   const queryString = queryParams.toString();
   const endpoint = queryString ? `/deals?${queryString}` : '/deals';
   return apiRequest<DealSearchResponse>(endpoint);
 }
 
-export function refreshDeals(): Promise<DealSearchResponse> {
-  return apiRequest<DealSearchResponse>('/deals/refresh', {
+export function fetchHomeFeed(params: DealFilters): Promise<HomeFeedResponse> {
+  const queryString = dealQueryParams(params).toString();
+  const endpoint = `/deals/feed/${DEVICE_ID}${queryString ? `?${queryString}` : ''}`;
+  return apiRequest<HomeFeedResponse>(endpoint);
+}
+
+export function refreshDeals(): Promise<MarketplaceRefreshResponse> {
+  return apiRequest<MarketplaceRefreshResponse>('/deals/refresh', {
     method: 'POST',
     body: JSON.stringify({ limit: 18 }),
   });
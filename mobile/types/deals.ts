@@ -16,6 +16,31 @@ export interface Deal {
 export interface DealSearchResponse {
   deals: Deal[];
   total: number;
+  next_cursor: string | null;
+}
+
+export interface DealPriceChange {
+  deal_id: number;
+  title: string;
+  marketplace: string;
+  previous_price: number;
+  price: number;
+  price_delta: number;
+}
+
+export interface HomeFeedResponse {
+  categories: string[];
+  deals: Deal[];
+  next_cursor: string | null;
+  favorite_deal_ids: number[];
+}
+
+export interface MarketplaceRefreshResponse extends DealSearchResponse {
+  inserted: number;
+  changed: number;
+  unchanged: number;
+  price_changes: DealPriceChange[];
+  alerts_triggered: number;
 }
 
 export interface FavoriteDeal {